@@ -1,42 +1,52 @@
-import serial
-import serial.tools.list_ports
 import time
 import threading
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 from collections import deque
+import numpy as np
 import sys
 
+from adquisicion import Motor
+from esquemas import LEEM
+from graficas import GraficaBlit, crear_figura, precargar
+from puertos import VigilantePuertos
+from replay import puertos_replay
+
 # ---------- CONFIGURACIÓN ----------
-TIMEOUT = 1
 MAX_PUNTOS = 200
-SYNC_BYTE = b"\x01"
-PACKET_SIZE = 28
 COMANDO_IGNICION = b'\x04'
+CAPACIDAD_COLA = 5000
 # ----------------------------------
 
 # ---------- VARIABLES GLOBALES ----------
-ser = None
 leyendo = False
-contador_paquetes = 0
-ultimo_calculo_hz = None
-hz_actual = 0.0
+
+# El motor (adquisicion.py) lee, entrama y mide la frecuencia en su propio
+# bucle; aquí sólo se consulta desde el hilo de Tk
+motor = Motor(LEEM)
+data_queue = motor.suscribir(CAPACIDAD_COLA)
 
 tiempos_hz = deque(maxlen=MAX_PUNTOS)
 valores_hz = deque(maxlen=MAX_PUNTOS)
 tiempo_inicio = None
+
+# La figura se crea al conectar (ver graficas.crear_figura), no al arrancar
+fig        = None
+ax         = None
+canvas     = None
+blit       = None
+_line      = None
+_graf_init = False
 # ----------------------------------------
 
 
-def obtener_puertos():
-    return [p.device for p in serial.tools.list_ports.comports()]
+# comports() corre en un hilo aparte; aquí sólo se recogen los cambios
+vigilante = VigilantePuertos(puertos_replay(sys.argv[1:]))
 
 
 def refrescar_puertos():
     global puertos_actuales
-    nuevos = obtener_puertos()
-    if nuevos != puertos_actuales:
+    nuevos = vigilante.cambios()
+    if nuevos is not None and nuevos != puertos_actuales:
         puertos_actuales = nuevos
         menu = puerto_menu["menu"]
         menu.delete(0, "end")
@@ -48,63 +58,73 @@ def refrescar_puertos():
         else:
             menu.add_command(label="No hay puertos", command=lambda: puerto_var.set("No hay puertos"))
             puerto_var.set("No hay puertos")
-    ventana.after(1000, refrescar_puertos)
+    ventana.after(250, refrescar_puertos)
 
 
 def conectar():
-    global ser, leyendo, tiempo_inicio, contador_paquetes, ultimo_calculo_hz, hz_actual
-
     puerto = puerto_var.get()
     if puerto == "No hay puertos":
         return
 
+    # Sin escaneos de puertos mientras dura la conexión
+    vigilante.pausar()
     try:
-        ser = serial.Serial(puerto, int(baudrate_var.get()), timeout=TIMEOUT)
-        time.sleep(1)
-
-        leyendo = True
-        tiempo_inicio = time.time()
-        contador_paquetes = 0
-        ultimo_calculo_hz = time.time()
-        hz_actual = 0.0
+        # Apertura y espera al reinicio del Teensy en el hilo del motor
+        futuro = motor.iniciar(puerto, int(baudrate_var.get()), espera_reset=1.0)
+    except Exception as e:
+        estado_label.config(text=f"Error: {e}", fg="red")
+        return
 
-        tiempos_hz.clear()
-        valores_hz.clear()
+    precargar()
+    estado_label.config(text="Conectando...", fg="orange")
+    btn_conectar.config(state="disabled")
+    ventana.after(50, lambda: _esperar_conexion(futuro))
 
-        threading.Thread(target=leer_datos, daemon=True).start()
-        actualizar_grafica()
 
-        estado_label.config(text="Conectado", fg="#00FF88")
-        btn_conectar.config(state="disabled")
-        btn_desconectar.config(state="normal")
+def _esperar_conexion(futuro):
+    global leyendo, tiempo_inicio
 
+    if not futuro.done():
+        ventana.after(50, lambda: _esperar_conexion(futuro))
+        return
+    try:
+        futuro.result()
     except Exception as e:
+        motor.detener()
+        vigilante.reanudar()
         estado_label.config(text=f"Error: {e}", fg="red")
+        btn_conectar.config(state="normal")
+        return
 
+    _crear_grafica()
+    leyendo = True
+    tiempo_inicio = time.perf_counter()
 
-def desconectar():
-    global ser, leyendo, contador_paquetes, ultimo_calculo_hz, hz_actual
+    tiempos_hz.clear()
+    valores_hz.clear()
+    blit.reset()
 
-    leyendo = False
-    contador_paquetes = 0
-    ultimo_calculo_hz = None
-    hz_actual = 0.0
+    ventana.after(1000, actualizar_grafica)
 
-    if ser and ser.is_open:
-        try:
-            ser.close()
-        except:
-            pass
-    ser = None
+    estado_label.config(text="Conectado", fg="#00FF88")
+    btn_desconectar.config(state="normal")
 
-    estado_label.config(text="Desconectado", fg="red")
+
+def desconectar(estado="Desconectado"):
+    global leyendo
+
+    leyendo = False
+    motor.detener()
+    vigilante.reanudar()
+
+    estado_label.config(text=estado, fg="red")
     hz_label.config(text="-- Hz")
     btn_conectar.config(state="normal")
     btn_desconectar.config(state="disabled")
 
 
 def ignicion():
-    if not ser or not ser.is_open:
+    if not leyendo:
         return
     threading.Thread(target=_enviar_ignicion, daemon=True).start()
 
@@ -112,68 +132,60 @@ def ignicion():
 def _enviar_ignicion():
     for _ in range(5):
         try:
-            if ser and ser.is_open:
-                ser.write(COMANDO_IGNICION)
+            motor.enviar(COMANDO_IGNICION)
             time.sleep(0.05)
         except Exception:
             break
 
 
-def leer_datos():
-    global contador_paquetes, ultimo_calculo_hz, hz_actual, leyendo
-
-    while leyendo:
-        try:
-            if not ser or not ser.is_open:
-                break
+def _crear_grafica():
+    global fig, ax, canvas, blit
 
-            b = ser.read(1)
-            if b != SYNC_BYTE:
-                continue
+    if blit is not None:
+        return
+    grafica_label.destroy()
+    fig, ax, canvas = crear_figura(frame_right)
+    ax.set_facecolor("#2C2A36")
+    blit = GraficaBlit(canvas)
 
-            payload = ser.read(PACKET_SIZE)
-            if len(payload) != PACKET_SIZE:
-                ser.reset_input_buffer()
-                continue
 
-            contador_paquetes += 1
+def _init_grafica():
+    global _line, _graf_init
 
-            ahora = time.time()
-            delta = ahora - ultimo_calculo_hz
-            if delta >= 1.0:
-                hz_actual = contador_paquetes / delta
-                contador_paquetes = 0
-                ultimo_calculo_hz = ahora
+    ax.set_ylabel("Hz", color="white")
+    ax.set_xlabel("Tiempo [s]", color="white")
+    ax.set_title("Frecuencia de paquetes recibidos", color="white")
+    ax.tick_params(colors="white")
+    for spine in ax.spines.values():
+        spine.set_color('#555555')
+    ax.set_facecolor("#2C2A36")
+    ax.grid(True, color="#444444")
 
-                t_rel = ahora - tiempo_inicio
-                tiempos_hz.append(t_rel)
-                valores_hz.append(hz_actual)
+    _line = blit.agregar_linea(ax, color="#00FF88", linewidth=2, marker='o', markersize=3)
+    fig.tight_layout()
+    _graf_init = True
 
-                hz_label.config(text=f"{hz_actual:.1f} Hz")
 
-        except (serial.SerialException, OSError):
+def actualizar_grafica():
+    if leyendo:
+        # Los bloques sólo interesan por si el motor avisa de un error o del fin
+        tipos = {b["tipo"] for b in data_queue.vaciar()}
+        if "error" in tipos:
             ventana.after(0, desconectar)
-            break
+            return
+        if "fin" in tipos:
+            ventana.after(0, desconectar, "Reproducción terminada")
+            return
 
+        # Frecuencia medida por el motor con el reloj del dispositivo
+        tiempos_hz.append(time.perf_counter() - tiempo_inicio)
+        valores_hz.append(motor.hz)
+        hz_label.config(text=f"{motor.hz:.1f} Hz")
 
-def actualizar_grafica():
-    if leyendo:
         if len(tiempos_hz) >= 2:
-            ax.clear()
-            ax.plot(list(tiempos_hz), list(valores_hz),
-                    color="#00FF88", linewidth=2, marker='o', markersize=3)
-            ax.set_ylabel("Hz", color="white")
-            ax.set_xlabel("Tiempo [s]", color="white")
-            ax.set_title("Frecuencia de paquetes recibidos", color="white")
-            ax.tick_params(colors="white")
-            ax.spines['bottom'].set_color('#555555')
-            ax.spines['top'].set_color('#555555')
-            ax.spines['left'].set_color('#555555')
-            ax.spines['right'].set_color('#555555')
-            ax.set_facecolor("#2C2A36")
-            ax.grid(True, color="#444444")
-            fig.tight_layout()
-            canvas.draw()
+            if not _graf_init:
+                _init_grafica()
+            blit.actualizar([(_line, np.array(tiempos_hz), np.array(valores_hz))])
 
         ventana.after(1000, actualizar_grafica)
 
@@ -195,11 +207,10 @@ frame_left.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
 frame_left.pack_propagate(False)
 
 tk.Label(frame_left, text="Puerto COM", bg="#2C2A36", fg="white").pack(anchor="w", pady=(10, 2))
-puerto_var = tk.StringVar()
-puertos_actuales = obtener_puertos()
-puerto_var.set(puertos_actuales[0] if puertos_actuales else "No hay puertos")
-puerto_menu = tk.OptionMenu(frame_left, puerto_var,
-                            *(puertos_actuales if puertos_actuales else ["No hay puertos"]))
+# La primera búsqueda de puertos se hace con la ventana ya dibujada
+puerto_var = tk.StringVar(value="No hay puertos")
+puertos_actuales = []
+puerto_menu = tk.OptionMenu(frame_left, puerto_var, "No hay puertos")
 puerto_menu.pack(fill="x", padx=5)
 
 tk.Label(frame_left, text="Baudrate", bg="#2C2A36", fg="white").pack(anchor="w", pady=(10, 2))
@@ -235,12 +246,12 @@ btn_ignicion.pack(pady=8)
 frame_right = tk.Frame(ventana, bg="#15141B")
 frame_right.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-fig, ax = plt.subplots(figsize=(6, 5))
-fig.patch.set_facecolor("#15141B")
-ax.set_facecolor("#2C2A36")
-canvas = FigureCanvasTkAgg(fig, master=frame_right)
-canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+# Sólo un aviso hasta conectar (_crear_grafica)
+grafica_label = tk.Label(frame_right, text="La gráfica aparece al conectar",
+                         bg="#15141B", fg="#555555", font=("Arial", 12))
+grafica_label.pack(fill=tk.BOTH, expand=True)
 
 ventana.protocol("WM_DELETE_WINDOW", cerrar)
-ventana.after(1000, refrescar_puertos)
+vigilante.iniciar()
+ventana.after(100, refrescar_puertos)
 ventana.mainloop()
@@ -0,0 +1,311 @@
+"""Captura sin interfaz gráfica para ensayos largos o remotos (SSH).
+
+Usa el mismo motor que las GUIs (adquisicion.py) sin importar Tk ni matplotlib:
+graba la captura binaria ``.cap`` y/o el CSV de interfaz.py, imprime cada pocos
+segundos la frecuencia, los paquetes y las pérdidas, y termina con Ctrl+C,
+SIGTERM, al cumplirse ``--duracion`` o al acabarse un ``replay:``. Al terminar añade al CSV el mismo pie de
+telemetría que interfaz.py.
+
+Con varios puertos (``[formato=]puerto``) todos se leen desde un mismo hilo y
+se mezclan por tiempo en un solo CSV (fusion.py); cada uno graba su ``.cap``.
+
+    python adquirir.py /dev/ttyACM0 --salida ensayo.txt --iniciar
+    python adquirir.py replay:datos_20260306-193236.cap@max --registro csv
+    python adquirir.py /dev/ttyACM0 --formato celda --duracion 3600 --cada 60
+    python adquirir.py celda=/dev/ttyACM0 interfaz=/dev/ttyACM1 --salida disparo.txt
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+
+from adquisicion import ESPERA_RESET, Bucle, Motor
+from captura import ruta_captura
+from decodificador import decodificar_lote
+from esquemas import ESQUEMAS, INTERFAZ
+from fusion import Fusion
+from registro import RegistroCSV
+from telemetria import Telemetria
+
+
+COMANDO_DATOS  = b"\x02"
+COMANDO_STOP   = b"\x03"
+CAPACIDAD_COLA = 200_000    # paquetes: el registro no tiene refrescos que esperar
+
+
+class Adquisicion:
+    """Suscriptor del motor: CSV opcional, contadores y aviso de error."""
+
+    def __init__(self, motor, ruta_csv=None):
+        self.motor    = motor
+        self.ruta_csv = ruta_csv
+        self.registro = None          # se abre con el primer bloque, no antes
+        self.paquetes = 0
+        self.error    = None
+        self.agotado  = False         # la reproducción llegó al final
+        self.fin      = threading.Event()
+        self._t0      = None
+
+        self.cola       = motor.suscribir(CAPACIDAD_COLA, funcion=self._recibir)
+        self.telemetria = Telemetria(self.cola, framer=motor.framer,
+                                     secuencia=motor.secuencia)
+
+    def _recibir(self, bloque):
+        if bloque["tipo"] == "error":
+            self.error = bloque["mensaje"]
+            self.fin.set()
+            return
+        if bloque["tipo"] == "fin":
+            self.agotado = True
+            self.fin.set()
+            return
+        datos = bloque["datos"]
+        self.paquetes += len(datos)
+        if self.ruta_csv is None or len(datos) == 0:
+            return
+
+        if self.registro is None:
+            self.registro = RegistroCSV(self.ruta_csv).abrir()
+            self.telemetria.registro = self.registro
+            self._t0      = bloque["t"][0]
+        try:
+            self.registro.escribir(np.column_stack((
+                datos["timestamp_ms"], bloque["t"] - self._t0, datos["thrust"],
+                datos["temps"], datos["transducer"])))
+        except OSError:
+            self.fin.set()            # el motivo queda en registro.error
+
+    def estado(self, dt):
+        """Una línea de progreso."""
+        v = self.telemetria.valores()
+        return (f"{dt:8.1f} s  {self.motor.hz:8.1f} Hz  {self.paquetes:>10} paq  "
+                f"perdidos cola {v['descartados']}  huecos {v['secuencia_huecos']} "
+                f"({v['secuencia_perdidos']})  resync {v['resyncs']}  "
+                f"enlace {v['secuencia_estado']}")
+
+    def cerrar(self):
+        if self.registro is not None:
+            self.registro.anotar(f"# fin {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                                 + self.telemetria.pie())
+            self.registro.cerrar()
+
+
+class AdquisicionFusion:
+    """Varios motores sobre un mismo ``Bucle``, mezclados en un solo CSV."""
+
+    def __init__(self, motores, ruta_csv=None):
+        self.motores  = motores
+        self.ruta_csv = ruta_csv
+        self.registro = None
+        self.error    = None
+        self.agotado  = False         # todas las reproducciones llegaron al final
+        self.fin      = threading.Event()
+
+        self.fusion      = Fusion(motores, self._escribir, al_error=self._error,
+                                  al_fin=self._agotado)
+        self.telemetrias = {n: Telemetria(self.fusion.colas[n], framer=m.framer,
+                                          secuencia=m.secuencia)
+                            for n, m in motores.items()}
+
+    def _error(self, nombre, mensaje):
+        self.error = f"{nombre}: {mensaje}"
+        self.fin.set()
+
+    def _agotado(self, nombre):
+        if len(self.fusion.terminados) == len(self.motores):
+            self.agotado = True
+            self.fin.set()
+
+    def _escribir(self, filas):
+        if self.ruta_csv is None:
+            return
+        if self.registro is None:
+            self.registro = RegistroCSV(self.ruta_csv, cabecera=self.fusion.cabecera(),
+                                        formato=self.fusion.formato()).abrir()
+        try:
+            self.registro.escribir(filas)
+        except OSError:
+            self.fin.set()            # el motivo queda en registro.error
+
+    def estado(self, dt):
+        partes = []
+        for n, m in self.motores.items():
+            v = self.telemetrias[n].valores()
+            partes.append(f"{n} {m.hz:.1f} Hz huecos {v['secuencia_huecos']} "
+                          f"({v['secuencia_perdidos']}) perdidos cola {v['descartados']}")
+        return (f"{dt:8.1f} s  {self.fusion.filas:>10} filas  tardías {self.fusion.tardias}  "
+                + "  |  ".join(partes))
+
+    def cerrar(self):
+        self.fusion.cerrar()
+        if self.registro is not None:
+            pie = "".join(f"# {n}.{k}={v}\n"
+                          for n, t in self.telemetrias.items()
+                          for k, v in t.valores().items())
+            self.registro.anotar(f"# fin {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                                 f"# fusion.filas={self.fusion.filas}\n"
+                                 f"# fusion.tardias={self.fusion.tardias}\n" + pie)
+            self.registro.cerrar()
+
+
+def _dispositivo(texto, formato):
+    """``"celda=/dev/ttyACM0"`` → ``("celda", "/dev/ttyACM0")``."""
+    prefijo, sep, resto = texto.partition("=")
+    if sep and prefijo in ESQUEMAS:
+        return prefijo, resto
+    return formato, texto
+
+
+def _motor(esquema, bucle=None):
+    # Sólo interfaz tiene decodificación escalada; el resto viaja en crudo
+    return Motor(esquema, decodificar=decodificar_lote if esquema is INTERFAZ else None,
+                 bucle=bucle)
+
+
+def _capturar(adq, motores, iniciar, duracion, cada):
+    """Bucle de estado común: espera a ``fin``, ``--duracion`` o Ctrl+C."""
+    t0 = time.monotonic()
+    try:
+        if iniciar:
+            for m in motores:
+                m.enviar(COMANDO_DATOS)
+        while True:
+            restante = None if duracion is None else duracion - (time.monotonic() - t0)
+            if restante is not None and restante <= 0:
+                break
+            espera = cada if restante is None else min(cada, restante)
+            if adq.fin.wait(espera):
+                break
+            print(adq.estado(time.monotonic() - t0), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for m in motores:
+            if iniciar and m.activo:
+                try:
+                    m.enviar(COMANDO_STOP)
+                except Exception:
+                    pass
+            m.detener()
+        adq.cerrar()
+    return time.monotonic() - t0
+
+
+def _terminar(adq, dt):
+    """Última línea de estado y código de salida: 1 si falló la lectura o el CSV."""
+    print(adq.estado(dt))
+    if adq.agotado:
+        print("Fin de la reproducción")
+    if adq.error is not None:
+        print(f"Error de lectura: {adq.error}", file=sys.stderr)
+        return 1
+    if adq.registro is not None and adq.registro.error is not None:
+        print(f"Error de registro: {adq.registro.error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _varios(args):
+    """Varios puertos en un solo hilo, mezclados por fusion.Fusion."""
+    bucle   = Bucle().iniciar()
+    motores = {}
+    puertos = {}
+    for texto in args.puertos:
+        formato, puerto = _dispositivo(texto, args.formato)
+        nombre = formato
+        k = 2
+        while nombre in motores:
+            nombre, k = f"{formato}{k}", k + 1
+        motores[nombre] = _motor(ESQUEMAS[formato], bucle)
+        puertos[nombre] = puerto
+
+    con_csv = args.registro in ("csv", "ambos")
+    con_cap = args.registro in ("cap", "ambos")
+    base, ext = os.path.splitext(args.salida)
+    adq = AdquisicionFusion(motores)
+    signal.signal(signal.SIGTERM, lambda *_: adq.fin.set())
+
+    # Todos los puertos se abren a la vez (la espera de reinicio se solapa)
+    futuros = {n: m.iniciar(puertos[n], args.baudrate,
+                            captura=ruta_captura(f"{base}_{n}{ext}") if con_cap else None,
+                            espera_reset=args.espera_reset)
+               for n, m in motores.items()}
+    fallo = None
+    for n, f in futuros.items():
+        try:
+            print(f"{n}: {puertos[n]} ({motores[n].esquema.nombre}, {f.result()})", flush=True)
+        except Exception as e:
+            fallo = fallo or f"No se pudo abrir {puertos[n]}: {e}"
+    if fallo is not None:
+        for m in motores.values():
+            m.detener()
+        adq.cerrar()
+        bucle.detener()
+        print(fallo, file=sys.stderr)
+        return 1
+
+    # El CSV empieza con todos los puertos abiertos: un fallo no pisa el anterior
+    if con_csv:
+        adq.ruta_csv = args.salida
+        print(f"→ {args.salida}", flush=True)
+    dt = _capturar(adq, motores.values(), args.iniciar, args.duracion, args.cada)
+    bucle.detener()
+    return _terminar(adq, dt)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Captura LEEM sin interfaz gráfica")
+    p.add_argument("puertos", nargs="+", metavar="puerto",
+                   help="[formato=]puerto serie, enlace ttySIM o replay:<archivo>[@N]; "
+                        "con varios se mezclan en un solo CSV")
+    p.add_argument("--baudrate", type=int, default=115200)
+    p.add_argument("--formato", choices=sorted(ESQUEMAS), default="interfaz",
+                   help="formato de los puertos sin prefijo")
+    p.add_argument("--salida", default="datos.txt",
+                   help="CSV; la captura va a <salida>_AAAAMMDD-HHMMSS.cap")
+    p.add_argument("--registro", choices=("cap", "csv", "ambos"), default="ambos")
+    p.add_argument("--duracion", type=float, help="segundos de captura")
+    p.add_argument("--cada", type=float, default=5.0, help="s entre líneas de estado")
+    p.add_argument("--iniciar", action="store_true",
+                   help="enviar 0x02 al empezar y 0x03 al terminar")
+    p.add_argument("--espera-reset", type=float, default=ESPERA_RESET,
+                   help="s de espera tras abrir el puerto (reinicio del Teensy)")
+    args = p.parse_args(argv)
+
+    if len(args.puertos) > 1:
+        return _varios(args)
+
+    formato, puerto = _dispositivo(args.puertos[0], args.formato)
+    esquema = ESQUEMAS[formato]
+    con_csv = args.registro in ("csv", "ambos")
+    con_cap = args.registro in ("cap", "ambos")
+    if con_csv and esquema is not INTERFAZ:
+        if args.registro == "csv":
+            p.error("el CSV sólo existe para el formato interfaz; usa --registro cap")
+        con_csv = False
+
+    motor = _motor(esquema)
+    adq   = Adquisicion(motor, args.salida if con_csv else None)
+    signal.signal(signal.SIGTERM, lambda *_: adq.fin.set())
+
+    try:
+        modo = motor.iniciar(puerto, args.baudrate,
+                             captura=ruta_captura(args.salida) if con_cap else None,
+                             espera_reset=args.espera_reset).result()
+    except Exception as e:
+        adq.cerrar()
+        print(f"No se pudo abrir {puerto}: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{puerto} ({esquema.nombre}, {modo})"
+          + (f" → {args.salida}" if con_csv else ""), flush=True)
+    dt = _capturar(adq, [motor], args.iniciar, args.duracion, args.cada)
+    return _terminar(adq, dt)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+"""Núcleo de adquisición sobre asyncio, sin dependencias de interfaz gráfica.
+
+``Motor`` es dueño del puerto, del entramado, de la decodificación y del reparto
+de bloques a los suscriptores. Corre su propio bucle de eventos en un hilo, así
+que las GUIs de Tk (o un script sin pantalla) sólo se suscriben y envían
+comandos:
+
+    motor = Motor(INTERFAZ, decodificar=decodificar_lote)
+    cola  = motor.suscribir(20_000)              # Tk: se vacía con ventana.after
+    motor.suscribir(2_000, funcion=registrar)    # se llama dentro del bucle
+    motor.iniciar("/dev/ttyACM0", 115200).result()
+    motor.enviar(b"\\x02")
+    ...
+    motor.detener()
+
+Cada suscriptor tiene su ``ColaAcotada`` (telemetria.py) con capacidad en
+paquetes y política de descarte propias: un consumidor lento pierde sus
+bloques sin frenar al lector ni a los demás. Los bloques son diccionarios
+
+    {"tipo": "lote",  "datos": array estructurado, "t": s (perf_counter), "hz": Hz}
+    {"tipo": "error", "mensaje": str}
+    {"tipo": "fin"}                    la fuente se agotó (reproducción sin repetir)
+
+La lectura usa, por este orden, ``serial_asyncio`` si está instalado,
+``loop.add_reader`` sobre el descriptor del puerto (POSIX) o, si no hay
+descriptor (Windows, ``replay:``), lecturas bloqueantes en un ejecutor.
+
+Varios motores pueden compartir un mismo ``Bucle`` (un solo hilo para todos
+los puertos, ver fusion.py); sin él, cada motor crea el suyo al iniciar.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from captura import GrabadorCaptura
+from framer import Framer
+from reloj import RelojDispositivo
+from replay import PREFIJO, abrir_puerto
+from secuencia import AnalizadorSecuencia
+from telemetria import ColaAcotada
+
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+
+TIMEOUT       = 1          # s, sólo para lecturas en el ejecutor
+ESPERA_RESET  = 2.0        # s que tarda el Teensy en arrancar tras abrir el puerto
+TIMEOUT_ENVIO = 2.0        # s máximos para que un comando salga por el puerto
+
+
+def paquetes_bloque(bloque):
+    """Paquetes de un bloque (0 para mensajes de control)."""
+    return len(bloque["datos"]) if "datos" in bloque else 0
+
+
+def diezmar_bloque(bloque, k):
+    """El bloque con uno de cada ``k`` paquetes."""
+    return {**bloque, "datos": bloque["datos"][::k], "t": bloque["t"][::k]}
+
+
+class Bucle:
+    """Bucle de eventos asyncio en un hilo propio, compartible entre motores."""
+
+    def __init__(self, nombre="motor-adquisicion"):
+        self.nombre = nombre
+        self.loop   = None
+        self._hilo  = None
+
+    @property
+    def activo(self):
+        return self._hilo is not None
+
+    def en_hilo(self):
+        """True si se llama desde el propio hilo del bucle."""
+        return self._hilo is threading.current_thread()
+
+    def iniciar(self):
+        if self._hilo is not None:
+            return self
+        listo = threading.Event()
+
+        def correr():
+            self.loop = asyncio.new_event_loop()
+            listo.set()
+            try:
+                self.loop.run_forever()
+            finally:
+                self.loop.close()
+                self.loop = None
+
+        self._hilo = threading.Thread(target=correr, daemon=True, name=self.nombre)
+        self._hilo.start()
+        listo.wait()
+        return self
+
+    def ejecutar(self, corrutina):
+        """Lanza ``corrutina`` en el bucle; devuelve un ``concurrent.futures.Future``."""
+        return asyncio.run_coroutine_threadsafe(corrutina, self.loop)
+
+    def detener(self, timeout=TIMEOUT + ESPERA_RESET):
+        """Para el bucle (los motores deben estar ya detenidos) y espera al hilo."""
+        loop, hilo = self.loop, self._hilo
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError:
+                pass
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout)
+        self._hilo = None
+
+
+class _Suscripcion:
+    """Cola de un consumidor y, si lo es del bucle, su función y su aviso."""
+
+    def __init__(self, cola, funcion):
+        self.cola    = cola
+        self.funcion = funcion
+        self.aviso   = None
+        self.tarea   = None
+
+
+class Motor:
+    """Puerto + entramado + decodificación + reparto, en un bucle asyncio propio.
+
+    ``decodificar(buf)`` recibe los payloads de una lectura contiguos (el array
+    ``uint8`` de ``Framer.feed_bloque``, válido como buffer) y devuelve un
+    array estructurado con al menos ``timestamp_ms``; por defecto se usa el
+    dtype crudo del esquema. Con ``bucle`` el motor corre en ese ``Bucle``
+    compartido en lugar de en un hilo propio.
+    """
+
+    def __init__(self, esquema, decodificar=None, bucle=None):
+        self.esquema     = esquema
+        self.bucle       = bucle
+        self.decodificar = decodificar or (lambda buf: np.frombuffer(buf, dtype=esquema.dtype))
+        self.framer      = Framer.desde_esquema(esquema)
+        self.reloj       = RelojDispositivo()
+        self.secuencia   = AnalizadorSecuencia()
+
+        self.puerto      = None
+        self.modo        = None        # "serial_asyncio", "add_reader" o "hilo"
+        self.hz          = 0.0
+        self.activo      = False
+
+        self._suscripciones = []
+        self._ser       = None         # pyserial / ReplaySerial (add_reader, hilo)
+        self._escritor  = None         # StreamWriter (serial_asyncio)
+        self._grabador  = None
+        self._loop      = None
+        self._propio    = bucle is None     # el bucle se crea y se para con el motor
+        self._tarea     = None              # Future de _ejecutar
+        self._abierto   = None
+        self._principal = None
+
+    # ---------- suscriptores ----------
+    def suscribir(self, capacidad, politica="antiguos", funcion=None):
+        """Nueva cola acotada de bloques.
+
+        Sin ``funcion`` la cola se vacía desde fuera (``cola.vaciar()``, p. ej.
+        con ``ventana.after``); con ``funcion`` el motor la llama dentro de su
+        bucle con cada bloque, así que debe ser rápida (RegistroCSV lo es: sólo
+        encola para su hilo escritor).
+        """
+        cola = ColaAcotada(capacidad, politica, longitud=paquetes_bloque,
+                           diezmar=diezmar_bloque)
+        sus  = _Suscripcion(cola, funcion)
+        self._suscripciones.append(sus)
+        if funcion is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._arrancar_consumidor, sus)
+        return cola
+
+    def _publicar(self, bloque):
+        for sus in self._suscripciones:
+            sus.cola.put(bloque)
+            if sus.aviso is not None:
+                sus.aviso.set()
+
+    def _arrancar_consumidor(self, sus):
+        if sus.tarea is not None:
+            return
+        sus.aviso = asyncio.Event()
+        sus.tarea = asyncio.get_running_loop().create_task(self._consumir(sus))
+
+    async def _consumir(self, sus):
+        while True:
+            await sus.aviso.wait()
+            sus.aviso.clear()
+            for bloque in sus.cola.vaciar():
+                sus.funcion(bloque)
+
+    # ---------- API (cualquier hilo) ----------
+    def iniciar(self, puerto, baudrate, captura=None, espera_reset=ESPERA_RESET):
+        """Abre el puerto desde el bucle (propio o compartido); devuelve un
+        ``Future`` que se resuelve al quedar el puerto abierto (o con la
+        excepción de la apertura).
+
+        ``captura`` es la ruta de un ``.cap`` para las tramas crudas (captura.py).
+        """
+        if self.activo:
+            raise RuntimeError("el motor ya está en marcha")
+        self.puerto = puerto
+        self.activo = True
+        self.hz     = 0.0
+        self.framer.reset()
+        self.reloj.reset()
+        self.secuencia.reset()
+        for sus in self._suscripciones:
+            sus.cola.clear()
+
+        if self._propio:
+            self.bucle = Bucle()
+        self.bucle.iniciar()
+        self._loop    = self.bucle.loop
+        self._abierto = Future()
+        self._tarea   = self.bucle.ejecutar(
+            self._ejecutar(puerto, baudrate, captura, espera_reset, self._abierto))
+        return self._abierto
+
+    def enviar(self, comando):
+        """Escribe ``comando`` en el puerto desde el bucle; propaga sus errores."""
+        loop = self._loop
+        if loop is None or not self.activo:
+            raise RuntimeError("puerto no conectado")
+        asyncio.run_coroutine_threadsafe(self._enviar(bytes(comando)), loop) \
+               .result(TIMEOUT_ENVIO)
+
+    def detener(self):
+        """Para la lectura, cierra puerto y captura y espera a que terminen."""
+        self.activo = False
+        loop, tarea = self._loop, self._tarea
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._cancelar)
+            except RuntimeError:
+                pass                    # el bucle ya había terminado
+        if tarea is not None and not self.bucle.en_hilo():
+            try:
+                tarea.result(TIMEOUT + ESPERA_RESET)
+            except Exception:
+                pass                    # cancelada, o el error ya se publicó
+        if self._abierto is not None and not self._abierto.done():
+            self._abierto.cancel()
+        if self._propio and self.bucle is not None:
+            self.bucle.detener()
+        self._loop, self._tarea = None, None
+
+    # ---------- bucle ----------
+    def _cancelar(self):
+        if self._principal is not None:
+            self._principal.cancel()
+
+    async def _ejecutar(self, puerto, baudrate, captura, espera_reset, abierto):
+        if not self.activo:
+            return                      # detener() llegó antes de empezar
+        self._principal = asyncio.current_task()
+        for sus in self._suscripciones:
+            if sus.funcion is not None:
+                self._arrancar_consumidor(sus)
+        try:
+            try:
+                lecturas = await self._abrir(puerto, baudrate, espera_reset)
+                if captura is not None:
+                    self._grabador = GrabadorCaptura(captura, self.esquema).abrir()
+            except Exception as e:
+                abierto.set_exception(e)
+                return
+            abierto.set_result(self.modo)
+
+            async for data in lecturas:
+                self._procesar(data)
+            self._publicar({"tipo": "fin"})
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Puerto desconectado, error de E/S...: se avisa a todos
+            self._publicar({"tipo": "error", "mensaje": str(e)})
+        finally:
+            self.activo = False
+            if not abierto.done():
+                abierto.cancel()
+            await self._cerrar()
+
+    async def _abrir(self, puerto, baudrate, espera_reset):
+        """Abre el puerto y devuelve el generador asíncrono de lecturas."""
+        loop = asyncio.get_running_loop()
+        if serial_asyncio is not None and not puerto.startswith(PREFIJO):
+            lector, self._escritor = await serial_asyncio.open_serial_connection(
+                url=puerto, baudrate=baudrate)
+            self._escritor.transport.pause_reading()      # hasta pasar el reinicio
+            self.modo = "serial_asyncio"
+            lecturas  = self._leer_stream(lector)
+        else:
+            self._ser = await loop.run_in_executor(None, abrir_puerto, puerto,
+                                                   baudrate, TIMEOUT)
+            try:
+                fd = self._ser.fileno()
+            except (AttributeError, OSError, NotImplementedError):
+                fd = None
+            self.modo = "hilo" if fd is None else "add_reader"
+            lecturas  = self._leer_hilo() if fd is None else self._leer_fd(fd)
+
+        # El Teensy se reinicia al abrir el puerto: se espera sin bloquear a nadie.
+        # Lo recibido entretanto se tira: llegaría de golpe, con tiempos ya
+        # pasados, detrás de lo que otros dispositivos han entregado (fusion.py)
+        if not puerto.startswith(PREFIJO):
+            await asyncio.sleep(espera_reset)
+            if self._escritor is not None:
+                self._escritor.transport.serial.reset_input_buffer()
+                self._escritor.transport.resume_reading()
+            else:
+                self._ser.reset_input_buffer()
+        return lecturas
+
+    async def _leer_stream(self, lector):
+        while True:
+            data = await lector.read(Framer.MAX_LECTURA)
+            if not data:
+                raise OSError("puerto cerrado")
+            yield data
+
+    async def _leer_fd(self, fd):
+        loop  = asyncio.get_running_loop()
+        listo = asyncio.Event()
+        loop.add_reader(fd, listo.set)
+        try:
+            while True:
+                await listo.wait()
+                listo.clear()
+                # Listo sin bytes pendientes: read(1) devuelve lo que haya o lanza
+                # SerialException si el dispositivo se ha desconectado
+                n = self._ser.in_waiting
+                yield self._ser.read(min(n, Framer.MAX_LECTURA) if n else 1)
+        finally:
+            loop.remove_reader(fd)
+
+    async def _leer_hilo(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            data = await loop.run_in_executor(None, self.framer.leer_bruto, self._ser)
+            if data:
+                yield data
+            elif getattr(self._ser, "agotado", False):
+                return                  # ReplaySerial sin repetir: fin del flujo
+
+    def _procesar(self, data):
+        # Payloads de la lectura ya contiguos: se decodifican sin más copias
+        payloads = self.framer.feed_bloque(data)
+        if len(payloads) == 0:
+            return
+        llegada_ns = time.perf_counter_ns()
+        if self._grabador is not None:
+            self._grabador.agregar(payloads)
+
+        datos = self.decodificar(payloads)
+        self.secuencia.procesar(datos["timestamp_ms"], llegada_ns / 1e9)
+        t = self.reloj.tiempos(datos["timestamp_ms"], llegada_ns)
+        self.hz = self.reloj.hz
+        self._publicar({"tipo": "lote", "datos": datos, "t": t, "hz": self.hz})
+
+    async def _enviar(self, comando):
+        if self._escritor is not None:
+            self._escritor.write(comando)
+            await self._escritor.drain()
+        elif self._ser is not None:
+            self._ser.write(comando)
+        else:
+            raise RuntimeError("puerto no conectado")
+
+    async def _cerrar(self):
+        for sus in self._suscripciones:
+            if sus.tarea is not None:
+                sus.tarea.cancel()
+                # Lo que quedó en la cola también llega al consumidor
+                for bloque in sus.cola.vaciar():
+                    sus.funcion(bloque)
+                sus.tarea, sus.aviso = None, None
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+            self._ser = None
+        if self._grabador is not None:
+            self._grabador.cerrar()
+            self._grabador = None
+        self._principal = None
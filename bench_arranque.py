@@ -0,0 +1,175 @@
+"""Benchmark de arranque: lo que cada herramienta importa antes de mostrar la ventana.
+
+Las GUIs crean la ventana y entran en ``mainloop`` al importarse, así que no se
+pueden cronometrar sin pantalla. En su lugar se ejecutan en un intérprete nuevo
+sólo las importaciones de nivel de módulo de cada script (leídas de su AST), que
+son lo que se paga antes de que aparezca la ventana, y se informa de:
+
+    ms        mediana del tiempo de importación en frío (--repeticiones)
+    MB        memoria residente máxima del proceso tras importar
+    más caros los módulos con más tiempo acumulado según ``python -X importtime``
+
+Además se miden aparte los pasos diferidos al conectar: importar matplotlib para
+la figura (graficas.precargar/crear_figura) y la primera búsqueda de puertos.
+
+    python bench_arranque.py
+    python bench_arranque.py --herramientas interfaz adquirir --json arranque.json
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+
+HERRAMIENTAS = {
+    "interfaz":  "interfaz.py",
+    "cell":      "cell.py",
+    "test":      "test.py",
+    "leem":      "LEEM_interface_app.py",
+    "adquirir":  "adquirir.py",
+}
+
+# Pasos que las GUIs hacen al conectar, no al arrancar
+DIFERIDOS = {
+    "figura":   "import graficas; graficas._importar_matplotlib()",
+    "puertos":  "import puertos; puertos.listar_puertos()",
+}
+
+_HIJO = """\
+import json, time
+t0 = time.perf_counter()
+{codigo}
+dt = time.perf_counter() - t0
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss / 1024 if __import__("sys").platform != "darwin" else rss / 1048576
+except ImportError:
+    rss = None
+print(json.dumps({{"s": dt, "rss_mb": rss}}))
+"""
+# Módulos del propio intérprete y del script hijo, no de la herramienta
+_AJENOS = {"site", "encodings", "json", "time", "resource"}
+
+
+def importaciones(ruta):
+    """Sentencias ``import`` de nivel de módulo (también dentro de ``try``)."""
+    with open(ruta, encoding="utf-8") as f:
+        arbol = ast.parse(f.read(), ruta)
+    lineas = []
+    for nodo in arbol.body:
+        if isinstance(nodo, (ast.Import, ast.ImportFrom)):
+            lineas.append(ast.unparse(nodo))
+        elif isinstance(nodo, ast.Try):
+            # Dependencias opcionales: se importan si están, como en el script
+            for n in nodo.body:
+                if isinstance(n, (ast.Import, ast.ImportFrom)):
+                    lineas.append(f"try:\n    {ast.unparse(n)}\nexcept ImportError:\n    pass")
+    return "\n".join(lineas)
+
+
+def _ejecutar(codigo, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    r = subprocess.run(cmd + ["-c", _HIJO.format(codigo=codigo)], cwd=DIR,
+                       capture_output=True, text=True, timeout=120)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr else "error")
+    return json.loads(r.stdout.strip().splitlines()[-1]), r.stderr
+
+
+def _mas_caros(stderr, n):
+    """Módulos de primer nivel con más tiempo acumulado (µs) según -X importtime."""
+    modulos = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        if (nombre.startswith(" ") and not nombre.startswith("  ")
+                and nombre.strip() not in _AJENOS):
+            modulos.append((int(acumulado), nombre.strip()))
+    return [f"{m}:{us / 1000:.0f}" for us, m in sorted(modulos, reverse=True)[:n]]
+
+
+def medir(nombre, codigo, repeticiones, n_caros):
+    tiempos, rss = [], None
+    for _ in range(repeticiones):
+        r, _ = _ejecutar(codigo)
+        tiempos.append(r["s"])
+        rss = r["rss_mb"]
+    _, stderr = _ejecutar(codigo, importtime=True)
+    return {"etapa": nombre, "ms": statistics.median(tiempos) * 1000,
+            "ms_min": min(tiempos) * 1000, "rss_mb": rss,
+            "mas_caros": _mas_caros(stderr, n_caros)}
+
+
+def _metadatos():
+    try:
+        commit = subprocess.run(["git", "describe", "--always", "--dirty"],
+                                capture_output=True, text=True, timeout=5,
+                                cwd=DIR).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "fecha":      time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit":     commit or None,
+        "python":     platform.python_version(),
+        "plataforma": platform.platform(),
+    }
+
+
+def _imprimir(r):
+    rss = "-" if r["rss_mb"] is None else f"{r['rss_mb']:.0f}"
+    print(f"{r['etapa']:<20}{r['ms']:>9.0f}{r['ms_min']:>9.0f}{rss:>7}  "
+          + " ".join(r["mas_caros"]), flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--herramientas", nargs="+", choices=HERRAMIENTAS,
+                    default=list(HERRAMIENTAS))
+    ap.add_argument("--repeticiones", type=int, default=5)
+    ap.add_argument("--caros", type=int, default=4, help="módulos más caros a listar")
+    ap.add_argument("--json", metavar="RUTA", help="escribe los resultados en JSON ('-' = stdout)")
+    args = ap.parse_args(argv)
+
+    tabla = args.json != "-"
+    if tabla:
+        print(f"{'etapa':<20}{'ms':>9}{'mín':>9}{'MB':>7}  más caros (ms acumulados)")
+
+    trabajos  = [(h, importaciones(os.path.join(DIR, HERRAMIENTAS[h])))
+                 for h in args.herramientas]
+    trabajos += [(f"{d} (diferido)", c) for d, c in DIFERIDOS.items()]
+
+    resultados = []
+    for nombre, codigo in trabajos:
+        try:
+            r = medir(nombre, codigo, args.repeticiones, args.caros)
+        except RuntimeError as e:
+            # p. ej. falta una dependencia opcional en esta máquina
+            r = {"etapa": nombre, "error": str(e)}
+            if tabla:
+                print(f"{nombre:<20}  error: {e}", flush=True)
+        else:
+            if tabla:
+                _imprimir(r)
+        resultados.append(r)
+
+    if args.json:
+        doc = {"metadatos": _metadatos(), "parametros": vars(args), "resultados": resultados}
+        if args.json == "-":
+            json.dump(doc, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(doc, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark del entramado: búsqueda byte a byte (leer_datos original) vs Framer.
+
+Uso:
+    python bench_framer.py                 # flujo sintético de paquetes interfaz.py
+    python bench_framer.py flujo.bin       # bytes grabados del puerto serie
+    python bench_framer.py flujo.bin --cabecera fefb --payload 30
+"""
+import argparse
+import random
+import struct
+import time
+
+from framer import Framer
+
+
+class FlujoGrabado:
+    """Imita a ``serial.Serial`` sobre un bloque de bytes grabado.
+
+    Los bytes "llegan" en ráfagas de ``rafaga`` bytes, como lo haría el driver USB,
+    y ``lecturas`` cuenta las llamadas a ``read`` (una por syscall en el puerto real).
+    """
+
+    def __init__(self, data, rafaga=512):
+        self._data    = memoryview(data)
+        self._pos     = 0
+        self._llegado = 0
+        self._rafaga  = rafaga
+        self.lecturas = 0
+
+    def _llegar(self):
+        if self._llegado <= self._pos:
+            self._llegado = min(len(self._data), self._pos + self._rafaga)
+
+    @property
+    def in_waiting(self):
+        self._llegar()
+        return self._llegado - self._pos
+
+    def read(self, n=1):
+        self.lecturas += 1
+        self._llegar()
+        fin = min(self._llegado, self._pos + n)
+        out = bytes(self._data[self._pos:fin])
+        self._pos = fin
+        return out
+
+    def agotado(self):
+        return self._pos >= len(self._data)
+
+
+def generar_flujo(n_paquetes, ruido=0.01, semilla=1):
+    """Paquetes 0x01 + 26 bytes de interfaz.py con basura intercalada."""
+    rnd = random.Random(semilla)
+    partes = []
+    for k in range(n_paquetes):
+        temps = [rnd.randint(1500, 3500) for _ in range(8)]
+        partes.append(b"\x01" + struct.pack("<Ii8hH", k, rnd.randint(-5000, 50000),
+                                             *temps, rnd.randint(0, 4095)))
+        if rnd.random() < ruido:
+            partes.append(bytes(rnd.randint(2, 255) for _ in range(rnd.randint(1, 8))))
+    return b"".join(partes)
+
+
+def entramar_byte_a_byte(ser, cabecera, tam_payload):
+    """Bucle de leer_datos previo a Framer: ser.read(1) hasta la cabecera."""
+    n = 0
+    while not ser.agotado():
+        ok = True
+        for c in cabecera:
+            b = ser.read(1)
+            if len(b) != 1 or b[0] != c:
+                ok = False
+                break
+        if not ok:
+            continue
+        payload = ser.read(tam_payload)
+        if len(payload) == tam_payload:
+            n += 1
+    return n
+
+
+def entramar_framer(ser, cabecera, tam_payload):
+    framer = Framer(cabecera, tam_payload)
+    n = 0
+    while not ser.agotado():
+        n += len(framer.leer(ser))
+    return n
+
+
+def medir(nombre, funcion, data, cabecera, tam_payload, rafaga):
+    ser = FlujoGrabado(data, rafaga)
+    t0, c0 = time.perf_counter(), time.process_time()
+    n = funcion(ser, cabecera, tam_payload)
+    dt, dc = time.perf_counter() - t0, time.process_time() - c0
+    print(f"{nombre:<14} {n:>9} tramas  {n / dt:>12,.0f} tramas/s  "
+          f"CPU {dc * 1e6 / max(n, 1):7.2f} µs/trama  "
+          f"{ser.lecturas / max(n, 1):6.2f} lecturas/trama")
+    return n, dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("archivo", nargs="?", help="bytes grabados del puerto serie")
+    ap.add_argument("--cabecera", default="01", help="cabecera en hex (01 o fefb)")
+    ap.add_argument("--payload",  type=int, default=26, help="bytes de payload")
+    ap.add_argument("--paquetes", type=int, default=200_000, help="tamaño del flujo sintético")
+    ap.add_argument("--rafaga",   type=int, default=512, help="bytes por ráfaga USB")
+    args = ap.parse_args()
+
+    cabecera = bytes.fromhex(args.cabecera)
+    if args.archivo:
+        with open(args.archivo, "rb") as f:
+            data = f.read()
+    else:
+        data = generar_flujo(args.paquetes)
+
+    print(f"Flujo: {len(data):,} bytes, cabecera {cabecera.hex()} + {args.payload} B")
+    _, t_viejo = medir("byte a byte", entramar_byte_a_byte, data, cabecera, args.payload, args.rafaga)
+    _, t_nuevo = medir("Framer",      entramar_framer,      data, cabecera, args.payload, args.rafaga)
+    print(f"Aceleración: {t_viejo / t_nuevo:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+"""Benchmark de extremo a extremo de la cadena de adquisición de interfaz.py.
+
+Mide por separado cada etapa con tramas sintéticas y luego la cadena completa:
+
+    entramado       Framer.leer sobre ráfagas USB simuladas (leer_datos)
+    decodificacion  decodificar_lote de cada lectura (leer_datos)
+    cola            traspaso de bloques hilo lector → hilo de la GUI (data_queue)
+    registro        RegistroCSV.escribir por bloques + cierre (procesar_queue)
+    historial       Historial.extend por bloques (procesar_queue)
+    render          GraficaBlit.actualizar con backend Agg (actualizar_graficas)
+    completo        ReplaySerial @max → lector → cola → consumidor que vacía la
+                    cola cada tick, como procesar_queue, + render
+
+Para cada etapa se informa de operaciones/s, latencia p50/p99 y memoria
+asignada por operación (pico de tracemalloc en una pasada aparte). La latencia
+es por llamada (lote) en las etapas por lotes y por paquete en ``cola`` y
+``completo``. La salida ``--json`` sirve para comparar versiones y para
+dimensionar MAX_PUNTOS, el tamaño de la cola y los intervalos de refresco.
+
+    python bench_pipeline.py
+    python bench_pipeline.py --etapas render --puntos 1000 100000 300000
+    python bench_pipeline.py --json resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from adquisicion import diezmar_bloque, paquetes_bloque
+from bench_framer import FlujoGrabado, generar_flujo
+from decodificador import decodificar_lote
+from esquemas import INTERFAZ
+from framer import Framer
+from historial import CANALES_INTERFAZ, Historial
+from registro import RegistroCSV
+from reloj import RelojDispositivo
+from telemetria import POLITICAS, ColaAcotada
+
+
+ETAPAS = ("entramado", "decodificacion", "cola", "registro", "historial",
+          "render", "completo")
+
+
+# ---------- RESULTADOS ----------
+def _resultado(etapa, unidad, n, segundos, latencias, bytes_op=None, **extra):
+    lat = np.asarray(latencias, dtype=np.float64) * 1e6
+    return {
+        "etapa":      etapa,
+        "unidad":     unidad,
+        "n":          n,
+        "ops_s":      n / segundos if segundos > 0 else None,
+        "lat_p50_us": float(np.percentile(lat, 50)) if len(lat) else None,
+        "lat_p99_us": float(np.percentile(lat, 99)) if len(lat) else None,
+        "bytes_op":   bytes_op,
+        **extra,
+    }
+
+
+class _Cronometro:
+    """Sonda de latencia: duración de cada llamada entre ``inicio`` y ``fin``."""
+
+    def __init__(self):
+        self.latencias = []
+        self._t        = 0.0
+        self._propias  = False
+
+    def inicio(self):
+        self._t = time.perf_counter()
+
+    def fin(self):
+        if not self._propias:
+            self.latencias.append(time.perf_counter() - self._t)
+
+    def latencia(self, segundos, n=1):
+        """Latencia medida por la propia etapa, p. ej. la de los ``n`` paquetes
+        de un bloque en la cola."""
+        self._propias = True
+        self.latencias.extend([segundos] * n)
+
+
+class _Memoria:
+    """Sonda de memoria: suma del pico de tracemalloc de cada llamada.
+
+    Para código que libera lo que asigna en cada llamada, es una cota inferior
+    de los bytes asignados; dividido por las operaciones da bytes por paquete.
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self._base = 0
+
+    def inicio(self):
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+
+    def fin(self):
+        self.bytes += tracemalloc.get_traced_memory()[1] - self._base
+
+    def latencia(self, segundos, n=1):
+        pass
+
+
+def _medir(correr):
+    """Pasada cronometrada y pasada aparte con tracemalloc (que la ralentiza).
+
+    ``correr(sonda)`` debe llamar a ``sonda.inicio()``/``sonda.fin()`` alrededor de
+    cada operación y devolver el número de paquetes u operaciones.
+    """
+    crono = _Cronometro()
+    t0 = time.perf_counter()
+    n  = correr(crono)
+    dt = time.perf_counter() - t0
+
+    memoria = _Memoria()
+    tracemalloc.start()
+    try:
+        n_mem = correr(memoria)
+    finally:
+        tracemalloc.stop()
+    return n, dt, crono.latencias, memoria.bytes / max(n_mem, 1)
+
+
+# ---------- DATOS SINTÉTICOS ----------
+def _payloads(data, rafaga):
+    """Lista de lecturas: cada una, los payloads que devuelve Framer.leer."""
+    ser, framer, lecturas = FlujoGrabado(data, rafaga), Framer.desde_esquema(INTERFAZ), []
+    while not ser.agotado():
+        p = framer.leer(ser)
+        if p:
+            lecturas.append(p)
+    return lecturas
+
+
+def _bloque(payloads, ahora, reloj=None):
+    """Lo mismo que publica leer_datos por cada lectura (``ts``: sólo para latencia)."""
+    datos = decodificar_lote(b"".join(payloads))
+    if reloj is None:
+        t = np.full(len(datos), ahora)
+    else:
+        t = reloj.tiempos(datos["timestamp_ms"], int(ahora * 1e9))
+    return {"tipo": "lote", "datos": datos, "t": t, "hz": 0.0, "ts": ahora}
+
+
+def _consumir(bloques, t0):
+    """Lo mismo que hace procesar_queue: filas CSV y muestras del historial."""
+    datos    = np.concatenate([b["datos"] for b in bloques])
+    tiempo_s = np.concatenate([b["t"] for b in bloques]) - t0
+    filas    = np.column_stack((datos["timestamp_ms"], tiempo_s, datos["thrust"],
+                                datos["temps"], datos["transducer"]))
+    muestras = np.column_stack((tiempo_s, datos["thrust"], datos["transducer"],
+                                datos["temps"], datos["transducer_raw"]))
+    return filas, muestras
+
+
+def _cola(args):
+    """La misma ColaAcotada que ``Motor.suscribir`` da a interfaz.py."""
+    return ColaAcotada(args.cola, args.politica,
+                       longitud=paquetes_bloque, diezmar=diezmar_bloque)
+
+
+# ---------- ETAPAS ----------
+def etapa_entramado(args, data):
+    def correr(sonda):
+        ser, framer, n = FlujoGrabado(data, args.rafaga), Framer.desde_esquema(INTERFAZ), 0
+        while not ser.agotado():
+            sonda.inicio()
+            n += len(framer.leer(ser))
+            sonda.fin()
+        return n
+
+    n, dt, lat, bytes_op = _medir(correr)
+    return _resultado("entramado", "paquete", n, dt, lat, bytes_op,
+                      rafaga_bytes=args.rafaga)
+
+
+def etapa_decodificacion(args, data):
+    lecturas = _payloads(data, args.rafaga)
+
+    def correr(sonda):
+        n = 0
+        for payloads in lecturas:
+            sonda.inicio()
+            n += len(_bloque(payloads, 0.0)["datos"])
+            sonda.fin()
+        return n
+
+    n, dt, lat, bytes_op = _medir(correr)
+    return _resultado("decodificacion", "paquete", n, dt, lat, bytes_op,
+                      paquetes_por_lote=n / max(len(lecturas), 1))
+
+
+def etapa_cola(args, data):
+    lecturas = _payloads(data, args.rafaga)
+    bloques  = [_bloque(p, 0.0) for p in lecturas]
+    total    = sum(len(b["datos"]) for b in bloques)
+
+    cola     = _cola(args)
+
+    def correr(sonda):
+        cola.clear()
+        hecho = threading.Event()
+
+        def productor():
+            for bloque in bloques:
+                bloque["ts"] = time.perf_counter()
+                cola.put(bloque)
+            hecho.set()
+
+        hilo = threading.Thread(target=productor, daemon=True)
+        sonda.inicio()
+        hilo.start()
+        recibidos = 0
+        while recibidos + cola.descartados < total:
+            for bloque in cola.vaciar():
+                sonda.latencia(time.perf_counter() - bloque["ts"], len(bloque["datos"]))
+                recibidos += len(bloque["datos"])
+            if hecho.is_set() and not len(cola):
+                break
+        hilo.join()
+        sonda.fin()
+        return recibidos
+
+    n, dt, lat, bytes_op = _medir(correr)
+    return _resultado("cola", "paquete", n, dt, lat, bytes_op,
+                      capacidad=args.cola, politica=args.politica,
+                      descartados=total - n)
+
+
+def etapa_registro(args, data):
+    lecturas = _payloads(data, args.rafaga)
+    lotes    = [_consumir([_bloque(p, 1.0)], 0.0)[0] for p in lecturas]
+    total    = sum(len(f) for f in lotes)
+
+    def correr(sonda):
+        with tempfile.TemporaryDirectory() as d:
+            registro = RegistroCSV(os.path.join(d, "datos.txt")).abrir()
+            for filas in lotes:
+                sonda.inicio()
+                registro.escribir(filas)
+                sonda.fin()
+            registro.cerrar()
+            if registro.error:
+                raise registro.error
+        return total
+
+    n, dt, lat, bytes_op = _medir(correr)      # incluye vaciar la cola del escritor
+    return _resultado("registro", "paquete", n, dt, lat, bytes_op,
+                      filas_por_lote=total / max(len(lotes), 1))
+
+
+def etapa_historial(args, data):
+    lecturas = _payloads(data, args.rafaga)
+    bloques  = [_consumir([_bloque(p, 1.0)], 0.0)[1] for p in lecturas]
+    total    = sum(len(b) for b in bloques)
+
+    def correr(sonda):
+        historial = Historial(args.max_puntos, CANALES_INTERFAZ, dtype=np.float32)
+        for muestras in bloques:
+            sonda.inicio()
+            historial.extend(muestras)
+            sonda.fin()
+        return total
+
+    n, dt, lat, bytes_op = _medir(correr)
+    return _resultado("historial", "paquete", n, dt, lat, bytes_op,
+                      max_puntos=args.max_puntos)
+
+
+def _figura():
+    """Misma figura que interfaz.py, sobre un canvas Agg sin ventana."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from graficas import GraficaBlit
+
+    fig = Figure(figsize=(6, 8))
+    canvas = FigureCanvasAgg(fig)
+    ax_presion, ax_n, ax_temperatura = fig.subplots(3, 1)
+    blit = GraficaBlit(canvas)
+    lineas = [blit.agregar_linea(ax_presion, label="Thrust", diezmado="minmax"),
+              blit.agregar_linea(ax_n, label="Pressure", diezmado="minmax")]
+    lineas += [blit.agregar_linea(ax_temperatura, linewidth=1, label=f"Tp{i+1}",
+                                  diezmado="lttb", puntos_px=0.5) for i in range(8)]
+    blit.refrescar_cada(ax_temperatura, 4)          # REFRESCO_TP de interfaz.py
+    for ax in (ax_presion, ax_n, ax_temperatura):
+        ax.grid(True)
+        ax.legend(loc="upper left", fontsize=7)
+    fig.tight_layout()
+    return canvas, blit, lineas
+
+
+def _refrescar(blit, lineas, historial):
+    t     = historial.canal("t")
+    temps = historial.canales_vista(CANALES_INTERFAZ[3:11])
+    blit.actualizar([(lineas[0], t, historial.canal("thrust")),
+                     (lineas[1], t, historial.canal("presion")),
+                     *((l, t, tp) for l, tp in zip(lineas[2:], temps))])
+
+
+def _historial_lleno(n, rnd):
+    historial = Historial(max(n, 2), CANALES_INTERFAZ, dtype=np.float32)
+    t = np.arange(n) * 1e-3
+    bloque = np.empty((n, len(CANALES_INTERFAZ)), dtype=np.float32)
+    bloque[:, 0]  = t
+    bloque[:, 1]  = 400 * np.sin(t) + rnd.normal(0, 1, n)
+    bloque[:, 2]  = 30 * np.sin(t / 2) + rnd.normal(0, 0.1, n)
+    bloque[:, 3:11] = 20 + rnd.normal(0, 0.2, (n, 8)).cumsum(axis=0) * 0.01
+    bloque[:, 11] = 0
+    historial.extend(bloque)
+    return historial
+
+
+def etapa_render(args, data, n_puntos):
+    rnd = np.random.default_rng(1)
+    historial = _historial_lleno(n_puntos, rnd)
+    canvas, blit, lineas = _figura()
+    canvas.draw()
+    # El primer refresco redibuja la figura entera y llena las cachés del
+    # diezmado: se informa aparte para que p99 sea el del régimen estacionario
+    t0 = time.perf_counter()
+    _refrescar(blit, lineas, historial)
+    primero = time.perf_counter() - t0
+
+    def correr(sonda):
+        for _ in range(args.refrescos):
+            sonda.inicio()
+            _refrescar(blit, lineas, historial)
+            sonda.fin()
+        return args.refrescos
+
+    n, dt, lat, bytes_op = _medir(correr)
+    return _resultado("render", "refresco", n, dt, lat, bytes_op,
+                      puntos=n_puntos, intervalo_ms=args.intervalo,
+                      primero_ms=round(primero * 1e3, 1))
+
+
+def etapa_completo(args, data):
+    """Lector y consumidor en hilos, con la cadencia de la GUI en el consumidor."""
+    from replay import ReplaySerial
+
+    tam = INTERFAZ.tam_trama
+    ser = ReplaySerial(data, [0.0], [len(data)], velocidad=None, timeout=0.05,
+                       repetir=True)
+    cola      = _cola(args)
+    historial = Historial(args.max_puntos, CANALES_INTERFAZ, dtype=np.float32)
+    canvas, blit, lineas = _figura()
+    canvas.draw()
+    parar     = threading.Event()
+    cuentas   = {"leidos": 0}
+
+    def lector():
+        framer = Framer.desde_esquema(INTERFAZ)
+        reloj  = RelojDispositivo()
+        while not parar.is_set():
+            payloads = framer.leer(ser)
+            if not payloads:
+                continue
+            cuentas["leidos"] += len(payloads)
+            cola.put(_bloque(payloads, time.perf_counter(), reloj))
+
+    lat, procesados, refrescos = [], 0, 0
+    with tempfile.TemporaryDirectory() as d:
+        registro = RegistroCSV(os.path.join(d, "datos.txt")).abrir()
+        hilo = threading.Thread(target=lector, daemon=True)
+        t0 = time.perf_counter()
+        hilo.start()
+        proximo_render = t0
+        while time.perf_counter() - t0 < args.duracion:
+            bloques = cola.vaciar()
+            ahora = time.perf_counter()
+            if bloques:
+                filas, muestras = _consumir(bloques, t0)
+                registro.escribir(filas)
+                historial.extend(muestras)
+                procesados += len(filas)
+                for b in bloques:
+                    lat.extend([ahora - b["ts"]] * len(b["datos"]))
+            if ahora >= proximo_render and len(historial) >= 2:
+                _refrescar(blit, lineas, historial)
+                refrescos += 1
+                proximo_render = ahora + args.intervalo / 1000.0
+            time.sleep(args.tick / 1000.0)
+        dt = time.perf_counter() - t0
+        parar.set()
+        hilo.join()
+        registro.cerrar()
+
+    return _resultado("completo", "paquete", procesados, dt, lat, None,
+                      leidos_s=cuentas["leidos"] / dt,
+                      descartados=cola.descartados,
+                      cola_max=cola.maximo,
+                      refrescos_s=refrescos / dt,
+                      tick_ms=args.tick,
+                      bytes_trama=tam)
+
+
+# ---------- SALIDA ----------
+def _metadatos():
+    try:
+        commit = subprocess.run(["git", "describe", "--always", "--dirty"],
+                                capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    import matplotlib
+    return {
+        "fecha":      time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit":     commit or None,
+        "python":     platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy":      np.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+_COMUNES = ("etapa", "unidad", "n", "ops_s", "lat_p50_us", "lat_p99_us", "bytes_op")
+
+
+def _imprimir_cabecera():
+    print(f"{'etapa':<15}{'n':>9}{'ops/s':>14}{'p50 µs':>11}{'p99 µs':>11}{'B/op':>10}  extra")
+
+
+def _imprimir(r):
+    extra = {k: v for k, v in r.items() if k not in _COMUNES}
+    b = "-" if r["bytes_op"] is None else f"{r['bytes_op']:.0f}"
+    print(f"{r['etapa']:<15}{r['n']:>9}{r['ops_s']:>14,.0f}{r['lat_p50_us']:>11.1f}"
+          f"{r['lat_p99_us']:>11.1f}{b:>10}  "
+          + " ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                     for k, v in extra.items()), flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--etapas", nargs="+", choices=ETAPAS, default=list(ETAPAS))
+    ap.add_argument("--paquetes",   type=int, default=100_000, help="tamaño del flujo sintético")
+    ap.add_argument("--rafaga",     type=int, default=512, help="bytes por ráfaga USB")
+    ap.add_argument("--cola",       type=int, default=20_000, help="capacidad de data_queue (paquetes)")
+    ap.add_argument("--politica",   choices=POLITICAS, default="antiguos",
+                    help="política de descarte de data_queue")
+    ap.add_argument("--tick",       type=float, default=20, help="ms entre ticks de procesar_queue")
+    ap.add_argument("--intervalo",  type=float, default=50, help="ms entre refrescos (GRAPH_INTERVAL)")
+    ap.add_argument("--max-puntos", type=int, default=300_000, help="capacidad del historial")
+    ap.add_argument("--puntos",     type=int, nargs="+", default=[1_000, 100_000, 300_000],
+                    help="muestras en el historial para la etapa render")
+    ap.add_argument("--refrescos",  type=int, default=50)
+    ap.add_argument("--duracion",   type=float, default=5.0, help="s de la etapa completo")
+    ap.add_argument("--json", metavar="RUTA", help="escribe los resultados en JSON ('-' = stdout)")
+    args = ap.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    # Con --json - la salida estándar queda sólo para el JSON
+    tabla = args.json != "-"
+    data  = generar_flujo(args.paquetes)
+    if tabla:
+        _imprimir_cabecera()
+
+    resultados = []
+    for etapa in args.etapas:
+        if etapa == "render":
+            nuevos = [etapa_render(args, data, n) for n in args.puntos]
+        else:
+            nuevos = [globals()["etapa_" + etapa](args, data)]
+        resultados += nuevos
+        if tabla:
+            for r in nuevos:
+                _imprimir(r)
+
+    if args.json:
+        doc = {"metadatos": _metadatos(), "parametros": vars(args), "resultados": resultados}
+        if args.json == "-":
+            json.dump(doc, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(doc, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
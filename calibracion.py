@@ -0,0 +1,255 @@
+"""Calibración de la célula de carga: ajuste por mínimos cuadrados y aplicación en vivo.
+
+``cell.py`` añade a ``calibracion.csv`` una fila por punto (``timestamp,
+peso_kg, thrust_prom_N, n_muestras, desv_N, error_N``; los archivos antiguos
+no tienen cabecera ni las dos últimas columnas y los finales de línea pueden
+ser CRLF), donde ``thrust_prom_N`` es la lectura sin calibrar (``int32 / 100``).
+``ajustar`` encuentra el polinomio
+
+    F [N] = c0 + c1 * x + c2 * x² + ...        x = lectura sin calibrar
+
+que mejor lleva las lecturas a ``peso_kg * g0``, con sus residuos; si todos
+los puntos traen ``error_N``, cada uno pesa 1/error_N². Cada ajuste
+guardado en ``calibracion.json`` es una versión numerada con la huella del CSV
+del que sale, así que un ensayo se puede volver a procesar con la calibración
+que tenía.
+
+``Calibracion.aplicar`` evalúa el polinomio por Horner sobre arrays enteros. La
+escala del decodificador (``/ 100``) se pliega en los coeficientes: con grado 1
+cada muestra cuesta una multiplicación y una suma, lo mismo que antes el
+escalado solo.
+
+    python calibracion.py                       # ajusta grado 1 y muestra residuos
+    python calibracion.py --grado 2 --guardar   # nueva versión en calibracion.json
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+
+CSV_PUNTOS = "calibracion.csv"
+JSON_COEF  = "calibracion.json"
+G0         = 9.80665      # m/s²
+CABECERA   = ["timestamp", "peso_kg", "thrust_prom_N", "n_muestras", "desv_N", "error_N"]
+
+
+class Calibracion:
+    """Polinomio lectura → fuerza (N), coeficientes en orden creciente de grado."""
+
+    def __init__(self, coef, version=None, fecha=None, rms_N=None, r2=None,
+                 puntos=None, origen=None, sha1=None):
+        self.coef    = np.asarray(coef, dtype=np.float64)
+        self.version = version
+        self.fecha   = fecha
+        self.rms_N   = rms_N
+        self.r2      = r2
+        self.puntos  = puntos
+        self.origen  = origen
+        self.sha1    = sha1
+        self._plegados = {}          # escala → coeficientes con la escala dentro
+
+    @property
+    def grado(self):
+        return len(self.coef) - 1
+
+    def __repr__(self):
+        return (f"Calibracion(v{self.version}, grado={self.grado}, "
+                f"coef={self.coef.tolist()}, rms={self.rms_N} N)")
+
+    def _coef(self, escala):
+        c = self._plegados.get(escala)
+        if c is None:
+            c = self.coef * escala ** np.arange(len(self.coef))
+            self._plegados[escala] = c
+        return c
+
+    def aplicar(self, x, escala=1.0, out=None):
+        """Fuerza en N para las lecturas ``escala * x`` (array), por Horner.
+
+        ``out`` puede ser una columna de un array estructurado (decodificar_lote).
+        """
+        c = self._coef(escala)
+        x = np.asarray(x)
+        if out is None:
+            out = np.empty(x.shape, dtype=np.float64)
+        if len(c) == 1:
+            out[...] = c[0]
+            return out
+        np.multiply(x, c[-1], out=out)
+        for ck in c[-2:0:-1]:
+            out += ck
+            out *= x
+        out += c[0]
+        return out
+
+    def residuos(self, lectura, peso_kg):
+        """Fuerza de referencia menos fuerza calibrada, en N."""
+        return np.asarray(peso_kg, dtype=np.float64) * G0 - self.aplicar(lectura)
+
+    def a_dict(self):
+        return {"version": self.version, "fecha": self.fecha, "grado": self.grado,
+                "coef": self.coef.tolist(), "rms_N": self.rms_N, "r2": self.r2,
+                "puntos": self.puntos, "origen": self.origen, "sha1": self.sha1}
+
+    @classmethod
+    def desde_dict(cls, d):
+        return cls(d["coef"], d.get("version"), d.get("fecha"), d.get("rms_N"),
+                   d.get("r2"), d.get("puntos"), d.get("origen"), d.get("sha1"))
+
+
+# ---------- PUNTOS ----------
+def leer_puntos(ruta=CSV_PUNTOS):
+    """``(lectura, peso_kg, n_muestras, error_N)`` de ``calibracion.csv`` como arrays.
+
+    ``error_N`` es NaN en los puntos que no lo guardaron (formato antiguo).
+    """
+    lectura, peso, n, error = [], [], [], []
+    with open(ruta, newline="") as f:
+        for fila in csv.reader(f):
+            if len(fila) < 3 or fila[0] == "timestamp":
+                continue
+            peso.append(float(fila[1]))
+            lectura.append(float(fila[2]))
+            n.append(int(fila[3]) if len(fila) > 3 and fila[3] else 0)
+            error.append(float(fila[5]) if len(fila) > 5 and fila[5] else np.nan)
+    return np.array(lectura), np.array(peso), np.array(n), np.array(error)
+
+
+def preparar_puntos(ruta=CSV_PUNTOS):
+    """Deja ``ruta`` lista para añadir filas con las columnas de ``CABECERA``.
+
+    Si no existe se crea con la cabecera; un archivo antiguo (sin cabecera o de
+    4 columnas) se reescribe con ella y ``desv_N``/``error_N`` vacíos, para no
+    mezclar filas de 4 y de 6 columnas.
+    """
+    try:
+        with open(ruta, newline="") as f:
+            filas = [fila for fila in csv.reader(f) if fila]
+    except FileNotFoundError:
+        filas = []
+    if filas and filas[0] == CABECERA:
+        return
+    if filas and filas[0][0] == "timestamp":
+        filas = filas[1:]
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CABECERA)
+        writer.writerows(fila + [""] * (len(CABECERA) - len(fila)) for fila in filas)
+    os.replace(tmp, ruta)
+
+
+def pesos_puntos(error):
+    """1/error_N² por punto, o None si a alguno le falta (ajuste sin ponderar)."""
+    error = np.asarray(error, dtype=np.float64)
+    if len(error) == 0 or not np.all(error > 0):
+        return None
+    return 1.0 / error ** 2
+
+
+def _sha1(ruta):
+    with open(ruta, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# ---------- AJUSTE ----------
+def ajustar(lectura, peso_kg, grado=1, pesos=None):
+    """Mínimos cuadrados (ponderados si se dan ``pesos``) de grado ``grado``."""
+    x = np.asarray(lectura, dtype=np.float64)
+    y = np.asarray(peso_kg, dtype=np.float64) * G0
+    if grado < 1:
+        raise ValueError("el grado del ajuste debe ser al menos 1")
+    if len(x) <= grado:
+        raise ValueError(f"hacen falta más de {grado} puntos para un ajuste de grado {grado}")
+
+    # Vandermonde sobre x normalizada: las potencias de ~2e4 no se mezclan mal
+    s = float(np.abs(x).max()) or 1.0
+    V = np.vander(x / s, grado + 1, increasing=True)
+    w = np.ones_like(x) if pesos is None else np.sqrt(np.asarray(pesos, dtype=np.float64))
+    coef, *_ = np.linalg.lstsq(V * w[:, None], y * w, rcond=None)
+    coef = coef / s ** np.arange(grado + 1)
+
+    cal = Calibracion(coef, puntos=len(x))
+    r   = cal.residuos(x, peso_kg)
+    cal.rms_N = float(np.sqrt(np.mean(r ** 2)))
+    cal.r2    = float(1 - np.sum(r ** 2) / np.sum((y - y.mean()) ** 2)) if len(x) > 1 else None
+    return cal
+
+
+def ajustar_archivo(ruta=CSV_PUNTOS, grado=1):
+    lectura, peso, _, error = leer_puntos(ruta)
+    cal = ajustar(lectura, peso, grado, pesos=pesos_puntos(error))
+    cal.origen = os.path.basename(ruta)
+    cal.sha1   = _sha1(ruta)
+    return cal
+
+
+# ---------- VERSIONES ----------
+def _versiones(ruta):
+    try:
+        with open(ruta) as f:
+            return json.load(f).get("versiones", [])
+    except FileNotFoundError:
+        return []
+
+
+def guardar(cal, ruta=JSON_COEF):
+    """Añade ``cal`` como nueva versión; devuelve su número."""
+    versiones   = _versiones(ruta)
+    cal.version = max((v["version"] for v in versiones), default=0) + 1
+    cal.fecha   = time.strftime("%Y-%m-%d %H:%M:%S")
+    versiones.append(cal.a_dict())
+    tmp = ruta + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"versiones": versiones}, f, indent=2)
+    os.replace(tmp, ruta)
+    return cal.version
+
+
+def cargar(ruta=JSON_COEF, version=None):
+    """La última versión (o ``version``); None si no hay calibración guardada."""
+    try:
+        versiones = _versiones(ruta)
+    except (OSError, ValueError):
+        return None
+    if version is not None:
+        versiones = [v for v in versiones if v["version"] == version]
+    return Calibracion.desde_dict(versiones[-1]) if versiones else None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("csv", nargs="?", default=CSV_PUNTOS)
+    ap.add_argument("--grado", type=int, default=1)
+    ap.add_argument("--guardar", action="store_true", help=f"nueva versión en {JSON_COEF}")
+    ap.add_argument("--json", default=JSON_COEF)
+    args = ap.parse_args(argv)
+    if args.grado < 1:
+        ap.error("--grado debe ser al menos 1")
+
+    lectura, peso, _, error = leer_puntos(args.csv)
+    pesos = pesos_puntos(error)
+    print("ponderado por 1/error_N²" if pesos is not None
+          else "sin ponderar (hay puntos sin error_N)")
+    for g in sorted({1, 2, 3, args.grado}):
+        if len(lectura) > g:
+            c = ajustar(lectura, peso, g, pesos=pesos)
+            print(f"grado {g}: rms {c.rms_N:8.3f} N  r² {c.r2:.6f}  coef {c.coef.tolist()}")
+
+    cal = ajustar_archivo(args.csv, args.grado)
+    print(f"\nResiduos (grado {args.grado})")
+    print(f"{'peso_kg':>8} {'lectura':>11} {'F_ref_N':>9} {'F_cal_N':>9} {'resid_N':>8}")
+    for x, p, r in zip(lectura, peso, cal.residuos(lectura, peso)):
+        print(f"{p:8.2f} {x:11.3f} {p * G0:9.2f} {p * G0 - r:9.2f} {r:8.2f}")
+
+    if args.guardar:
+        print(f"\nGuardada versión {guardar(cal, args.json)} en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
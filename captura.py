@@ -0,0 +1,197 @@
+"""Captura binaria de tramas crudas, con índice temporal y lectura vía np.memmap.
+
+Formato del archivo ``.cap``:
+
+    cabecera (64 bytes)
+        [0:8]   magic          b"LEEMCAP1"
+        [8:10]  versión        uint16
+        [10:12] tam_trama      uint16   (cabecera de paquete + payload)
+        [12:16] tam_registro   uint32   (8 + tam_trama)
+        [16:20] indice_cada    uint32   (una entrada de índice cada N registros)
+        [20:28] t0_ns          uint64   (time.time_ns() al abrir)
+        [28:44] esquema        ascii, relleno con \\0 (ver esquemas.ESQUEMAS)
+        [44:64] reservado
+    registros de tam_registro bytes:
+        [0:8]   t_ns           uint64   (time.time_ns() de recepción en el host)
+        [8:]    trama          bytes tal cual llegaron (cabecera + payload)
+
+El índice disperso va en ``<archivo>.idx``: pares (n_registro, t_ns) uint64 cada
+``indice_cada`` registros. Si falta o está incompleto se reconstruye desde los
+propios registros.
+"""
+import os
+import struct
+import time
+
+from esquemas import ESQUEMAS
+
+
+MAGIC         = b"LEEMCAP1"
+VERSION       = 1
+TAM_CABECERA  = 64
+INDICE_CADA   = 1024
+_CABECERA     = struct.Struct("<8sHHII Q16s20x")
+_T_NS         = struct.Struct("<Q")
+
+
+def ruta_captura(archivo_salida):
+    """``datos.txt`` → ``datos_AAAAMMDD-HHMMSS.cap`` (una captura por conexión)."""
+    return f"{os.path.splitext(archivo_salida)[0]}_{time.strftime('%Y%m%d-%H%M%S')}.cap"
+
+
+class GrabadorCaptura:
+    """Añade tramas crudas a un archivo ``.cap`` de registros de tamaño fijo."""
+
+    def __init__(self, ruta, esquema, indice_cada=INDICE_CADA, buffer_bytes=1 << 20):
+        self.ruta         = ruta
+        self.esquema      = esquema
+        self.indice_cada  = indice_cada
+        self.buffer_bytes = buffer_bytes
+        self.registros    = 0
+        self._archivo     = None
+        self._indice      = None
+
+    def abrir(self):
+        e = self.esquema
+        self._archivo = open(self.ruta, "wb", buffering=self.buffer_bytes)
+        self._archivo.write(_CABECERA.pack(MAGIC, VERSION, e.tam_trama, 8 + e.tam_trama,
+                                           self.indice_cada, time.time_ns(),
+                                           e.nombre.encode("ascii")))
+        self._indice = open(self.ruta + ".idx", "wb")
+        self.registros = 0
+        return self
+
+    @property
+    def abierto(self):
+        return self._archivo is not None
+
+    def agregar(self, payloads, t_ns=None):
+        """Graba los payloads de una lectura con su instante de recepción.
+
+        ``payloads`` es una lista de ``bytes`` o el array (N, tam_payload) de
+        ``Framer.feed_bloque``. Todas las tramas de una misma lectura comparten
+        ``t_ns``; la cabecera de paquete se reconstruye (es fija) para guardar
+        la trama completa.
+        """
+        if len(payloads) == 0:
+            return
+        if t_ns is None:
+            t_ns = time.time_ns()
+        prefijo = _T_NS.pack(t_ns) + self.esquema.cabecera
+        if isinstance(payloads, list):
+            self._archivo.write(prefijo + prefijo.join(payloads))
+        else:
+            import numpy as np
+            registros = np.empty((len(payloads), len(prefijo) + payloads.shape[1]), np.uint8)
+            registros[:, :len(prefijo)] = np.frombuffer(prefijo, np.uint8)
+            registros[:, len(prefijo):] = payloads
+            self._archivo.write(registros)
+
+        n0 = self.registros
+        self.registros += len(payloads)
+        cada = self.indice_cada
+        # Primer múltiplo de indice_cada dentro del lote recién escrito
+        k = -(-n0 // cada) * cada
+        while k < self.registros:
+            self._indice.write(struct.pack("<QQ", k, t_ns))
+            k += cada
+
+    def flush(self):
+        if self._archivo is not None:
+            self._archivo.flush()
+            self._indice.flush()
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._indice.close()
+            self._archivo = None
+            self._indice  = None
+
+
+class Captura:
+    """Lectura de un ``.cap`` sin copias: ``registros`` es un ``np.memmap``.
+
+    El dtype de cada registro combina ``t_ns`` con los campos del esquema, así
+    que ``cap.registros["thrust"]`` o ``cap.registros["temps"]`` son vistas
+    directas sobre el archivo.
+    """
+
+    def __init__(self, ruta):
+        import numpy as np
+
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            crudo = f.read(TAM_CABECERA)
+        if len(crudo) < TAM_CABECERA:
+            raise ValueError(f"{ruta}: archivo de captura truncado")
+        magic, version, tam_trama, tam_registro, indice_cada, t0_ns, nombre = \
+            _CABECERA.unpack(crudo)
+        if magic != MAGIC:
+            raise ValueError(f"{ruta}: no es una captura LEEM")
+        if version != VERSION:
+            raise ValueError(f"{ruta}: versión de captura {version} no soportada")
+
+        self.esquema      = ESQUEMAS[nombre.rstrip(b"\0").decode("ascii")]
+        self.tam_trama    = tam_trama
+        self.tam_registro = tam_registro
+        self.indice_cada  = indice_cada
+        self.t0_ns        = t0_ns
+        if tam_trama != self.esquema.tam_trama:
+            raise ValueError(f"{ruta}: tamaño de trama {tam_trama} no coincide con "
+                             f"el esquema {self.esquema.nombre!r}")
+
+        base = self.esquema.dtype_trama
+        self.dtype = np.dtype({
+            "names":    ["t_ns", "trama"] + list(base.names),
+            "formats":  ["<u8", ("u1", (tam_trama,))]
+                        + [base.fields[n][0] for n in base.names],
+            "offsets":  [0, 8] + [8 + base.fields[n][1] for n in base.names],
+            "itemsize": tam_registro,
+        })
+
+        # Un registro a medio escribir al final (corte de corriente) se ignora
+        n = (os.path.getsize(ruta) - TAM_CABECERA) // tam_registro
+        if n > 0:
+            self.registros = np.memmap(ruta, dtype=self.dtype, mode="r",
+                                       offset=TAM_CABECERA, shape=(n,))
+        else:
+            self.registros = np.zeros(0, dtype=self.dtype)
+        self._indice = self._cargar_indice()
+
+    def __len__(self):
+        return len(self.registros)
+
+    def _cargar_indice(self):
+        import numpy as np
+
+        esperadas = -(-len(self) // self.indice_cada)
+        try:
+            idx = np.fromfile(self.ruta + ".idx", dtype="<u8").reshape(-1, 2)
+        except (OSError, ValueError):
+            idx = np.zeros((0, 2), dtype="<u8")
+        if len(idx) < esperadas:
+            # Reconstrucción: lectura con paso sobre el memmap
+            n = np.arange(0, len(self), self.indice_cada, dtype="<u8")
+            idx = np.column_stack([n, self.registros["t_ns"][::self.indice_cada]])
+        return idx[:esperadas]
+
+    def buscar(self, t_ns):
+        """Primer registro con ``t_ns`` >= ``t_ns``, usando el índice disperso."""
+        import numpy as np
+
+        # Última entrada estrictamente anterior y la siguiente acotan la búsqueda
+        k   = int(np.searchsorted(self._indice[:, 1], t_ns, side="left")) - 1
+        ini = int(self._indice[k, 0]) if k >= 0 else 0
+        fin = len(self)
+        if k + 1 < len(self._indice):
+            fin = int(self._indice[k + 1, 0]) + 1
+        return ini + int(np.searchsorted(self.registros["t_ns"][ini:fin], t_ns))
+
+    def rango(self, t_ini_ns, t_fin_ns):
+        """Vista de los registros con t_ini_ns <= t_ns < t_fin_ns."""
+        return self.registros[self.buscar(t_ini_ns):self.buscar(t_fin_ns)]
+
+    def tramas(self, ini=0, fin=None):
+        """Bytes crudos de las tramas [ini, fin), concatenados (para re-entramar)."""
+        return self.registros["trama"][ini:fin].tobytes()
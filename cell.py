@@ -1,40 +1,59 @@
-import serial
-import serial.tools.list_ports
 import time
-import threading
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from collections import deque
-from queue import Queue, Empty
-import struct
+import numpy as np
 import csv
-import os
+import sys
+
+from adquisicion import Motor
+from calibracion import (ajustar_archivo, cargar as cargar_calibracion,
+                         guardar as guardar_calibracion, preparar_puntos)
+from esquemas import CELDA
+from estadistica import Asentamiento, VentanaEstadistica
+from graficas import GraficaBlit, crear_figura, precargar
+from historial import CANALES_CELDA, Historial
+from puertos import VigilantePuertos
+from replay import puertos_replay
 
 
 # ---------- CONFIGURACIÓN ----------
-TIMEOUT        = 1
 MAX_PUNTOS     = 500
-SYNC1          = 0xFE
-SYNC2          = 0xFB
-PACKET_SIZE    = 30
 CSV_FILE       = "calibracion.csv"
 GRAPH_INTERVAL = 100
 QUEUE_INTERVAL = 10
+CAPACIDAD_COLA = 20_000     # paquetes entre el motor y la GUI
+GRADO_CALIBRACION = 1       # polinomio lectura → N (ver calibracion.py)
+VENTANA_MUESTRAS  = 1000    # muestras del promedio y de los puntos de calibración
+# Captura automática (estadistica.Asentamiento), en N sin calibrar
+IC_CAPTURA_N      = 0.1     # semiancho del IC 95 % de la media para guardar el punto
+TOLERANCIA_N      = 0.5     # deriva admitida entre ventanas de 1 s para darla por asentada
+MAX_CAPTURA_S     = 60.0
 # -----------------------------------
 
 
-ser           = None
 leyendo       = False
 tiempo_inicio = None
-data_queue    = Queue(maxsize=2000)
-
-
-tiempos_thrust = deque(maxlen=MAX_PUNTOS)
-valores_thrust = deque(maxlen=MAX_PUNTOS)
-ultimos_1000   = deque(maxlen=1000)
-
-
+# Puerto, entramado y tiempo de cada muestra según el reloj del Teensy
+# (adquisicion.py); thrust llega crudo (int32) y se escala aquí
+motor         = Motor(CELDA)
+data_queue    = motor.suscribir(CAPACIDAD_COLA)
+
+
+historial      = Historial(MAX_PUNTOS, CANALES_CELDA)
+# Media y dispersión de las últimas lecturas crudas (int32), actualizadas por
+# bloque: los puntos de calibración se guardan sin calibrar
+ventana_stats  = VentanaEstadistica(muestras=VENTANA_MUESTRAS)
+# Última versión de calibracion.json; None muestra la lectura int32/100
+calibracion    = cargar_calibracion()
+# Captura automática: peso del punto en curso (None si no hay) y su detector
+captura_peso   = None
+captura        = Asentamiento(IC_CAPTURA_N, TOLERANCIA_N, max_s=MAX_CAPTURA_S)
+
+
+# La figura se crea al conectar (ver graficas.crear_figura), no al arrancar
+fig        = None
+ax         = None
+canvas     = None
+blit       = None
 _line      = None
 _avg_line  = None
 _graf_init = False
@@ -76,8 +95,17 @@ def make_button(parent, text, command, bg="#C88A53", fg="white",
         cur = "hand2" if frame._enabled else "arrow"
         frame.config(bg=c, cursor=cur); label.config(bg=c, fg=fg_, cursor=cur)
 
+    def _config(**kw):
+        # El texto es del label interior; el estado cambia colores y cursor
+        if "text" in kw:
+            label.config(text=kw.pop("text"))
+        if "state" in kw:
+            _set_state(kw.pop("state"))
+        elif kw:
+            tk.Frame.configure(frame, **kw)
+
     frame._enabled = True
-    frame.config   = lambda **kw: (_set_state(kw["state"]) if "state" in kw else None)
+    frame.config   = _config
     for widget in (frame, label):
         widget.bind("<Button-1>", _on_click)
         widget.bind("<Enter>",    _on_enter)
@@ -86,14 +114,14 @@ def make_button(parent, text, command, bg="#C88A53", fg="white",
     return frame
 
 
-def obtener_puertos():
-    return [p.device for p in serial.tools.list_ports.comports()]
+# comports() corre en un hilo aparte; aquí sólo se recogen los cambios
+vigilante = VigilantePuertos(puertos_replay(sys.argv[1:]))
 
 
 def refrescar_puertos():
     global puertos_actuales
-    nuevos = obtener_puertos()
-    if nuevos != puertos_actuales:
+    nuevos = vigilante.cambios()
+    if nuevos is not None and nuevos != puertos_actuales:
         puertos_actuales = nuevos
         menu = puerto_menu["menu"]
         menu.delete(0, "end")
@@ -106,54 +134,69 @@ def refrescar_puertos():
             menu.add_command(label="No hay puertos",
                              command=lambda: puerto_var.set("No hay puertos"))
             puerto_var.set("No hay puertos")
-    ventana.after(1000, refrescar_puertos)
+    ventana.after(250, refrescar_puertos)
 
 
 def conectar():
-    global ser, leyendo, tiempo_inicio, _graf_init
-
     puerto = puerto_var.get()
     if puerto == "No hay puertos":
         return
 
+    # Sin escaneos de puertos mientras dura la conexión
+    vigilante.pausar()
     try:
-        ser = serial.Serial(puerto, int(baudrate_var.get()), timeout=TIMEOUT)
-        time.sleep(1)
-
-        leyendo       = True
-        tiempo_inicio = time.time()
-        _graf_init    = False
-
-        tiempos_thrust.clear()
-        valores_thrust.clear()
-        ultimos_1000.clear()
+        # Apertura y espera al reinicio del Teensy en el hilo del motor
+        futuro = motor.iniciar(puerto, int(baudrate_var.get()), espera_reset=1.0)
+    except Exception as e:
+        _flash_msg(f"Error: {e}", color="red", duration=5000)
+        return
 
-        while not data_queue.empty():
-            try: data_queue.get_nowait()
-            except Empty: break
+    precargar()
+    estado_label.config(text="Conectando...", fg="orange")
+    btn_conectar.config(state="disabled")
+    ventana.after(50, lambda: _esperar_conexion(futuro))
 
-        threading.Thread(target=leer_datos, daemon=True).start()
-        ventana.after(QUEUE_INTERVAL,  procesar_queue)
-        ventana.after(GRAPH_INTERVAL,  actualizar_grafica)
 
-        estado_label.config(text="Conectado", fg="#00FF88")
-        btn_conectar.config(state="disabled")
-        btn_desconectar.config(state="normal")
+def _esperar_conexion(futuro):
+    global leyendo, tiempo_inicio
 
+    if not futuro.done():
+        ventana.after(50, lambda: _esperar_conexion(futuro))
+        return
+    try:
+        futuro.result()
     except Exception as e:
+        motor.detener()
+        vigilante.reanudar()
+        estado_label.config(text="Desconectado", fg="red")
+        btn_conectar.config(state="normal")
         _flash_msg(f"Error: {e}", color="red", duration=5000)
+        return
+
+    _crear_grafica()
+    leyendo       = True
+    tiempo_inicio = time.perf_counter()
+
+    historial.clear()
+    blit.reset()
+    ventana_stats.clear()
+
+    ventana.after(QUEUE_INTERVAL,  procesar_queue)
+    ventana.after(GRAPH_INTERVAL,  actualizar_grafica)
 
+    estado_label.config(text="Conectado", fg="#00FF88")
+    btn_desconectar.config(state="normal")
 
-def desconectar():
-    global ser, leyendo
+
+def desconectar(estado="Desconectado"):
+    global leyendo
 
     leyendo = False
-    if ser and ser.is_open:
-        try: ser.close()        # closing the port unblocks ser.read() immediately
-        except: pass
-    ser = None
+    _terminar_captura()
+    motor.detener()
+    vigilante.reanudar()
 
-    estado_label.config(text="Desconectado", fg="red")
+    estado_label.config(text=estado, fg="red")
     thrust_label.config(text="-- N")
     avg_label.config(text="Prom(1000): -- N")
     ts_label.config(text="--:--.--.---")
@@ -161,80 +204,56 @@ def desconectar():
     btn_desconectar.config(state="disabled")
 
 
-def leer_datos():
-    global leyendo
-
-    while leyendo:
-        try:
-            b = ser.read(1)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"}); break
-
-        if len(b) != 1 or b[0] != SYNC1:
-            continue
-
-        try:
-            b2 = ser.read(1)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"}); break
-
-        if len(b2) != 1 or b2[0] != SYNC2:
-            continue
-
-        try:
-            payload = ser.read(PACKET_SIZE)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"}); break
-
-        if len(payload) != PACKET_SIZE:
-            continue
+def _fuerza(crudo):
+    """Thrust en N: calibrado si hay calibración (el /100 va en los coeficientes)."""
+    if calibracion is None:
+        return crudo / CELDA.divisor("thrust")
+    return calibracion.aplicar(crudo, 1 / CELDA.divisor("thrust"))
 
-        thrust    = struct.unpack("<i", payload[4:8])[0] / 100.0
-        teensy_ms = struct.unpack("<I", payload[0:4])[0]
-        ts        = time.time()
 
-        try:
-            data_queue.put_nowait({"tipo": "datos", "thrust": thrust,
-                                   "ts": ts, "teensy_ms": teensy_ms})
-        except:
-            pass
+def _texto_calibracion():
+    if calibracion is None:
+        return "Sin calibrar (int32/100)"
+    return f"Calibración v{calibracion.version} (g{calibracion.grado}, rms {calibracion.rms_N:.1f} N)"
 
 
 def procesar_queue():
     if not leyendo:
         return
 
-    procesados  = 0
     last_thrust = None
     last_tms    = None
 
-    while procesados < 50:
-        try:
-            paquete = data_queue.get_nowait()
-        except Empty:
-            break
-
-        if paquete["tipo"] == "error":
+    # Se vacía la cola entera en cada tick: un bloque por lectura del motor
+    for bloque in data_queue.vaciar():
+        if bloque["tipo"] == "error":
             ventana.after(0, desconectar)
             return
+        if bloque["tipo"] == "fin":
+            # Se muestra lo ya recibido antes de desconectar
+            ventana.after(0, desconectar, "Reproducción terminada")
+            break
 
-        thrust = paquete["thrust"]
-        t_rel  = paquete["ts"] - tiempo_inicio
+        datos  = bloque["datos"]
+        if len(datos) == 0:
+            continue
+        thrust = _fuerza(datos["thrust"])
+        t_rel  = bloque["t"] - tiempo_inicio
 
-        tiempos_thrust.append(t_rel)
-        valores_thrust.append(thrust)
-        ultimos_1000.append(thrust)
-        last_thrust = thrust
-        last_tms    = paquete.get("teensy_ms", 0)
-        procesados += 1
+        historial.extend(np.column_stack((t_rel, thrust)))
+        ventana_stats.extend(datos["thrust"])
+        if captura_peso is not None:
+            captura.extend(datos["thrust"] / CELDA.divisor("thrust"), bloque["t"])
+        last_thrust = float(thrust[-1])
+        last_tms    = int(datos["timestamp_ms"][-1])
 
     if last_thrust is not None:
         thrust_label.config(text=f"{last_thrust:.2f} N")
 
-        n = len(ultimos_1000)
+        n = ventana_stats.n
         if n > 0:
-            avg = sum(ultimos_1000) / n
-            avg_label.config(text=f"Prom({n}/1000): {avg:.2f} N")
+            avg = float(_fuerza(ventana_stats.media))
+            avg_label.config(text=f"Prom({n}/{VENTANA_MUESTRAS}): {avg:.2f} N")
 
         ms  =  last_tms % 1000
         sec = (last_tms // 1000) % 60
@@ -242,9 +261,23 @@ def procesar_queue():
         hr  = (last_tms // 3600000) % 24
         ts_label.config(text=f"{hr:02d}:{mn:02d}:{sec:02d}.{ms:03d}")
 
+    if captura_peso is not None:
+        _revisar_captura()
+
     ventana.after(QUEUE_INTERVAL, procesar_queue)
 
 
+def _crear_grafica():
+    global fig, ax, canvas, blit
+
+    if blit is not None:
+        return
+    grafica_label.destroy()
+    fig, ax, canvas = crear_figura(frame_right)
+    ax.set_facecolor("#2C2A36")
+    blit = GraficaBlit(canvas)
+
+
 def _init_grafica():
     global _line, _avg_line, _graf_init
 
@@ -257,10 +290,12 @@ def _init_grafica():
         spine.set_color('#555555')
     ax.grid(True, color="#444444")
 
-    _line,    = ax.plot([], [], color="#C88A53", linewidth=2, label="Thrust")
-    _avg_line = ax.axhline(0, color="#00FF88", linewidth=1.4,
-                           linestyle="--", label="Prom(1000)")
-    ax.legend(facecolor="#2C2A36", labelcolor="white", fontsize=9)
+    _line     = blit.agregar_linea(ax, color="#C88A53", linewidth=2, label="Thrust",
+                                   diezmado="minmax")
+    _avg_line = blit.agregar_linea(ax, color="#00FF88", linewidth=1.4,
+                                   linestyle="--", label="Prom(1000)")
+    # La leyenda cambia de texto en cada refresco: se repinta con las líneas
+    blit.agregar_artista(ax.legend(facecolor="#2C2A36", labelcolor="white", fontsize=9))
     fig.tight_layout()
     _graf_init = True
 
@@ -271,28 +306,25 @@ def actualizar_grafica():
     if not leyendo:
         return
 
-    if len(tiempos_thrust) >= 2:
+    if len(historial) >= 2:
         if not _graf_init:
             _init_grafica()
 
-        t   = list(tiempos_thrust)
-        th  = list(valores_thrust)
-        avg = sum(ultimos_1000) / len(ultimos_1000) if ultimos_1000 else 0.0
-
-        _line.set_data(t, th)
-        _avg_line.set_ydata([avg, avg])
+        t   = historial.canal("t")
+        th  = historial.canal("thrust")
+        avg = float(_fuerza(ventana_stats.media)) if ventana_stats.n else 0.0
 
-        ax.relim()
-        ax.autoscale_view()
         ax.get_legend().get_texts()[1].set_text(f"Prom(1000): {avg:.2f} N")
-
-        canvas.draw_idle()
+        blit.actualizar([
+            (_line,     t,           th),
+            (_avg_line, t[[0, -1]], [avg, avg]),
+        ])
 
     ventana.after(GRAPH_INTERVAL, actualizar_grafica)
 
 
 def guardar_punto():
-    if not ultimos_1000:
+    if not ventana_stats.n:
         _flash_msg("Sin datos aún", color="red")
         return
 
@@ -302,26 +334,93 @@ def guardar_punto():
         _flash_msg("Peso inválido", color="red")
         return
 
-    n     = len(ultimos_1000)
-    avg_N = sum(ultimos_1000) / n
-    ts    = time.strftime("%Y-%m-%d %H:%M:%S")
+    div = CELDA.divisor("thrust")
+    _escribir_punto(peso_kg, ventana_stats.n, ventana_stats.media / div,
+                    ventana_stats.desviacion / div, ventana_stats.error_estandar / div)
+
+
+def _escribir_punto(peso_kg, n, avg_N, desv, err):
+    """Añade un punto a calibracion.csv.
+
+    Se guarda la lectura sin calibrar (es la entrada del ajuste) con su ruido:
+    desviación de las muestras y error estándar de la media.
+    """
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
 
-    escribir_header = not os.path.exists(CSV_FILE)
+    # Crea el archivo, o migra uno antiguo de 4 columnas, con la cabecera actual
+    preparar_puntos(CSV_FILE)
     with open(CSV_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        if escribir_header:
-            writer.writerow(["timestamp", "peso_kg", "thrust_prom_N", "n_muestras"])
-        writer.writerow([ts, peso_kg, f"{avg_N:.4f}", n])
+        csv.writer(f).writerow([ts, peso_kg, f"{avg_N:.4f}", n, f"{desv:.4f}", f"{err:.5f}"])
+
+    _flash_msg(f"✔ {peso_kg} kg → {avg_N:.2f} ± {err:.3f}  ({n} muestras)")
+
+
+def captura_automatica():
+    """Espera a que la carga se asiente y guarda el punto al converger la media."""
+    global captura_peso
+
+    if captura_peso is not None:
+        _terminar_captura()
+        _flash_msg("Captura cancelada", color="#AAAAAA")
+        return
+    if not leyendo:
+        _flash_msg("Conecta el puerto primero", color="red")
+        return
+    try:
+        captura_peso = float(peso_var.get())
+    except ValueError:
+        _flash_msg("Peso inválido", color="red")
+        return
+
+    captura.reiniciar()
+    btn_auto.config(text="⏹ Cancelar captura")
+    captura_label.config(text="Esperando a que se asiente…")
+
+
+def _revisar_captura():
+    estado = captura.estado
+    if estado == "asentando":
+        captura_label.config(text="Esperando a que se asiente…")
+    elif estado == "midiendo":
+        captura_label.config(
+            text=f"Midiendo: ±{captura.semiancho:.3f} N → ±{IC_CAPTURA_N} "
+                 f"({captura.punto.n} muestras)")
+    elif estado == "listo":
+        p = captura.punto
+        _escribir_punto(captura_peso, p.n, p.media, p.desviacion, p.error_estandar)
+        _terminar_captura()
+    else:
+        _terminar_captura()
+        _flash_msg(f"Sin converger en {MAX_CAPTURA_S:.0f} s", color="red", duration=5000)
+
+
+def _terminar_captura():
+    global captura_peso
+
+    captura_peso = None
+    btn_auto.config(text="⏱ Captura automática")
+    captura_label.config(text="")
+
 
-    _flash_msg(f"✔ {peso_kg} kg → {avg_N:.2f} N  ({n} muestras)")
+def ajustar_calibracion():
+    """Ajusta calibracion.csv, guarda la versión nueva y la aplica desde ya."""
+    global calibracion
+
+    try:
+        cal = ajustar_archivo(CSV_FILE, GRADO_CALIBRACION)
+        guardar_calibracion(cal)
+    except (OSError, ValueError) as e:
+        _flash_msg(f"Error: {e}", color="red", duration=5000)
+        return
+    calibracion = cal
+    cal_label.config(text=_texto_calibracion())
+    _flash_msg(f"✔ Calibración v{cal.version}: rms {cal.rms_N:.2f} N ({cal.puntos} puntos)")
 
 
 def cerrar():
     global leyendo
     leyendo = False
-    if ser and ser.is_open:
-        try: ser.close()        # unblocks any pending ser.read() in the thread
-        except: pass
+    motor.detener()
     ventana.after(200, _destruir)
 
 
@@ -333,7 +432,7 @@ def _destruir():
 # ---------------- INTERFAZ ----------------
 ventana = tk.Tk()
 ventana.title("Thrust Calibration")
-ventana.geometry("700x540")
+ventana.geometry("700x660")
 ventana.configure(bg="#15141B")
 
 frame_left = tk.Frame(ventana, bg="#2C2A36", width=180)
@@ -341,11 +440,10 @@ frame_left.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
 frame_left.pack_propagate(False)
 
 tk.Label(frame_left, text="Puerto COM", bg="#2C2A36", fg="white").pack(anchor="w", pady=(10, 2))
-puerto_var       = tk.StringVar()
-puertos_actuales = obtener_puertos()
-puerto_var.set(puertos_actuales[0] if puertos_actuales else "No hay puertos")
-puerto_menu = tk.OptionMenu(frame_left, puerto_var,
-                            *(puertos_actuales if puertos_actuales else ["No hay puertos"]))
+# La primera búsqueda de puertos se hace con la ventana ya dibujada
+puerto_var       = tk.StringVar(value="No hay puertos")
+puertos_actuales = []
+puerto_menu = tk.OptionMenu(frame_left, puerto_var, "No hay puertos")
 puerto_menu.pack(fill="x", padx=5)
 
 tk.Label(frame_left, text="Baudrate", bg="#2C2A36", fg="white").pack(anchor="w", pady=(10, 2))
@@ -369,7 +467,11 @@ avg_label.pack(pady=(0, 4))
 
 ts_label = tk.Label(frame_left, text="--:--:--.---", fg="#888888",
                     bg="#2C2A36", font=("Courier New", 11))
-ts_label.pack(pady=(0, 12))
+ts_label.pack(pady=(0, 4))
+
+cal_label = tk.Label(frame_left, text=_texto_calibracion(), fg="#888888",
+                     bg="#2C2A36", font=("Arial", 8), wraplength=160)
+cal_label.pack(pady=(0, 12))
 
 tk.Frame(frame_left, height=2, bg="#555555").pack(fill="x", pady=5)
 
@@ -383,6 +485,18 @@ btn_guardar = make_button(frame_left, "💾 Guardar punto", guardar_punto,
                           bg="#4A90D9", fg="white", font=("Arial", 10, "bold"))
 btn_guardar.pack(pady=(8, 2), fill="x", padx=5)
 
+btn_auto = make_button(frame_left, "⏱ Captura automática", captura_automatica,
+                       bg="#4A90D9", fg="white", font=("Arial", 10, "bold"))
+btn_auto.pack(pady=(2, 2), fill="x", padx=5)
+
+captura_label = tk.Label(frame_left, text="", fg="#AAAAAA", bg="#2C2A36",
+                         font=("Arial", 8), wraplength=160)
+captura_label.pack(pady=(0, 2))
+
+btn_ajustar = make_button(frame_left, "📐 Ajustar calibración", ajustar_calibracion,
+                          bg="#4A90D9", fg="white", font=("Arial", 10, "bold"))
+btn_ajustar.pack(pady=(2, 2), fill="x", padx=5)
+
 # ── inline notification label (no more popups) ───────────────────────────────
 notify_label = tk.Label(frame_left, text="", bg="#2C2A36",
                         font=("Arial", 9, "bold"), wraplength=160, justify="center")
@@ -403,12 +517,12 @@ btn_desconectar.pack(pady=4, fill="x", padx=5)
 frame_right = tk.Frame(ventana, bg="#15141B")
 frame_right.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-fig, ax = plt.subplots(figsize=(6, 5))
-fig.patch.set_facecolor("#15141B")
-ax.set_facecolor("#2C2A36")
-canvas = FigureCanvasTkAgg(fig, master=frame_right)
-canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+# Sólo un aviso hasta conectar (_crear_grafica)
+grafica_label = tk.Label(frame_right, text="La gráfica aparece al conectar",
+                         bg="#15141B", fg="#555555", font=("Arial", 12))
+grafica_label.pack(fill=tk.BOTH, expand=True)
 
 ventana.protocol("WM_DELETE_WINDOW", cerrar)
-ventana.after(1000, refrescar_puertos)
+vigilante.iniciar()
+ventana.after(100, refrescar_puertos)
 ventana.mainloop()
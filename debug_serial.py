@@ -1,8 +1,9 @@
 import serial
 import serial.tools.list_ports
-import struct
 import time
 
+from esquemas import LEEM
+
 # Listar puertos disponibles
 ports = serial.tools.list_ports.comports()
 print("Puertos disponibles:")
@@ -43,12 +44,12 @@ try:
         
         print(f"  Header recibido: 0x{header.hex()}")
         
-        if header == b"\x01":
+        if header == LEEM.cabecera:
             # Leer 28 bytes de payload
-            payload = ser.read(28)
+            payload = ser.read(LEEM.tam_payload)
             print(f"  Payload recibido: {len(payload)} bytes")
             
-            if len(payload) != 28:
+            if len(payload) != LEEM.tam_payload:
                 print(f"  ⚠ Payload incompleto: {len(payload)} bytes")
                 print(f"  Hex: {payload.hex()}")
                 # Limpiar buffer
@@ -59,17 +60,8 @@ try:
             print(f"✓ Paquete recibido: {len(payload)} bytes")
             print(f"  Hex: {payload.hex()}")
             
-            # Decodificar
-            timestamp_ms = struct.unpack("<I", payload[0:4])[0]
-            thrust_raw = struct.unpack("<h", payload[4:6])[0]
-            thrust = thrust_raw / 100.0
-            
-            temps = []
-            for i in range(10):
-                temp_raw = struct.unpack("<h", payload[6 + i*2:8 + i*2])[0]
-                temps.append(temp_raw / 100.0)
-            
-            transducer_raw = struct.unpack("<H", payload[26:28])[0]
+            # Decodificar (esquemas.LEEM)
+            timestamp_ms, thrust, *temps, transducer_raw = LEEM.decodificar(payload)
             
             print(f"  Timestamp: {timestamp_ms} ms")
             print(f"  Thrust: {thrust:.2f} N")
@@ -0,0 +1,70 @@
+import numpy as np
+
+from esquemas import INTERFAZ
+
+
+# ---------- PRESIÓN: constantes precalculadas ----------
+# Original pipeline:
+#   v   = (raw / 4095) * 3.3
+#   i   = v / 150
+#   psi = (i - 0.004) * 312500
+#   bar = psi * 0.0689476 + 1.01325
+#
+# Desarrollado:
+#   bar = raw * (3.3 / 4095 / 150 * 312500 * 0.0689476)
+#              + (-0.004 * 312500 * 0.0689476 + 1.01325)
+#
+_BAR_K      = (3.3 / 4095) / 150 * 312500 * 0.0689476   # ≈ 1.1065e-4  bar/LSB
+_BAR_OFFSET = -0.004 * 312500 * 0.0689476 + 1.01325      # ≈ -85.1735   bar
+# bar = raw * _BAR_K + _BAR_OFFSET
+# -------------------------------------------------------
+
+
+# ---------- PAQUETE interfaz.py ----------
+# Paquete de 27 bytes (formato en esquemas.INTERFAZ):
+#   [0]     cabecera      0x01
+#   [1:5]   timestamp_ms  (uint32 LE)
+#   [5:9]   thrust        (int32  LE) / 100.0
+#   [9:25]  temps x8      (int16  LE cada uno) / 100.0
+#   [25:27] transducer    (uint16 LE)
+DTYPE_PAYLOAD = INTERFAZ.dtype
+DTYPE_TRAMA   = INTERFAZ.dtype_trama
+
+# Resultado ya escalado, una fila por paquete
+DTYPE_DATOS = np.dtype([
+    ("timestamp_ms",   "<u4"),
+    ("thrust",         "<f8"),
+    ("temps",          "<f8", (8,)),
+    ("transducer",     "<f8"),
+    ("transducer_raw", "<u2"),
+])
+# -----------------------------------------
+
+
+def decodificar_lote(buf, con_cabecera=False, calibracion=None):
+    """Decodifica N paquetes contiguos de una sola vez.
+
+    ``buf`` es cualquier objeto con protocolo buffer (bytes, bytearray, memoryview)
+    con N payloads de 26 bytes seguidos, o N tramas de 27 si ``con_cabecera``.
+    Devuelve un array estructurado ``DTYPE_DATOS`` de N filas; el escalado /100 y
+    la conversión de presión se aplican sobre columnas completas. Con una
+    ``calibracion.Calibracion`` el thrust sale en N calibrados (el /100 va
+    plegado en sus coeficientes).
+    """
+    crudo = np.frombuffer(buf, dtype=DTYPE_TRAMA if con_cabecera else DTYPE_PAYLOAD)
+
+    datos = np.empty(len(crudo), dtype=DTYPE_DATOS)
+    datos["timestamp_ms"]   = crudo["timestamp_ms"]
+    if calibracion is None:
+        datos["thrust"]     = crudo["thrust"]
+        datos["thrust"]    /= INTERFAZ.divisor("thrust")
+    else:
+        calibracion.aplicar(crudo["thrust"], 1 / INTERFAZ.divisor("thrust"),
+                            out=datos["thrust"])
+    datos["temps"]          = crudo["temps"]
+    datos["temps"]         /= INTERFAZ.divisor("temps")
+    datos["transducer_raw"] = crudo["transducer"]
+    datos["transducer"]     = crudo["transducer"]
+    datos["transducer"]    *= _BAR_K
+    datos["transducer"]    += _BAR_OFFSET
+    return datos
@@ -0,0 +1,208 @@
+"""Diezmado para graficar historiales largos.
+
+El canvas tiene unos cientos de píxeles de ancho; dibujar cientos de miles de
+puntos no añade información. Estas funciones reducen una serie a un número de
+puntos proporcional al ancho en píxeles, de modo que el coste de dibujo no
+depende de la duración del ensayo.
+"""
+import numpy as np
+
+
+def minmax(x, y, n_cubos):
+    """Mínimo y máximo de cada cubo de índices, en orden temporal.
+
+    Devuelve como mucho ``2 * n_cubos + 2`` puntos. Todos los extremos locales a
+    escala de píxel se conservan exactamente (pico de presión en la ignición,
+    pico de empuje), así que la línea dibujada es indistinguible de la original.
+    """
+    n = len(y)
+    if n_cubos < 1 or n <= 2 * n_cubos + 2:
+        return x, y
+
+    tam    = n // n_cubos
+    m      = tam * n_cubos
+    bloque = y[:m].reshape(n_cubos, tam)
+    base   = np.arange(0, m, tam)
+    partes = [base + bloque.argmin(axis=1), base + bloque.argmax(axis=1), [0, n - 1]]
+    if m < n:
+        resto = y[m:]
+        partes.append([m + resto.argmin(), m + resto.argmax()])
+
+    idx = np.unique(np.concatenate(partes))    # ordena y elimina repetidos
+    return x[idx], y[idx]
+
+
+def _elegir(xs, ys, ax, ay, cx, cy):
+    # Área (doble) del triángulo anterior-candidato-siguiente para cada candidato
+    area = np.abs((ax - cx)[:, None] * (ys - ay[:, None])
+                  - (ax[:, None] - xs) * (cy - ay)[:, None])
+    return area.argmax(axis=1)
+
+
+def lttb(x, y, n_out):
+    """Aproximación vectorizada de Largest-Triangle-Three-Buckets.
+
+    En lugar del bucle secuencial clásico se hacen dos pasadas sobre todos los
+    cubos a la vez: la primera usa como vértice anterior la media del cubo
+    previo y la segunda el punto elegido en la primera. En tramos ruidosos el
+    punto elegido puede diferir del de LTTB secuencial, pero la forma de la
+    curva se mantiene y el coste son unas pocas operaciones sobre el array
+    completo. No garantiza conservar picos aislados: para eso, ``minmax``.
+    """
+    n = len(y)
+    if n_out < 3 or n <= 2 * n_out:
+        return x, y
+
+    n_cubos = n_out - 2
+    tam     = (n - 2) // n_cubos
+    m       = tam * n_cubos
+    xs      = x[1:1 + m].reshape(n_cubos, tam)
+    ys      = y[1:1 + m].reshape(n_cubos, tam)
+
+    mx, my = xs.mean(axis=1), ys.mean(axis=1)
+    # Media del cubo siguiente; para el último cubo, el último punto
+    cx = np.append(mx[1:], x[n - 1])
+    cy = np.append(my[1:], y[n - 1])
+
+    ax = np.append(x[0], mx[:-1])
+    ay = np.append(y[0], my[:-1])
+    sel = _elegir(xs, ys, ax, ay, cx, cy)
+
+    filas = np.arange(n_cubos)
+    ax = np.append(x[0], xs[filas, sel][:-1])
+    ay = np.append(y[0], ys[filas, sel][:-1])
+    sel = _elegir(xs, ys, ax, ay, cx, cy)
+
+    idx = np.concatenate(([0], 1 + filas * tam + sel, [n - 1]))
+    return x[idx], y[idx]
+
+
+DIEZMADOS = {
+    "minmax": minmax,
+    "lttb":   lttb,
+}
+
+
+# ---------- INCREMENTAL ----------
+_PUNTOS_CUBO = {"minmax": 2, "lttb": 1}
+_LLENADO     = (0.7, 1.4)      # cubos entre estas fracciones del objetivo; si no, se rehace
+
+
+class Diezmador:
+    """Diezmado ``minmax`` o ``lttb`` que conserva entre refrescos lo ya calculado.
+
+    Las funciones de arriba recorren la serie entera en cada llamada. Aquí la
+    serie se parte en cubos de ``tam`` muestras fijos: en cada refresco sólo se
+    diezman los cubos completos nuevos (los puntos elegidos de los anteriores
+    no cambian). El tramo final incompleto, y el primer cubo cuando el
+    historial circular ya ha descartado parte de él, se representan con sus
+    muestras primera y última, su mínimo y su máximo. Si el número de cubos se
+    sale de ``_LLENADO`` respecto al objetivo (el historial ha crecido al doble
+    o ha cambiado el ancho del eje) se rehace todo con el ``tam`` nuevo, así
+    que el coste amortizado es el de las muestras nuevas.
+
+    ``x`` debe ser creciente (el tiempo del historial).
+    """
+
+    def __init__(self, modo):
+        if modo not in _PUNTOS_CUBO:
+            raise ValueError(f"diezmado desconocido: {modo}")
+        self.modo = modo
+        self.reset()
+
+    def reset(self):
+        self._tam      = 0
+        self._objetivo = 0
+        self._x        = np.empty(0)      # puntos elegidos de los cubos cerrados
+        self._y        = np.empty(0)
+        self._fin      = np.empty(0)      # x de la última muestra del cubo de cada punto
+        self._hasta    = -np.inf          # x de la última muestra ya en un cubo cerrado
+        self._inicio   = -np.inf          # x[0] de la llamada anterior
+        self._recortado = False           # el historial ya ha descartado muestras
+
+    def __call__(self, x, y, puntos):
+        n        = len(y)
+        objetivo = max(int(puntos) // _PUNTOS_CUBO[self.modo], 1)
+        if n <= 2 * objetivo * _PUNTOS_CUBO[self.modo]:
+            self.reset()
+            return x, y
+
+        cubos = len(self._x) / _PUNTOS_CUBO[self.modo]
+        if (objetivo != self._objetivo or cubos > _LLENADO[1] * objetivo
+                or x[0] < self._inicio or x[-1] < self._hasta):
+            # Primer uso, eje redimensionado, historial duplicado o borrado
+            self.reset()
+            self._objetivo = objetivo
+            self._tam      = max(int(np.ceil(n / (_LLENADO[0] * objetivo))), 2)
+        self._recortado = self._recortado or x[0] > self._inicio > -np.inf
+        self._inicio    = x[0]
+
+        # Fuera los cubos que ya no están en el historial
+        k = int(np.searchsorted(self._fin, x[0]))
+        if k:
+            self._x, self._y, self._fin = self._x[k:], self._y[k:], self._fin[k:]
+
+        i  = int(np.searchsorted(x, self._hasta, side="right"))
+        i += self._cerrar(x[i:], y[i:])
+        # La línea acaba en la última muestra aunque ésta cierre un cubo
+        xc, yc = self._cola(x[i:], y[i:]) if i < n else (x[-1:], y[-1:])
+
+        xs, ys = self._x, self._y
+        if self._recortado and len(self._fin):
+            # Primer cubo a medias: se recalcula con lo que queda de él
+            j  = int(np.searchsorted(x, self._fin[0], side="right"))
+            k  = int(np.searchsorted(self._fin, self._fin[0], side="right"))
+            xh, yh = self._cola(x[:j], y[:j])
+            xs, ys = np.concatenate((xh, xs[k:])), np.concatenate((yh, ys[k:]))
+        return np.concatenate((xs, xc)), np.concatenate((ys, yc))
+
+    def _cerrar(self, x, y):
+        """Diezma los cubos completos de ``x, y``; devuelve las muestras cerradas."""
+        tam = self._tam
+        k   = len(y) // tam
+        if self.modo == "lttb":
+            k -= 1              # el último espera a que el siguiente esté completo
+        if k <= 0:
+            return 0
+        xs = x[:(k + (self.modo == "lttb")) * tam].reshape(-1, tam)
+        ys = y[:(k + (self.modo == "lttb")) * tam].reshape(-1, tam)
+        filas = np.arange(k)
+
+        if self.modo == "minmax":
+            a, b = ys.argmin(axis=1), ys.argmax(axis=1)
+            sel  = np.sort(np.stack((a, b), axis=1), axis=1)
+            nx   = xs[filas[:, None], sel].ravel()
+            ny   = ys[filas[:, None], sel].ravel()
+        else:
+            mx, my = xs.mean(axis=1), ys.mean(axis=1)
+            cx, cy = mx[1:], my[1:]
+            # Vértice anterior del primer cubo: el último punto elegido
+            x0, y0 = (self._x[-1], self._y[-1]) if len(self._x) else (x[0], y[0])
+            # Dos pasadas como en lttb(): primero con la media del cubo anterior
+            ax = np.append(x0, mx[:k - 1])
+            ay = np.append(y0, my[:k - 1])
+            sel = _elegir(xs[:k], ys[:k], ax, ay, cx, cy)
+            ax = np.append(x0, xs[filas, sel][:-1])
+            ay = np.append(y0, ys[filas, sel][:-1])
+            sel = _elegir(xs[:k], ys[:k], ax, ay, cx, cy)
+            nx, ny = xs[filas, sel], ys[filas, sel]
+        if not len(self._x):
+            # La línea empieza en la primera muestra
+            nx, ny = np.append(x[0], nx), np.append(y[0], ny)
+
+        fin = np.repeat(xs[:k, -1], len(nx) // k)
+        if len(fin) < len(nx):
+            fin = np.append(xs[0, -1], fin)
+        self._x     = np.concatenate((self._x, nx))
+        self._y     = np.concatenate((self._y, ny))
+        self._fin   = np.concatenate((self._fin, fin))
+        self._hasta = x[k * tam - 1]
+        return k * tam
+
+    @staticmethod
+    def _cola(x, y):
+        """Tramo sin cubo cerrado: primera, mínimo, máximo y última, en orden."""
+        if len(y) <= 4:
+            return x, y
+        idx = np.unique([0, int(y.argmin()), int(y.argmax()), len(y) - 1])
+        return x[idx], y[idx]
@@ -0,0 +1,164 @@
+"""Registro único de formatos de paquete LEEM.
+
+Cada esquema se compila una sola vez en un ``struct.Struct`` (y en un dtype de
+NumPy para la decodificación por lotes). Cada campo es ``(nombre, tipo)`` o
+``(nombre, tipo, divisor)``, donde ``tipo`` es un código de struct con repetición
+opcional ("8h") o relleno ("22x").
+"""
+import re
+import struct
+from functools import cached_property
+
+
+_TIPO_RE = re.compile(r"^(\d*)([xbBhHiIlLqQfd])$")
+
+
+class Esquema:
+    """Formato compilado de un paquete: cabecera, struct y divisores por campo."""
+
+    def __init__(self, nombre, cabecera, campos, descripcion=""):
+        self.nombre      = nombre
+        self.cabecera    = bytes(cabecera)
+        self.campos      = list(campos)
+        self.descripcion = descripcion
+
+        fmt        = "<"
+        nombres    = []     # un nombre por valor devuelto por unpack
+        divisores  = []
+        tipos      = []     # código struct de cada valor
+        columnas   = []     # (nombre, código, repeticiones, offset) para los dtypes
+        self._divisor_campo = {}
+
+        for campo in self.campos:
+            nombre_c, tipo = campo[0], campo[1]
+            divisor = campo[2] if len(campo) > 2 else 1
+            m = _TIPO_RE.match(tipo)
+            if m is None:
+                raise ValueError(f"{nombre}: tipo de campo no válido {tipo!r}")
+            n = int(m.group(1) or 1)
+            c = m.group(2)
+            offset = struct.calcsize(fmt)
+            fmt += tipo
+            if c == "x":
+                continue
+
+            if n == 1:
+                nombres.append(nombre_c)
+            else:
+                nombres.extend(f"{nombre_c}[{k}]" for k in range(n))
+            divisores.extend([divisor] * n)
+            tipos.extend(c * n)
+            self._divisor_campo[nombre_c] = divisor
+            columnas.append((nombre_c, c, n, offset))
+
+        self.struct      = struct.Struct(fmt)
+        self.tam_payload = self.struct.size
+        self.tam_trama   = len(self.cabecera) + self.tam_payload
+        self.nombres     = nombres
+        self.divisores   = divisores
+        self.tipos       = tipos
+        self._columnas   = columnas
+
+        # Sólo se tocan los valores que realmente llevan escala
+        self._escalados  = [(i, d) for i, d in enumerate(divisores) if d != 1]
+
+    def _dtype(self, desplazamiento, cabecera=None):
+        import numpy as np
+
+        names, formats, offsets = [], [], []
+        if cabecera is not None:
+            names.append("cabecera")
+            formats.append(cabecera)
+            offsets.append(0)
+        for nombre, c, n, offset in self._columnas:
+            base = np.dtype("<" + c)
+            names.append(nombre)
+            formats.append(base if n == 1 else (base, (n,)))
+            offsets.append(offset + desplazamiento)
+        return np.dtype({"names": names, "formats": formats, "offsets": offsets,
+                         "itemsize": desplazamiento + self.tam_payload})
+
+    @cached_property
+    def dtype(self):
+        """dtype estructurado de NumPy para N payloads contiguos."""
+        return self._dtype(0)
+
+    @cached_property
+    def dtype_trama(self):
+        """Mismo dtype desplazado tras la cabecera, para tramas completas contiguas."""
+        n_cab = len(self.cabecera)
+        fmt   = "u1" if n_cab == 1 else ("u1", (n_cab,))
+        return self._dtype(n_cab, fmt)
+
+    def __repr__(self):
+        return (f"Esquema({self.nombre!r}, cabecera={self.cabecera.hex()}, "
+                f"payload={self.tam_payload} B)")
+
+    def unpack_from(self, buf, offset=0):
+        """Valores crudos del payload que empieza en ``buf[offset]``, sin copiarlo."""
+        return self.struct.unpack_from(buf, offset)
+
+    def decodificar(self, buf, offset=0):
+        """Valores escalados (lista plana, en el orden de ``nombres``)."""
+        valores = list(self.struct.unpack_from(buf, offset))
+        for i, d in self._escalados:
+            valores[i] = valores[i] / d
+        return valores
+
+    def divisor(self, nombre):
+        """Divisor de escala del campo ``nombre`` (1 si se usa en crudo)."""
+        return self._divisor_campo[nombre]
+
+    def indice(self, nombre):
+        """Posición de ``nombre`` en la lista que devuelve ``decodificar``."""
+        return self.nombres.index(nombre)
+
+
+ESQUEMAS = {}
+
+
+def registrar(esquema):
+    ESQUEMAS[esquema.nombre] = esquema
+    return esquema
+
+
+# interfaz.py — 0x01 + 26 bytes
+INTERFAZ = registrar(Esquema("interfaz", b"\x01", [
+    ("timestamp_ms", "I"),
+    ("thrust",       "i", 100),
+    ("temps",        "8h", 100),
+    ("transducer",   "H"),
+], "Banco principal, 8 termopares, thrust int32"))
+
+# debug_serial.py / test_decode.py / LEEM_interface_app.py — 0x01 + 28 bytes
+LEEM = registrar(Esquema("leem", b"\x01", [
+    ("timestamp_ms", "I"),
+    ("thrust",       "h", 100),
+    ("temps",        "10h", 100),
+    ("transducer",   "H"),
+], "Formato anterior, 10 termopares, thrust int16"))
+
+# cell.py — FE FB + 30 bytes (sólo se usan timestamp y thrust)
+CELDA = registrar(Esquema("celda", b"\xFE\xFB", [
+    ("timestamp_ms", "I"),
+    ("thrust",       "i", 100),
+    ("_reserva",     "22x"),
+], "Célula de carga"))
+
+# test.py — FE FB + 28 bytes (los campos declarados ocupan 26; los 2 últimos
+# no se interpretan)
+INSPECTOR = registrar(Esquema("inspector", b"\xFE\xFB", [
+    ("timestamp_ms", "I"),
+    ("tempTP[0]",    "h", 100),
+    ("tempTP[1]",    "h", 100),
+    ("tempTP[2]",    "h", 100),
+    ("tempTP[3]",    "h", 100),
+    ("thrust",       "h", 100),
+    ("pressure",     "h", 100),
+    ("flags",        "H"),
+    ("adc1",         "H"),
+    ("adc2",         "H"),
+    ("adc3",         "H"),
+    ("adc4",         "H"),
+    ("_reserva",     "2x"),
+], "Inspector de paquetes"))
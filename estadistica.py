@@ -0,0 +1,267 @@
+"""Estadística de ventana deslizante sin recorrer la ventana en cada refresco.
+
+``VentanaEstadistica`` sustituye a ``deque(maxlen=N)`` + ``sum(d) / len(d)``:
+guarda las muestras en un ``Historial`` (para saber cuáles salen) y mantiene
+las sumas de ``x - k`` y ``(x - k)²``, con ``k`` un valor de referencia cercano
+a la media. Cada bloque entrante suma con ``np.sum`` (por pares) lo que entra
+y resta lo que sale, y los totales se acumulan con compensación de Kahan
+(Neumaier). Cada ``capacidad`` muestras las sumas se recalculan desde la
+ventana y ``k`` se recentra, así que el error no se acumula. El coste es
+O(muestras nuevas) por bloque y O(1) por consulta de media, varianza o error
+estándar.
+
+La ventana se mide en muestras (``muestras=1000``) o en segundos
+(``segundos=2.0``, con los tiempos de cada muestra y como mucho ``capacidad``
+muestras). El mínimo y el máximo se calculan al pedirlos sobre la vista
+contigua de la ventana (NumPy, sin copia) y quedan en caché hasta el
+siguiente bloque.
+"""
+import math
+
+import numpy as np
+
+from historial import Historial
+
+
+CAPACIDAD = 100_000     # muestras como máximo en una ventana por segundos
+
+
+def _kahan(total, comp, valor):
+    """Suma compensada (Neumaier): devuelve el nuevo ``(total, compensación)``."""
+    t = total + valor
+    if abs(total) >= abs(valor):
+        comp += (total - t) + valor
+    else:
+        comp += (valor - t) + total
+    return t, comp
+
+
+class VentanaEstadistica:
+    """Media, varianza, error estándar, mínimo y máximo de las últimas muestras."""
+
+    def __init__(self, muestras=None, segundos=None, capacidad=CAPACIDAD):
+        if (muestras is None) == (segundos is None):
+            raise ValueError("la ventana se da en muestras o en segundos")
+        self.muestras  = muestras
+        self.segundos  = segundos
+        self.capacidad = int(muestras if muestras is not None else capacidad)
+        self._buf      = Historial(self.capacidad, ("t", "x"))
+        self.clear()
+
+    def clear(self):
+        self._buf.clear()
+        self.n        = 0
+        self._k       = 0.0
+        self._s       = self._cs = 0.0     # suma de (x - k) y su compensación
+        self._q       = self._cq = 0.0     # suma de (x - k)²
+        self._sin_recalcular = 0
+        self._extremos = None
+
+    def __len__(self):
+        return self.n
+
+    # ---------- entrada ----------
+    def append(self, x, t=None):
+        self.extend((x,), None if t is None else (t,))
+
+    def extend(self, valores, t=None):
+        """Añade un bloque de muestras (y sus tiempos en s si la ventana es en segundos)."""
+        x = np.asarray(valores, dtype=np.float64).ravel()
+        b = len(x)
+        if b == 0:
+            return
+        if self.segundos is not None and t is None:
+            raise ValueError("una ventana en segundos necesita los tiempos")
+        t = np.zeros(b) if t is None else np.asarray(t, dtype=np.float64).ravel()
+        if b >= self.capacidad:
+            x, t = x[-self.capacidad:], t[-self.capacidad:]
+            self._buf.clear()
+            self.n = 0
+        if self.n == 0:
+            self._k = float(x[0])
+            self._s = self._cs = self._q = self._cq = 0.0
+
+        # Lo que no cabe sale por el principio antes de sobrescribirse
+        sobran = self.n + len(x) - self.capacidad
+        if sobran > 0:
+            self._quitar(self._buf.canal("x", self.n)[:sobran])
+        self._buf.extend(np.column_stack((t, x)))
+        self._sumar(x, +1.0)
+        self.n += len(x)
+
+        if self.segundos is not None:
+            tv = self._buf.canal("t", self.n)
+            viejas = int(np.searchsorted(tv, tv[-1] - self.segundos, side="right"))
+            if viejas:
+                self._quitar(self._buf.canal("x", self.n)[:viejas])
+
+        self._extremos = None
+        self._sin_recalcular += len(x)
+        if self._sin_recalcular >= self.capacidad:
+            self._recalcular()
+
+    def _sumar(self, x, signo):
+        d = x - self._k
+        self._s, self._cs = _kahan(self._s, self._cs, signo * float(np.sum(d)))
+        self._q, self._cq = _kahan(self._q, self._cq, signo * float(np.dot(d, d)))
+
+    def _quitar(self, x):
+        self._sumar(x, -1.0)
+        self.n -= len(x)
+
+    def _recalcular(self):
+        """Sumas exactas desde la ventana, con ``k`` recentrado en la media."""
+        x = self._buf.canal("x", self.n)
+        self._k = float(x.mean()) if self.n else 0.0
+        self._s = self._cs = self._q = self._cq = 0.0
+        self._sumar(x, +1.0)
+        self._sin_recalcular = 0
+
+    # ---------- resultados ----------
+    @property
+    def media(self):
+        if self.n == 0:
+            return math.nan
+        return self._k + (self._s + self._cs) / self.n
+
+    @property
+    def varianza(self):
+        """Varianza muestral (n - 1)."""
+        if self.n < 2:
+            return math.nan
+        s = self._s + self._cs
+        return max((self._q + self._cq - s * s / self.n) / (self.n - 1), 0.0)
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza)
+
+    @property
+    def error_estandar(self):
+        """Desviación / √n: incertidumbre de la media con muestras independientes."""
+        return self.desviacion / math.sqrt(self.n) if self.n >= 2 else math.nan
+
+    def _calcular_extremos(self):
+        if self._extremos is None:
+            x = self._buf.canal("x", self.n)
+            self._extremos = (float(x.min()), float(x.max())) if self.n else (math.nan,) * 2
+        return self._extremos
+
+    @property
+    def minimo(self):
+        return self._calcular_extremos()[0]
+
+    @property
+    def maximo(self):
+        return self._calcular_extremos()[1]
+
+    @property
+    def duracion(self):
+        """Segundos entre la primera y la última muestra (con tiempos)."""
+        if self.n < 2:
+            return 0.0
+        t = self._buf.canal("t", self.n)
+        return float(t[-1] - t[0])
+
+    def valores(self):
+        """Vista de las muestras de la ventana, de la más antigua a la última."""
+        return self._buf.canal("x", self.n)
+
+    def resumen(self):
+        return {"n": self.n, "media": self.media, "desviacion": self.desviacion,
+                "error_estandar": self.error_estandar,
+                "minimo": self.minimo, "maximo": self.maximo}
+
+
+# ---------- ASENTAMIENTO ----------
+ASENTAR_S    = 1.0       # s de la ventana corta con la que se juzga si la señal está quieta
+Z_95         = 1.96      # semiancho del intervalo de confianza del 95 % en errores estándar
+MIN_MUESTRAS = 200
+
+
+class Asentamiento:
+    """Mide un valor estable: espera a que la señal se asiente y acumula hasta
+    que el intervalo de confianza de la media es menor que ``umbral``.
+
+    ``extend(valores, t)`` devuelve el estado:
+
+        "asentando"  la media de la ventana corta aún cambia más de
+                     ``tolerancia`` (más su propio ruido) entre ventanas
+        "midiendo"   acumulando; si la ventana corta se separa de la media
+                     acumulada (la carga se ha movido) vuelve a "asentando"
+        "listo"      ``z * error_estandar <= umbral`` con ``min_muestras``;
+                     el resultado queda en ``punto``
+        "agotado"    han pasado ``max_s`` segundos sin llegar a "listo"
+
+    El error estándar supone muestras independientes; con ruido correlacionado
+    el intervalo real es más ancho.
+    """
+
+    def __init__(self, umbral, tolerancia, ventana_s=ASENTAR_S, max_s=60.0,
+                 z=Z_95, min_muestras=MIN_MUESTRAS, capacidad=CAPACIDAD):
+        self.umbral       = umbral
+        self.tolerancia   = tolerancia
+        self.ventana_s    = ventana_s
+        self.max_s        = max_s
+        self.z            = z
+        self.min_muestras = min_muestras
+        self.corta        = VentanaEstadistica(segundos=ventana_s, capacidad=capacidad)
+        self.punto        = VentanaEstadistica(muestras=capacidad)
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.corta.clear()
+        self.punto.clear()
+        self.estado      = "asentando"
+        self.t_inicio    = None
+        self.t_asentado  = None
+        self._referencia = None      # (t, media) de la ventana corta anterior
+
+    @property
+    def semiancho(self):
+        """Semiancho del intervalo de confianza de la media acumulada."""
+        return self.z * self.punto.error_estandar
+
+    def _distintas(self, media_a, error_a, media_b, error_b):
+        """¿Difieren dos medias más que la tolerancia más su ruido conjunto?"""
+        ruido = math.hypot(error_a, error_b)
+        return abs(media_a - media_b) > self.tolerancia + self.z * ruido
+
+    def extend(self, valores, t):
+        if self.estado in ("listo", "agotado"):
+            return self.estado
+        t = np.asarray(t, dtype=np.float64)
+        if len(t) == 0:
+            return self.estado
+        if self.t_inicio is None:
+            self.t_inicio = float(t[0])
+        self.corta.extend(valores, t)
+
+        corta = (self.corta.media, self.corta.error_estandar)
+        t_fin = float(t[-1])
+        if self.estado == "asentando":
+            if self._referencia is None:
+                if self.corta.duracion >= 0.9 * self.ventana_s:
+                    self._referencia = (t_fin, *corta)
+            elif t_fin - self._referencia[0] >= self.ventana_s:
+                if not self._distintas(*self._referencia[1:], *corta):
+                    # Quieta: la medida empieza con la ventana corta ya vista
+                    self.estado     = "midiendo"
+                    self.t_asentado = t_fin
+                    self.punto.extend(self.corta.valores())
+                else:
+                    self._referencia = (t_fin, *corta)
+        else:
+            if self._distintas(*corta, self.punto.media, self.punto.error_estandar):
+                self.punto.clear()
+                self.estado      = "asentando"
+                self._referencia = None
+            else:
+                self.punto.extend(valores)
+
+        if (self.estado == "midiendo" and self.punto.n >= self.min_muestras
+                and self.semiancho <= self.umbral):
+            self.estado = "listo"
+        elif t_fin - self.t_inicio > self.max_s:
+            self.estado = "agotado"
+        return self.estado
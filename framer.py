@@ -0,0 +1,185 @@
+class Framer:
+    """Entramador por bloques: lee todo lo disponible y devuelve las tramas completas.
+
+    Sustituye a la búsqueda byte a byte con ``ser.read(1)``. Los bytes recibidos se
+    acumulan en un ``bytearray`` reutilizable y la cabecera se localiza con
+    ``bytearray.find``, así que en régimen estacionario hay una sola llamada al
+    sistema por lectura sea cual sea el número de paquetes que contenga.
+    """
+
+    # Tope por lectura: acota el tamaño de cada bloque (y su latencia) cuando el
+    # driver acumula mucho, p. ej. tras una pausa de la GUI o en un replay @max
+    MAX_LECTURA = 1 << 16
+
+    def __init__(self, cabecera, tam_payload, esquema=None):
+        self.cabecera    = bytes(cabecera)
+        self.tam_payload = tam_payload
+        self.tam_trama   = len(self.cabecera) + tam_payload
+        self.esquema     = esquema
+        self._buf        = bytearray()
+
+        # Contadores de diagnóstico
+        self.tramas          = 0
+        self.resyncs         = 0
+        self.descartados     = 0     # bytes
+        self.fallos_longitud = 0     # candidatas descartadas porque otra cabecera dentro de ellas encaja
+        self.seguidas_basura = 0     # tramas aceptadas con basura detrás en vez de otra cabecera
+
+    @classmethod
+    def desde_esquema(cls, esquema):
+        """Framer para un formato de ``esquemas.ESQUEMAS``."""
+        return cls(esquema.cabecera, esquema.tam_payload, esquema)
+
+    def reset(self):
+        self._buf.clear()
+        self.tramas          = 0
+        self.resyncs         = 0
+        self.descartados     = 0
+        self.fallos_longitud = 0
+        self.seguidas_basura = 0
+
+    def pendientes(self):
+        """Bytes en el buffer que todavía no forman una trama completa."""
+        return len(self._buf)
+
+    def _escanear(self, data):
+        """Añade ``data`` al buffer; devuelve (offsets de cada payload, bytes consumidos)."""
+        buf = self._buf
+        buf += data
+
+        cab       = self.cabecera
+        n_cab     = len(cab)
+        tam_trama = self.tam_trama
+        fin       = len(buf)
+        pos       = 0
+        offsets   = []
+
+        while True:
+            i = buf.find(cab, pos)
+            if i < 0:
+                # Conserva la cola por si contiene una cabecera partida
+                corte = max(pos, fin - n_cab + 1)
+                self.descartados += corte - pos
+                pos = corte
+                break
+            if i != pos:
+                self.descartados += i - pos
+                self.resyncs     += 1
+            if i + tam_trama > fin:
+                pos = i
+                break
+
+            # Si ya tenemos la siguiente cabecera, la usamos para validar la trama.
+            # Si detrás hay basura, la trama sólo se descarta cuando una cabecera
+            # dentro de ella empieza otra trama que sí va seguida de cabecera (la
+            # de ``i`` era falsa); si no, la trama vale y la basura se salta luego.
+            sig = i + tam_trama
+            if sig + n_cab <= fin and buf[sig:sig + n_cab] != cab:
+                encaja = self._encaja_dentro(i, sig, fin)
+                if encaja is None:
+                    # Aún no ha llegado lo que hace falta para decidir
+                    pos = i
+                    break
+                if encaja:
+                    self.descartados     += 1
+                    self.resyncs         += 1
+                    self.fallos_longitud += 1
+                    pos = i + 1
+                    continue
+                self.seguidas_basura += 1
+
+            offsets.append(i + n_cab)
+            pos = sig
+
+        self.tramas += len(offsets)
+        return offsets, pos
+
+    def _encaja_dentro(self, i, sig, fin):
+        """¿Alguna cabecera entre ``i`` y ``sig`` va seguida de otra a una trama de distancia?
+
+        ``None`` si alguna de ellas acaba más allá de lo recibido y no se puede saber.
+        """
+        buf, cab = self._buf, self.cabecera
+        falta = False
+        j = buf.find(cab, i + 1, sig + len(cab) - 1)
+        while j >= 0:
+            k = j + self.tam_trama
+            if k + len(cab) > fin:
+                falta = True
+            elif buf[k:k + len(cab)] == cab:
+                return True
+            j = buf.find(cab, j + 1, sig + len(cab) - 1)
+        return None if falta else False
+
+    def feed(self, data):
+        """Añade ``data`` al buffer y devuelve la lista de payloads completos."""
+        offsets, pos = self._escanear(data)
+        buf = self._buf
+        n   = self.tam_payload
+        payloads = [bytes(buf[o:o + n]) for o in offsets]
+        del buf[:pos]
+        return payloads
+
+    def feed_bloque(self, data):
+        """Como ``feed`` pero con los payloads en un solo array ``uint8`` (N, tam_payload).
+
+        El array se reúne en una sola copia desde el buffer interno (una vista
+        con salto de ``tam_trama`` si las tramas van seguidas), sin un ``bytes``
+        por payload ni ``join``; sirve tal cual como buffer de ``np.frombuffer``
+        o ``decodificar_lote``.
+        """
+        import numpy as np
+
+        offsets, pos = self._escanear(data)
+        buf = self._buf
+        n   = self.tam_payload
+        if offsets:
+            vista = np.frombuffer(buf, dtype=np.uint8)
+            o0, k = offsets[0], len(offsets)
+            if offsets[-1] - o0 == (k - 1) * self.tam_trama:
+                inicio = o0 - len(self.cabecera)
+                tramas = vista[inicio:inicio + k * self.tam_trama].reshape(k, self.tam_trama)
+                # Copia siempre: con una sola trama la vista ya sería contigua
+                bloque = tramas[:, len(self.cabecera):].copy()
+                del tramas
+            else:
+                bloque = vista[np.asarray(offsets)[:, None] + np.arange(n)]
+            # El bytearray no se puede recortar mientras haya vistas sobre él
+            del vista
+        else:
+            bloque = np.empty((0, n), dtype=np.uint8)
+        del buf[:pos]
+        return bloque
+
+    def feed_decodificado(self, data):
+        """Como ``feed`` pero decodifica con el esquema directamente sobre el buffer.
+
+        Cada payload se lee con ``struct.unpack_from`` en su offset, sin trocear
+        el buffer en objetos ``bytes`` intermedios.
+        """
+        offsets, pos = self._escanear(data)
+        buf = self._buf
+        dec = self.esquema.decodificar
+        valores = [dec(buf, o) for o in offsets]
+        del buf[:pos]
+        return valores
+
+    def leer_bruto(self, ser):
+        """Bytes sin entramar de una lectura (p. ej. desde un ejecutor de asyncio)."""
+        n = ser.in_waiting
+        # Sin nada pendiente se pide una trama completa: bloquea hasta que llegue
+        # o venza el timeout, sin girar en vacío.
+        return ser.read(min(n, self.MAX_LECTURA) if n else self.tam_trama)
+
+    def leer(self, ser):
+        """Lee lo que haya en ``ser.in_waiting`` (o espera hasta el timeout) y entrama.
+
+        Propaga ``serial.SerialException``/``OSError`` igual que ``ser.read``.
+        """
+        data = self.leer_bruto(ser)
+        return self.feed(data) if data else []
+
+    def leer_decodificado(self, ser):
+        """``leer`` + ``feed_decodificado``."""
+        data = self.leer_bruto(ser)
+        return self.feed_decodificado(data) if data else []
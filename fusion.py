@@ -0,0 +1,208 @@
+"""Varios dispositivos a la vez, mezclados en un único registro ordenado por tiempo.
+
+Cada dispositivo tiene su ``Motor`` (esquema, entramado, reloj y secuencia
+propios) y todos comparten un ``Bucle`` (adquisicion.py): un solo hilo atiende
+todos los puertos con ``add_reader``, sin un hilo lector por puerto compitiendo
+por el GIL. Como cada ``RelojDispositivo`` lleva su ``timestamp_ms`` a la
+escala de ``perf_counter`` del host, los tiempos de dispositivos distintos son
+comparables y basta con ordenarlos.
+
+``Fusion`` retiene los bloques hasta que ningún dispositivo puede entregar ya
+muestras anteriores (marca de agua: el mínimo del último tiempo de cada uno,
+o ``perf_counter() - retardo`` si alguno se calla) y los entrega mezclados como
+filas de una tabla ancha. No entrega nada hasta que todos han mandado su primer
+bloque (o pasa ``ESPERA_INICIAL``), y una muestra que aun así llega por detrás
+de lo ya escrito se descarta y se cuenta en ``tardias``: ``Tiempo_s`` nunca
+retrocede (la muestra sigue en la ``.cap`` de su dispositivo):
+
+    Tiempo_s, Dispositivo, Timestamp_ms, <disp>.<campo>...
+
+en la que cada fila sólo rellena las columnas de su dispositivo (el resto NaN).
+"""
+import threading
+import time
+
+import numpy as np
+
+
+RETARDO        = 0.25    # s que se espera como mucho a un dispositivo callado
+ESPERA_INICIAL = 5.0     # s que se espera el primer bloque de todos antes de entregar
+CAPACIDAD      = 50_000  # paquetes por dispositivo en la cola de la suscripción
+FIJAS     = ["Tiempo_s", "Dispositivo", "Timestamp_ms"]
+
+
+def columnas(esquema, dtype):
+    """``(nombre, campo, índice, divisor)`` de cada valor de un bloque de ``dtype``.
+
+    Los campos enteros con divisor en el esquema se escalan; los que ya vienen
+    decodificados (float, p. ej. ``decodificar_lote``) se dejan como están.
+    """
+    cols = []
+    for campo in dtype.names:
+        if campo == "timestamp_ms":
+            continue
+        tipo = dtype.fields[campo][0]
+        base = tipo.base if tipo.subdtype is not None else tipo
+        try:
+            divisor = esquema.divisor(campo) if base.kind in "iu" else 1
+        except KeyError:
+            divisor = 1
+        if tipo.subdtype is None:
+            cols.append((campo, campo, None, divisor))
+        else:
+            n = int(np.prod(tipo.shape))
+            cols.extend((f"{campo}[{k}]", campo, k, divisor) for k in range(n))
+    return cols
+
+
+class _Dispositivo:
+    def __init__(self, indice, nombre, motor, inicio):
+        self.indice     = indice
+        self.nombre     = nombre
+        self.motor      = motor
+        self.inicio     = inicio          # primera columna propia en la tabla
+        self.columnas   = columnas(motor.esquema, motor.decodificar(b"").dtype)
+        self.pendientes = []              # tablas aún por debajo de la marca
+        self.ultimo     = None            # último tiempo recibido (s, perf_counter)
+        self.activo     = True
+
+
+class Fusion:
+    """Mezcla por tiempo los bloques de varios motores.
+
+    ``motores`` es un diccionario nombre → ``Motor``; ``funcion(filas)`` recibe
+    cada tanda ya ordenada como array 2-D de ``len(self.columnas)`` columnas
+    y ``al_error(nombre, mensaje)``, si se da, el error de lectura de un
+    dispositivo (que deja de contar para la marca de agua). ``al_fin(nombre)``
+    avisa igual cuando un dispositivo termina sin error (fin de un ``replay:``).
+    """
+
+    def __init__(self, motores, funcion, al_error=None, al_fin=None, retardo=RETARDO,
+                 capacidad=CAPACIDAD):
+        self.funcion    = funcion
+        self.al_error   = al_error
+        self.al_fin     = al_fin
+        self.retardo    = retardo
+        self.t0         = None        # tiempo de la primera fila entregada
+        self.filas      = 0
+        self.tardias    = 0           # filas descartadas por llegar tras otras posteriores
+        self.errores    = {}
+        self.terminados = set()       # dispositivos cuya fuente se agotó
+        self.colas      = {}
+
+        self.columnas      = list(FIJAS)
+        self._dispositivos = []
+        for i, (nombre, motor) in enumerate(motores.items()):
+            d = _Dispositivo(i, nombre, motor, len(self.columnas))
+            self.columnas += [f"{nombre}.{c[0]}" for c in d.columnas]
+            self._dispositivos.append(d)
+            self.colas[nombre] = motor.suscribir(
+                capacidad, funcion=lambda bloque, d=d: self._recibir(d, bloque))
+
+        self._ultimo_t = -np.inf
+        self._inicio   = None         # perf_counter del primer bloque recibido
+        # Con un Bucle compartido todo llega por el mismo hilo; con motores
+        # independientes, no
+        self._lock = threading.Lock()
+
+    def cabecera(self):
+        """Cabecera CSV: leyenda de dispositivos en comentario y nombres de columna."""
+        leyenda = " ".join(f"{d.indice}={d.nombre}({d.motor.puerto})"
+                           for d in self._dispositivos)
+        return f"# dispositivos: {leyenda}\n" + ",".join(self.columnas) + "\n"
+
+    def formato(self):
+        """Formato de fila para ``RegistroCSV``."""
+        return "%.6f,%d,%d" + ",%.6g" * (len(self.columnas) - len(FIJAS)) + "\n"
+
+    def cerrar(self):
+        """Entrega todo lo retenido; llamar con los motores ya detenidos."""
+        with self._lock:
+            self._mezclar(final=True)
+
+    # ---------- bucle de los motores ----------
+    def _recibir(self, d, bloque):
+        with self._lock:
+            if bloque["tipo"] == "error":
+                d.activo = False
+                self.errores[d.nombre] = bloque["mensaje"]
+                if self.al_error is not None:
+                    self.al_error(d.nombre, bloque["mensaje"])
+                self._mezclar()
+                return
+            if bloque["tipo"] == "fin":
+                d.activo = False
+                self.terminados.add(d.nombre)
+                self._mezclar()
+                if self.al_fin is not None:
+                    self.al_fin(d.nombre)
+                return
+            datos = bloque["datos"]
+            if len(datos) == 0:
+                return
+            d.pendientes.append(self._tabla(d, datos, bloque["t"]))
+            d.ultimo = bloque["t"][-1]
+            if self._inicio is None:
+                self._inicio = time.perf_counter()
+            self._mezclar()
+
+    def _tabla(self, d, datos, t):
+        tabla = np.full((len(datos), len(self.columnas)), np.nan)
+        tabla[:, 0] = t
+        tabla[:, 1] = d.indice
+        tabla[:, 2] = datos["timestamp_ms"]
+        for j, (_, campo, k, divisor) in enumerate(d.columnas, d.inicio):
+            valores = datos[campo] if k is None else datos[campo][:, k]
+            tabla[:, j] = valores
+            if divisor != 1:
+                tabla[:, j] /= divisor
+        return tabla
+
+    def _marca(self):
+        """Tiempo hasta el que ya no pueden llegar muestras anteriores."""
+        ahora   = time.perf_counter()
+        ultimos = [d.ultimo for d in self._dispositivos if d.activo]
+        if None in ultimos:
+            # Alguno aún no ha entregado nada: sus primeras muestras pueden ser
+            # anteriores a todo lo recibido, así que se espera (con límite)
+            if self._inicio is None or ahora - self._inicio < ESPERA_INICIAL:
+                return -np.inf
+            ultimos = [u for u in ultimos if u is not None]
+        marca = min(ultimos) if ultimos else -np.inf
+        return max(marca, ahora - self.retardo)
+
+    def _mezclar(self, final=False):
+        marca  = np.inf if final else self._marca()
+        listas = []
+        for d in self._dispositivos:
+            if not d.pendientes:
+                continue
+            tabla = d.pendientes[0] if len(d.pendientes) == 1 else np.concatenate(d.pendientes)
+            listos = tabla[:, 0] <= marca
+            if listos.all():
+                d.pendientes = []
+                listas.append(tabla)
+            elif listos.any():
+                d.pendientes = [tabla[~listos]]
+                listas.append(tabla[listos])
+            else:
+                d.pendientes = [tabla]
+        if not listas:
+            return
+
+        filas = np.concatenate(listas) if len(listas) > 1 else listas[0]
+        filas = filas[np.argsort(filas[:, 0], kind="stable")]
+        # Una muestra que llega con más retraso que ``retardo`` quedaría detrás
+        # de filas ya escritas: se descarta en vez de desordenar el registro
+        tardias = filas[:, 0] < self._ultimo_t
+        if tardias.any():
+            self.tardias += int(np.count_nonzero(tardias))
+            filas = filas[~tardias]
+            if len(filas) == 0:
+                return
+        self._ultimo_t = filas[-1, 0]
+        if self.t0 is None:
+            self.t0 = filas[0, 0]
+        filas[:, 0] -= self.t0
+        self.filas += len(filas)
+        self.funcion(filas)
@@ -0,0 +1,191 @@
+import threading
+
+import numpy as np
+
+from diezmado import Diezmador
+
+
+# ---------- CARGA DIFERIDA DE MATPLOTLIB ----------
+# Las GUIs no importan matplotlib al arrancar: la ventana se dibuja primero y la
+# figura se crea al conectar. ``precargar`` adelanta las importaciones en un hilo
+# mientras se abre el puerto (el Teensy tarda ~2 s en reiniciarse), así que
+# ``crear_figura`` en el hilo de Tk ya no paga la importación.
+_MODULOS_MPL = ("matplotlib.figure", "matplotlib.backends.backend_tkagg")
+
+
+def _importar_matplotlib():
+    import importlib
+    for nombre in _MODULOS_MPL:
+        importlib.import_module(nombre)
+
+
+def precargar():
+    """Importa matplotlib en segundo plano (no toca Tk)."""
+    threading.Thread(target=_importar_matplotlib, daemon=True).start()
+
+
+def crear_figura(master, filas=1, figsize=(6, 5), facecolor="#15141B"):
+    """``Figure`` + ``FigureCanvasTkAgg`` empaquetado en ``master``, sin pyplot.
+
+    Devuelve ``(fig, ejes, canvas)``; ``ejes`` es un solo eje si ``filas == 1``.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    fig = Figure(figsize=figsize)
+    fig.patch.set_facecolor(facecolor)
+    ejes = fig.subplots(filas, 1)
+    canvas = FigureCanvasTkAgg(fig, master=master)
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    return fig, ejes, canvas
+# ---------------------------------------------------
+
+
+class GraficaBlit:
+    """Refresco incremental de líneas con blitting.
+
+    Los ejes, etiquetas, rejillas y leyendas se dibujan una sola vez; el fondo
+    resultante se guarda con ``copy_from_bbox`` en cada ``draw_event`` y en cada
+    refresco sólo se restaura ese fondo y se pintan las líneas (``animated=True``).
+    Sólo se redibuja la figura completa cuando los datos salen de los límites
+    actuales de algún eje.
+
+    Con ``refrescar_cada(ax, n)`` las líneas de ``ax`` sólo se repintan uno de
+    cada ``n`` refrescos; entonces cada eje guarda su propio fondo y se
+    restaura y se vuelca sólo el rectángulo de los ejes que tocan.
+    """
+
+    def __init__(self, canvas, margen=0.1, adelanto=0.2):
+        self.canvas    = canvas
+        self.fig       = canvas.figure
+        self.margen    = margen      # holgura vertical al reescalar
+        self.adelanto  = adelanto    # fracción del eje X que se deja libre por delante
+        self._lineas   = []
+        self._extras   = []
+        self._diezmado = {}
+        self._cada     = {}          # eje -> repintar uno de cada n refrescos
+        self._fondo    = None
+        self._fondos   = {}
+        self._tick     = 0
+        self._forzar   = True
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def agregar_linea(self, ax, *args, diezmado=None, puntos_px=1.0, **kwargs):
+        """Crea una línea vacía en ``ax`` gestionada por el blitter.
+
+        ``diezmado`` ("minmax", "lttb" o None) reduce los datos a ``puntos_px``
+        puntos por píxel de ancho del eje antes de ``set_data``, reutilizando
+        entre refrescos lo ya diezmado (ver diezmado.Diezmador). El coste de
+        pintar una línea crece con sus puntos: a las señales lentas les basta
+        con menos de uno por píxel.
+        """
+        linea, = ax.plot([], [], *args, animated=True, **kwargs)
+        self._lineas.append(linea)
+        if diezmado is not None:
+            self._diezmado[linea] = (Diezmador(diezmado), puntos_px)
+        return linea
+
+    def agregar_artista(self, artista):
+        """Artista adicional (p. ej. una leyenda con texto variable) que se repinta
+        en cada refresco sin redibujar la figura."""
+        artista.set_animated(True)
+        self._extras.append(artista)
+        return artista
+
+    def refrescar_cada(self, ax, n):
+        """Repinta las líneas de ``ax`` sólo uno de cada ``n`` refrescos (señales lentas)."""
+        self._cada[ax] = max(int(n), 1)
+
+    def reset(self):
+        """Obliga a reescalar en el próximo refresco (p. ej. tras borrar el historial)."""
+        self._forzar = True
+        for diezmador, _ in self._diezmado.values():
+            diezmador.reset()
+
+    def _on_draw(self, event):
+        self._fondo = self.canvas.copy_from_bbox(self.fig.bbox)
+        if self._cada:
+            self._fondos = {linea.axes: self.canvas.copy_from_bbox(linea.axes.bbox)
+                            for linea in self._lineas}
+        self._dibujar_lineas()
+
+    def _dibujar_lineas(self, ax=None):
+        """Pinta las líneas y artistas extra (sólo los de ``ax`` si se da)."""
+        for linea in self._lineas:
+            if ax is None or linea.axes is ax:
+                linea.axes.draw_artist(linea)
+        for artista in self._extras:
+            if ax is None or artista.axes is ax:
+                self.fig.draw_artist(artista)
+
+    def actualizar(self, datos):
+        """``datos``: iterable de ``(linea, x, y)``. Refresca sólo lo necesario."""
+        extremos = {}
+        tocan    = set()
+        self._tick += 1
+        for linea, x, y in datos:
+            ax = linea.axes
+            if self._tick % self._cada.get(ax, 1):
+                continue
+            tocan.add(ax)
+            diezmar = self._diezmado.get(linea)
+            if diezmar is not None:
+                diezmador, puntos_px = diezmar
+                x, y = diezmador(x, y, max(int(ax.bbox.width * puntos_px), 1))
+            linea.set_data(x, y)
+            if len(x) == 0:
+                continue
+            ext = (x[0], x[-1], np.nanmin(y), np.nanmax(y))
+            if ax in extremos:
+                e = extremos[ax]
+                ext = (min(e[0], ext[0]), max(e[1], ext[1]),
+                       min(e[2], ext[2]), max(e[3], ext[3]))
+            extremos[ax] = ext
+
+        forzar    = self._forzar
+        reescalar = forzar or self._fondo is None
+        for ax, ext in extremos.items():
+            if reescalar or self._fuera_de_limites(ax, *ext):
+                self._ajustar_limites(ax, *ext, conservar_y=not forzar)
+                reescalar = True
+
+        if reescalar:
+            self._forzar = False
+            self.canvas.draw_idle()         # el draw_event vuelve a capturar el fondo
+            return
+
+        if not self._cada:
+            self.canvas.restore_region(self._fondo)
+            self._dibujar_lineas()
+            self.canvas.blit(self.fig.bbox)
+            return
+        if any(ax not in self._fondos for ax in tocan):
+            self.canvas.draw_idle()         # eje sin fondo propio todavía
+            return
+        for ax in tocan:
+            self.canvas.restore_region(self._fondos[ax])
+            self._dibujar_lineas(ax)
+            self.canvas.blit(ax.bbox)
+
+    def _fuera_de_limites(self, ax, x0, x1, y0, y1):
+        vx0, vx1 = ax.get_xlim()
+        vy0, vy1 = ax.get_ylim()
+        # También se reescala si la ventana deslizante ha dejado vacío el tramo izquierdo
+        holgura = (vx1 - vx0) * self.adelanto
+        return (x0 < vx0 or x1 > vx1 or x0 > vx0 + holgura
+                or y0 < vy0 or y1 > vy1)
+
+    def _ajustar_limites(self, ax, x0, x1, y0, y1, conservar_y=True):
+        ancho = max(x1 - x0, 1e-3)
+        ax.set_xlim(x0, x1 + ancho * self.adelanto)
+
+        # El eje Y sólo crece mientras dura la medición; así una señal que oscila
+        # dentro de la ventana no provoca un redibujado completo en cada pico.
+        if conservar_y:
+            vy0, vy1 = ax.get_ylim()
+            if vy0 <= y0 and y1 <= vy1:
+                return
+            y0, y1 = min(y0, vy0), max(y1, vy1)
+        alto = y1 - y0
+        pad  = alto * self.margen if alto > 0 else max(abs(y0) * self.margen, 1.0)
+        ax.set_ylim(y0 - pad, y1 + pad)
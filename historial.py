@@ -0,0 +1,89 @@
+import numpy as np
+
+
+# ---------- CANALES ----------
+CANALES_INTERFAZ = ("t", "thrust", "presion",
+                    "tp1", "tp2", "tp3", "tp4", "tp5", "tp6", "tp7", "tp8",
+                    "raw")
+CANALES_CELDA    = ("t", "thrust")
+# -----------------------------
+
+
+class Historial:
+    """Buffer circular columnar de capacidad fija para las gráficas.
+
+    Sustituye a un ``deque(maxlen=...)`` por canal. Cada muestra se escribe dos
+    veces, en ``i`` y en ``i + capacidad``, de modo que las últimas N muestras
+    siempre están contiguas y ``ultimos``/``canal`` devuelven vistas sin copiar.
+    """
+
+    def __init__(self, capacidad, canales=CANALES_INTERFAZ, dtype=np.float64):
+        self.capacidad = int(capacidad)
+        self.canales   = tuple(canales)
+        self._indice   = {c: k for k, c in enumerate(self.canales)}
+        self._datos    = np.zeros((len(self.canales), 2 * self.capacidad), dtype=dtype)
+        self._pos      = 0      # próxima posición de escritura, en [0, capacidad)
+        self._n        = 0
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        self._pos = 0
+        self._n   = 0
+
+    def append(self, fila):
+        """Añade una muestra: una secuencia con un valor por canal. O(1)."""
+        i   = self._pos
+        cap = self.capacidad
+        self._datos[:, i]       = fila
+        self._datos[:, i + cap] = fila
+        self._pos = i + 1 if i + 1 < cap else 0
+        if self._n < cap:
+            self._n += 1
+
+    def extend(self, bloque):
+        """Añade un bloque de muestras, array de forma (n, n_canales)."""
+        bloque = np.asarray(bloque)
+        n   = len(bloque)
+        cap = self.capacidad
+        if n == 0:
+            return
+        if n > cap:
+            bloque = bloque[-cap:]
+            n = cap
+
+        cols = bloque.T
+        i    = self._pos
+        fin  = i + n
+        if fin <= cap:
+            self._datos[:, i:fin]             = cols
+            self._datos[:, i + cap:fin + cap] = cols
+        else:
+            # El bloque da la vuelta: [i, cap) y [0, resto)
+            k     = cap - i
+            resto = n - k
+            self._datos[:, i:cap]           = cols[:, :k]
+            self._datos[:, i + cap:]        = cols[:, :k]
+            self._datos[:, :resto]          = cols[:, k:]
+            self._datos[:, cap:cap + resto] = cols[:, k:]
+        self._pos = fin % cap
+        self._n   = min(cap, self._n + n)
+
+    def ultimos(self, n=None):
+        """Vista (n_canales, n) de las últimas ``n`` muestras en orden, sin copia."""
+        if n is None or n > self._n:
+            n = self._n
+        fin = self._pos + self.capacidad
+        return self._datos[:, fin - n:fin]
+
+    def canal(self, nombre, n=None):
+        """Vista 1-D de las últimas ``n`` muestras de un canal, sin copia."""
+        return self.ultimos(n)[self._indice[nombre]]
+
+    def canales_vista(self, nombres, n=None):
+        """Vista de varios canales consecutivos (p. ej. los 8 termopares)."""
+        k = [self._indice[c] for c in nombres]
+        if k != list(range(k[0], k[0] + len(k))):
+            raise ValueError("los canales deben ser consecutivos")
+        return self.ultimos(n)[k[0]:k[-1] + 1]
@@ -1,117 +1,133 @@
-import serial
-import serial.tools.list_ports
 import time
-import threading
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from collections import deque
-from queue import Queue, Empty
-import struct
+import numpy as np
 import sys
 
+from adquisicion import Motor
+from calibracion import cargar as cargar_calibracion
+from captura import ruta_captura
+from decodificador import decodificar_lote
+from esquemas import INTERFAZ
+from estadistica import VentanaEstadistica
+from graficas import GraficaBlit, crear_figura, precargar
+from historial import CANALES_INTERFAZ, Historial
+from registro import RegistroCSV
+from puertos import VigilantePuertos
+from replay import puertos_replay
+from telemetria import Telemetria
+
 
 # ---------- CONFIGURACIÓN ----------
-TIMEOUT = 1
+COMANDO_VALOR     = b'\x01'
 COMANDO_DATOS     = b'\x02'
 COMANDO_STOP      = b'\x03'
 COMANDO_IGNICION  = b'\x04'
-MAX_PUNTOS        = 1000
+MAX_PUNTOS        = 300_000   # ensayo completo: 5 min a 1 kHz (se diezma al graficar)
+GRAPH_INTERVAL    = 50      # ms entre refrescos de gráfica (~20 FPS)
+REFRESCO_TP       = 4       # los termopares se repintan uno de cada 4 refrescos (~5 FPS)
+CAPACIDAD_COLA    = 20_000  # paquetes entre el motor y la GUI (~20 s a 1 kHz)
+POLITICA_COLA     = "antiguos"   # al llenarse: "antiguos", "nuevos" o "diezmar"
+VENTANA_TP_S      = 1.0     # s de promedio de la temperatura media en la etiqueta
 # ----------------------------------
 
-# ---------- PRESIÓN: constantes precalculadas ----------
-# Original pipeline:
-#   v   = (raw / 4095) * 3.3
-#   i   = v / 150
-#   psi = (i - 0.004) * 312500
-#   bar = psi * 0.0689476 + 1.01325
-#
-# Desarrollado:
-#   bar = raw * (3.3 / 4095 / 150 * 312500 * 0.0689476)
-#              + (-0.004 * 312500 * 0.0689476 + 1.01325)
-#
-_BAR_K      = (3.3 / 4095) / 150 * 312500 * 0.0689476   # ≈ 1.1065e-4  bar/LSB
-_BAR_OFFSET = -0.004 * 312500 * 0.0689476 + 1.01325      # ≈ -85.1735   bar
-# bar = raw * _BAR_K + _BAR_OFFSET
-# -------------------------------------------------------
-
 # ---------- VARIABLES GLOBALES ----------
-ser               = None
 leyendo           = False
 medicion_activa   = False
 ignition_countdown = False
 archivo_salida    = "datos.txt"
 tiempo_base       = None
 
-contador_paquetes  = 0
-ultimo_calculo_hz  = None
-hz_actual          = 0.0
+# Thrust en N calibrados con la última versión de calibracion.json, si la hay
+calibracion = cargar_calibracion()
 
-data_queue = Queue(maxsize=500)
+# Puerto, entramado, decodificación, reloj del Teensy y análisis de secuencia
+# viven en el motor de adquisición (adquisicion.py); la GUI sólo se suscribe
+motor      = Motor(INTERFAZ, decodificar=lambda buf: decodificar_lote(buf, calibracion=calibracion))
+# Bloques del motor con política de descarte y contadores (telemetria.py)
+data_queue = motor.suscribir(CAPACIDAD_COLA, POLITICA_COLA)
+telemetria = Telemetria(data_queue, framer=motor.framer, secuencia=motor.secuencia)
 
-tiempos      = deque(maxlen=MAX_PUNTOS)
-presiones    = deque(maxlen=MAX_PUNTOS)
-ns           = deque(maxlen=MAX_PUNTOS)
-temperaturas = deque(maxlen=MAX_PUNTOS)
+# t, thrust, presión, Tp1..Tp8, ADC crudo (ver historial.CANALES_INTERFAZ)
+historial = Historial(MAX_PUNTOS, CANALES_INTERFAZ, dtype=np.float32)
+# Temperatura media de los termopares en el último VENTANA_TP_S (estadistica.py)
+ventana_tp = VentanaEstadistica(segundos=VENTANA_TP_S)
 # ----------------------------------------
 
 
 # ---------- CONEXIÓN ----------
 def conectar():
-    global ser, leyendo, archivo_salida
+    global archivo_salida
 
     puerto = puerto_var.get()
     if puerto == "No hay puertos":
         messagebox.showwarning("Aviso", "No hay puertos disponibles")
         return
 
+    # Sin escaneos de puertos mientras dura la conexión
+    vigilante.pausar()
     archivo_salida = archivo_var.get().strip() or "datos.txt"
 
     try:
-        ser = serial.Serial(puerto, int(baudrate_var.get()), timeout=TIMEOUT)
-        time.sleep(2)
-
-        leyendo = True
+        # Tramas crudas tal cual llegan, con su instante de recepción (captura.py).
+        # La apertura y la espera al reinicio del Teensy van en el hilo del motor
+        futuro = motor.iniciar(puerto, int(baudrate_var.get()),
+                               captura=ruta_captura(archivo_salida))
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+        return
 
-        while not data_queue.empty():
-            try:
-                data_queue.get_nowait()
-            except Empty:
-                break
+    # matplotlib se importa mientras tanto, fuera del hilo de Tk
+    precargar()
+    estado_label.config(text="Estado: Conectando...", fg="orange")
+    btn_conectar.config(state="disabled")
+    ventana.after(50, lambda: _esperar_conexion(futuro))
 
-        threading.Thread(target=leer_datos, daemon=True).start()
-        ventana.after(20,   procesar_queue)
-        ventana.after(1000, actualizar_graficas)
 
-        estado_label.config(text="Estado: Conectado", fg="green")
-        btn_conectar.config(state="disabled")
-        btn_desconectar.config(state="normal")
+def _esperar_conexion(futuro):
+    global leyendo
 
+    if not futuro.done():
+        ventana.after(50, lambda: _esperar_conexion(futuro))
+        return
+    try:
+        futuro.result()
     except Exception as e:
+        motor.detener()
+        vigilante.reanudar()
+        estado_label.config(text="Estado: Desconectado", fg="red")
+        btn_conectar.config(state="normal")
         messagebox.showerror("Error", str(e))
+        return
+
+    _crear_graficas()
+    leyendo = True
+
+    ventana.after(20,   procesar_queue)
+    ventana.after(GRAPH_INTERVAL, actualizar_graficas)
 
+    estado_label.config(text="Estado: Conectado", fg="green")
+    btn_desconectar.config(state="normal")
 
-def desconectar():
-    global ser, leyendo, medicion_activa, ignition_countdown
-    global contador_paquetes, ultimo_calculo_hz, hz_actual
+
+def desconectar(estado="Desconectado"):
+    global leyendo, medicion_activa, ignition_countdown
+
+    if leyendo and _registro is not None:
+        # Pie del registro: pérdidas y contrapresión de esta conexión
+        cal = "ninguna" if calibracion is None else f"v{calibracion.version}"
+        _registro.anotar(f"# desconexión {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                         f"# calibracion={cal}\n" + telemetria.pie())
 
     leyendo            = False
     medicion_activa    = False
     ignition_countdown = False
-    contador_paquetes  = 0
-    ultimo_calculo_hz  = None
-    hz_actual          = 0.0
 
-    if ser and ser.is_open:
-        try:
-            ser.close()
-        except:
-            pass
-    ser = None
+    motor.detener()
+    vigilante.reanudar()
 
-    estado_label.config(text="Estado: Desconectado", fg="red")
+    estado_label.config(text=f"Estado: {estado}", fg="red")
     estado_medicion.config(text="Medición: DETENIDA",  fg="red")
     hz_label.config(text="Frecuencia: 0.0 Hz")
     btn_start_stop.config(text="START")
@@ -123,21 +139,20 @@ def desconectar():
 def toggle_medicion():
     global medicion_activa, tiempo_base
 
-    if not ser or not ser.is_open:
+    if not leyendo:
         messagebox.showwarning("Aviso", "Conecta el puerto primero")
         return
 
     medicion_activa = not medicion_activa
 
     if medicion_activa:
-        tiempos.clear()
-        presiones.clear()
-        ns.clear()
-        temperaturas.clear()
+        historial.clear()
+        blit.reset()
+        ventana_tp.clear()
         tiempo_base = None
 
         try:
-            ser.write(COMANDO_DATOS)
+            motor.enviar(COMANDO_DATOS)
             valor_label.config(text="¡COMANDO 0x02 ENVIADO!",
                                font=("Arial", 16, "bold"), fg="green")
         except Exception as e:
@@ -149,22 +164,24 @@ def toggle_medicion():
         btn_start_stop.config(text="STOP")
     else:
         try:
-            ser.write(COMANDO_STOP)
+            motor.enviar(COMANDO_STOP)
             valor_label.config(text="¡COMANDO 0x03 ENVIADO!",
                                font=("Arial", 16, "bold"), fg="orange")
         except Exception as e:
             messagebox.showerror("Error", f"Error al enviar comando STOP: {e}")
+        if _registro is not None:
+            _registro.flush()
         estado_medicion.config(text="Medición: DETENIDA", fg="red")
         btn_start_stop.config(text="START")
 
 
 # ---------- GET VALUE ----------
 def get_value():
-    if not ser or not ser.is_open:
+    if not leyendo:
         messagebox.showwarning("Aviso", "Puerto no conectado")
         return
     try:
-        ser.write(bytes([0x01]))
+        motor.enviar(COMANDO_VALOR)
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
@@ -173,7 +190,7 @@ def get_value():
 def ignitar():
     global ignition_countdown
 
-    if not ser or not ser.is_open:
+    if not leyendo:
         messagebox.showwarning("Aviso", "Puerto no conectado")
         return
     if ignition_countdown:
@@ -204,14 +221,15 @@ def cuenta_regresiva(segundos):
     else:
         ignition_countdown = False
         try:
-            tiempos.clear()
-            presiones.clear()
-            ns.clear()
-            temperaturas.clear()
+            historial.clear()
+            blit.reset()
+            ventana_tp.clear()
             tiempo_base = None
 
-            ser.write(COMANDO_IGNICION)
+            motor.enviar(COMANDO_IGNICION)
             print("Comando 0x04 enviado")
+            if _registro is not None:
+                _registro.flush()
 
             medicion_activa = True
             estado_medicion.config(text="Medición: ACTIVA", fg="green")
@@ -223,15 +241,15 @@ def cuenta_regresiva(segundos):
 
 
 # ---------- PUERTOS ----------
-def obtener_puertos():
-    return [p.device for p in serial.tools.list_ports.comports()]
+# comports() corre en un hilo aparte; aquí sólo se recogen los cambios
+vigilante = VigilantePuertos(puertos_replay(sys.argv[1:]))
 
 
 def refrescar_puertos():
     global puertos_actuales
 
-    nuevos = obtener_puertos()
-    if nuevos != puertos_actuales:
+    nuevos = vigilante.cambios()
+    if nuevos is not None and nuevos != puertos_actuales:
         puertos_actuales = nuevos
         menu = puerto_menu["menu"]
         menu.delete(0, "end")
@@ -245,195 +263,184 @@ def refrescar_puertos():
                              command=lambda: puerto_var.set("No hay puertos"))
             puerto_var.set("No hay puertos")
 
-    ventana.after(1000, refrescar_puertos)
+    ventana.after(250, refrescar_puertos)
 
 
-# ---------- LECTURA SERIAL (hilo) ----------
-# Paquete de 27 bytes:
-#   [0:4]   timestamp_ms  (uint32 LE)
-#   [4:8]   thrust        (int32  LE) / 100.0
-#   [8:24]  temps x8      (int16  LE cada uno) / 100.0   (8 * 2 = 16 bytes)
-#   [24:26] transducer    (uint16 LE)
-# Total payload = 26 bytes  (+ 1 byte cabecera 0x01 = 27 bytes por paquete)
-
-def leer_datos():
-    global contador_paquetes, ultimo_calculo_hz, hz_actual
-
-    while leyendo:
-        try:
-            b = ser.read(1)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"})
-            break
+# ---------- QUEUE DRAIN (main thread) ----------
+_registro       = None
+_aviso_registro = False
 
-        if len(b) != 1 or b != b"\x01":
-            continue
 
-        try:
-            payload = ser.read(26)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"})
-            break
-
-        if len(payload) != 26:
-            continue
-
-        ahora = time.time()
-        if ultimo_calculo_hz is None:
-            ultimo_calculo_hz = ahora
-            contador_paquetes = 0
-        contador_paquetes += 1
-        if ahora - ultimo_calculo_hz >= 1.0:
-            hz_actual = contador_paquetes / (ahora - ultimo_calculo_hz)
-            contador_paquetes = 0
-            ultimo_calculo_hz = ahora
-
-        timestamp_ms   = struct.unpack("<I", payload[0:4])[0]
-        thrust         = struct.unpack("<i", payload[4:8])[0] / 100.0
-
-        # 8 termopares: bytes [8:24]
-        temps          = [struct.unpack("<h", payload[8 + i*2 : 10 + i*2])[0] / 100.0
-                          for i in range(8)]
-
-        transducer_raw = struct.unpack("<H", payload[24:26])[0]
-
-        # Commented out step-by-step calculation — replaced by precalculated constants above
-        # v = (transducer_raw / 4095) * 3.3
-        # i = v / 150
-        # psi = (i - 0.004) * 312500
-        # bar = (psi * 0.0689476) + 1.01325
-        bar = transducer_raw * _BAR_K + _BAR_OFFSET
-
-        paquete = {
-            "tipo":             "datos",
-            "timestamp_ms":     timestamp_ms,
-            "thrust":           thrust,
-            "temps":            temps,
-            "transducer":       bar,
-            "transducer_raw":   transducer_raw,
-            "hz":               hz_actual,
-            "ts":               time.time(),
-        }
+def procesar_queue():
+    global _registro, _aviso_registro
 
-        try:
-            data_queue.put_nowait(paquete)
-        except:
-            pass
+    if not leyendo:
+        return
 
+    if _registro is None:
+        # Formateo, escritura y flush van en el hilo del registro (registro.py).
+        # Se abre una sola vez: reabrirlo en "w" tras un fallo borraría el ensayo
+        _registro = RegistroCSV(archivo_salida).abrir()
+        telemetria.registro = _registro
+
+    # Se vacía la cola entera en cada tick: cada elemento es un bloque de paquetes
+    bloques = data_queue.vaciar()
+    error   = any(b["tipo"] == "error" for b in bloques)
+    fin     = any(b["tipo"] == "fin" for b in bloques)
+    bloques = [b for b in bloques if b["tipo"] == "lote"]
+
+    if bloques:
+        _procesar_bloques(bloques)
+    telemetria_label.config(text=telemetria.texto())
+
+    if _registro.error is not None and not _aviso_registro:
+        # Disco lleno o USB retirado: se deja de registrar, las gráficas siguen
+        _aviso_registro = True
+        messagebox.showerror("Error de registro",
+                             f"No se puede escribir en {archivo_salida}: {_registro.error}\n"
+                             "El registro se ha detenido; lo ya grabado se conserva.")
+
+    if error:
+        ventana.after(0, desconectar)
+        return
+    if fin:
+        ventana.after(0, desconectar, "Reproducción terminada")
+        return
 
-# ---------- QUEUE DRAIN (main thread) ----------
-_archivo = None
+    ventana.after(20, procesar_queue)
 
 
-def procesar_queue():
-    global tiempo_base, medicion_activa, _archivo
+def _procesar_bloques(bloques):
+    global tiempo_base
 
-    if not leyendo:
+    datos = np.concatenate([b["datos"] for b in bloques])
+    if len(datos) == 0:
         return
 
-    if _archivo is None or _archivo.closed:
-        _archivo = open(archivo_salida, 'w')
-        # Cabecera CSV
-        header = "Timestamp_ms,Tiempo_s,Thrust_N"
-        for i in range(1, 9):
-            header += f",Tp{i}_C"
-        header += ",Pressure\n"
-        _archivo.write(header)
-
-    procesados = 0
-    while procesados < 20:
-        try:
-            paquete = data_queue.get_nowait()
-        except Empty:
-            break
+    # Etiquetas: sólo el último paquete es visible
+    ultimo = datos[-1]
+    temps  = ultimo["temps"].tolist()
+    thrust = float(ultimo["thrust"])
+    hz     = bloques[-1]["hz"]
+    for i in range(8):
+        tabla_valores[i].set(f"Tp{i+1}: {temps[i]:.2f}°C")
+    ps_var.set(f"Thrust: {thrust:.2f} N")
+    n_var.set(f"Pressure: {float(ultimo['transducer']):.4f} bar")
+    raw_var.set(f"Raw ADC: {int(ultimo['transducer_raw'])}")
+    timestamp_var.set(f"Timestamp: {int(ultimo['timestamp_ms'])} ms")
+    if hz > 0:
+        hz_label.config(text=f"Frecuencia: {hz:.1f} Hz")
+
+    if not medicion_activa:
+        return
 
-        if paquete["tipo"] == "error":
-            ventana.after(0, desconectar)
-            return
+    t = np.concatenate([b["t"] for b in bloques])
+    if tiempo_base is None:
+        tiempo_base = t[0]
+    tiempo_s = t - tiempo_base
+    ventana_tp.extend(datos["temps"].mean(axis=1), tiempo_s)
 
-        thrust         = paquete["thrust"]
-        temps          = paquete["temps"]
-        transducer     = paquete["transducer"]
-        transducer_raw = paquete["transducer_raw"]
-        timestamp_ms   = paquete["timestamp_ms"]
-        hz             = paquete["hz"]
-
-        for i in range(8):
-            tabla_valores[i].set(f"Tp{i+1}: {temps[i]:.2f}°C")
-        ps_var.set(f"Thrust: {thrust:.2f} N")
-        n_var.set(f"Pressure: {transducer:.4f} bar")
-        raw_var.set(f"Raw ADC: {transducer_raw}")
-        timestamp_var.set(f"Timestamp: {timestamp_ms} ms")
-        if hz > 0:
-            hz_label.config(text=f"Frecuencia: {hz:.1f} Hz")
-
-        if medicion_activa:
-            if tiempo_base is None:
-                tiempo_base = paquete["ts"]
-            tiempo_s    = paquete["ts"] - tiempo_base
-            tp_promedio = sum(temps) / 8.0
-
-            if not ignition_countdown:
-                valor_label.config(
-                    text=f"Thrust: {thrust:.2f} N | T: {tp_promedio:.1f}°C | t: {tiempo_s:.2f}s",
-                    font=("Arial", 12), fg="white"
-                )
-
-            # Línea CSV
-            linea = f"{timestamp_ms},{tiempo_s:.3f},{thrust:.3f}"
-            for temp in temps:
-                linea += f",{temp:.3f}"
-            linea += f",{transducer:.6f}\n"
-            _archivo.write(linea)
-            _archivo.flush()
-
-            tiempos.append(tiempo_s)
-            presiones.append(thrust)
-            ns.append(transducer)
-            temperaturas.append(tp_promedio)
-
-        procesados += 1
+    if not ignition_countdown:
+        tp_promedio = ventana_tp.media
+        valor_label.config(
+            text=f"Thrust: {thrust:.2f} N | T: {tp_promedio:.1f}°C | t: {tiempo_s[-1]:.2f}s",
+            font=("Arial", 12), fg="white"
+        )
 
-    ventana.after(20, procesar_queue)
+    # Filas CSV (registro.FMT_INTERFAZ) y muestras del historial, por columnas
+    try:
+        _registro.escribir(np.column_stack((datos["timestamp_ms"], tiempo_s, datos["thrust"],
+                                            datos["temps"], datos["transducer"])))
+    except OSError:
+        pass                # registro detenido: se avisa una vez en procesar_queue
+    historial.extend(np.column_stack((tiempo_s, datos["thrust"], datos["transducer"],
+                                      datos["temps"], datos["transducer_raw"])))
 
 
 # ---------- GRÁFICAS ----------
-def actualizar_graficas():
-    if not leyendo:
+# La figura se crea al conectar (ver graficas.crear_figura), no al arrancar
+fig           = None
+ax_presion    = None
+ax_n          = None
+ax_temperatura = None
+canvas        = None
+blit          = None
+_graf_init    = False
+_line_thrust  = None
+_line_presion = None
+_lineas_tp    = []
+_COLORES_TP   = ("#C88A53", "#E06C75", "#98C379", "#61AFEF",
+                 "#C678DD", "#56B6C2", "#E5C07B", "#ABB2BF")
+
+
+def _crear_graficas():
+    global fig, ax_presion, ax_n, ax_temperatura, canvas, blit
+
+    if blit is not None:
         return
+    graficas_label.destroy()
+    fig, (ax_presion, ax_n, ax_temperatura), canvas = crear_figura(
+        frame_graficas, filas=3, figsize=(6, 8), facecolor="#5F5A7A")
+    blit = GraficaBlit(canvas)
+
+
+def _init_graficas():
+    """Ejes, rejillas, leyendas y líneas se crean una sola vez (ver graficas.py)."""
+    global _line_thrust, _line_presion, _graf_init
+
+    # Thrust y presión con min/max por píxel para no perder los picos;
+    # los termopares, más suaves, con LTTB, medio punto por píxel y a menos FPS
+    _line_thrust = blit.agregar_linea(ax_presion, color="#C88A53", label="Thrust",
+                                      diezmado="minmax")
+    ax_presion.set_ylabel("Thrust [N]")
+    ax_presion.grid(True)
+    ax_presion.legend(loc="upper left")
+
+    _line_presion = blit.agregar_linea(ax_n, color="#C88A53", label="Pressure",
+                                       diezmado="minmax")
+    ax_n.set_ylabel("Pressure [bar]")
+    ax_n.grid(True)
+    ax_n.legend(loc="upper left")
+
+    for i, color in enumerate(_COLORES_TP):
+        _lineas_tp.append(blit.agregar_linea(ax_temperatura, color=color,
+                                             linewidth=1, label=f"Tp{i+1}",
+                                             diezmado="lttb", puntos_px=0.5))
+    blit.refrescar_cada(ax_temperatura, REFRESCO_TP)
+    ax_temperatura.set_ylabel("Temp [°C]")
+    ax_temperatura.set_xlabel("Tiempo [s]")
+    ax_temperatura.grid(True)
+    ax_temperatura.legend(loc="upper left", ncol=4, fontsize=7)
+
+    fig.tight_layout()
+    _graf_init = True
 
-    if len(tiempos) >= 2:
-        t = list(tiempos)
-        ax_presion.clear()
-        ax_n.clear()
-        ax_temperatura.clear()
 
-        ax_presion.plot(t, list(presiones), color="#C88A53", label="Thrust")
-        ax_presion.set_ylabel("Thrust [N]")
-        ax_presion.grid(True)
-        ax_presion.legend()
+def actualizar_graficas():
+    if not leyendo:
+        return
 
-        ax_n.plot(t, list(ns), color="#C88A53", label="Pressure")
-        ax_n.set_ylabel("Pressure [bar]")
-        ax_n.grid(True)
-        ax_n.legend()
+    if len(historial) >= 2:
+        if not _graf_init:
+            _init_graficas()
 
-        ax_temperatura.plot(t, list(temperaturas), color="#C88A53", label="Temperatura")
-        ax_temperatura.set_ylabel("Temp [°C]")
-        ax_temperatura.set_xlabel("Tiempo [s]")
-        ax_temperatura.grid(True)
-        ax_temperatura.legend()
+        # Vistas sin copia sobre el buffer circular
+        t     = historial.canal("t")
+        temps = historial.canales_vista(CANALES_INTERFAZ[3:11])
 
-        canvas.draw()
+        blit.actualizar([
+            (_line_thrust,  t, historial.canal("thrust")),
+            (_line_presion, t, historial.canal("presion")),
+            *((linea, t, tp) for linea, tp in zip(_lineas_tp, temps)),
+        ])
 
-    ventana.after(1000, actualizar_graficas)
+    ventana.after(GRAPH_INTERVAL, actualizar_graficas)
 
 
 def cerrar():
-    global _archivo
     desconectar()
-    if _archivo and not _archivo.closed:
-        _archivo.close()
+    if _registro is not None:
+        _registro.cerrar()
     ventana.destroy()
     sys.exit()
 
@@ -472,11 +479,10 @@ frame_tabla.pack(side=tk.RIGHT, fill=tk.Y, padx=10, pady=10)
 
 # Controls
 tk.Label(frame_config, text="Puerto COM",        bg="#2C2A36", fg="white").pack(anchor="w", pady=2)
-puerto_var       = tk.StringVar()
-puertos_actuales = obtener_puertos()
-puerto_var.set(puertos_actuales[0] if puertos_actuales else "No hay puertos")
-puerto_menu = tk.OptionMenu(frame_config, puerto_var,
-                            *(puertos_actuales if puertos_actuales else ["No hay puertos"]))
+# La primera búsqueda de puertos se hace con la ventana ya dibujada
+puerto_var       = tk.StringVar(value="No hay puertos")
+puertos_actuales = []
+puerto_menu = tk.OptionMenu(frame_config, puerto_var, "No hay puertos")
 puerto_menu.pack(fill="x")
 
 tk.Label(frame_config, text="Baudrate",          bg="#2C2A36", fg="white").pack(anchor="w", pady=2)
@@ -495,6 +501,9 @@ estado_medicion = tk.Label(frame_config, text="Medición: DETENIDA",   fg="red",
 estado_medicion.pack(pady=5)
 hz_label        = tk.Label(frame_config, text="Frecuencia: 0.0 Hz",   fg="white", bg="#2C2A36")
 hz_label.pack(pady=5)
+telemetria_label = tk.Label(frame_config, text="", fg="#AAAAAA", bg="#2C2A36",
+                            font=("Consolas", 8), justify="left")
+telemetria_label.pack(pady=2)
 valor_label     = tk.Label(frame_config, text="Valor: ---",            fg="white", bg="#2C2A36")
 valor_label.pack(pady=10)
 
@@ -512,11 +521,10 @@ btn_ignitar.pack(pady=8)
 btn_cancel_ign  = ttk.Button(frame_config, text="CANCELAR IGNICIÓN",   width=18, command=cancelar_ignicion,  style="Cancel.TButton")
 btn_cancel_ign.pack(pady=4)
 
-# Plots
-fig, (ax_presion, ax_n, ax_temperatura) = plt.subplots(3, 1, figsize=(6, 8))
-fig.patch.set_facecolor("#5F5A7A")
-canvas = FigureCanvasTkAgg(fig, master=frame_graficas)
-canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+# Plots: sólo un aviso hasta conectar (_crear_graficas)
+graficas_label = tk.Label(frame_graficas, text="Las gráficas aparecen al conectar",
+                          bg="#15141B", fg="#555555", font=("Arial", 12))
+graficas_label.pack(fill=tk.BOTH, expand=True)
 
 # Sensor table — 8 termopares: 4 en col 0, 4 en col 1
 tabla_valores = []
@@ -551,5 +559,6 @@ tk.Label(frame_tabla, textvariable=timestamp_var, width=34, anchor="w",
          ).grid(row=6, column=0, columnspan=2, padx=4, pady=6, sticky="w")
 
 ventana.protocol("WM_DELETE_WINDOW", cerrar)
-ventana.after(1000, refrescar_puertos)
+vigilante.iniciar()
+ventana.after(100, refrescar_puertos)
 ventana.mainloop()
\ No newline at end of file
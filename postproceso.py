@@ -0,0 +1,276 @@
+"""Post-proceso de ensayos en caliente: métricas del motor sobre muchos registros.
+
+Para cada archivo (``datos.txt`` de interfaz.py, CSV ``Time,Pressure_bar`` o
+captura ``.cap``) se calcula:
+
+    ignicion_s         primer instante con la señal de referencia sobre el umbral
+    combustion_s       desde la ignición hasta el último instante sobre el umbral
+    impulso_Ns         impulso total (trapecios sobre el empuje neto)
+    isp_s              impulso específico, I / (m_propulsante * g0), con --masa
+    empuje_max_N       pico de empuje neto; empuje_medio_N = impulso / combustión
+    presion_max_bar    pico y media (ponderada en tiempo) durante la combustión,
+    presion_media_bar  en las unidades del registro; presion_base_bar antes
+    TpN_max_C          pico de cada termopar en todo el ensayo
+
+La referencia es el empuje (la presión si el archivo no lo tiene) menos su
+línea base, la mediana de los primeros ``--base`` segundos; el umbral es la
+fracción ``--umbral`` de su pico, aplicada tras una media móvil de
+``--suavizado`` segundos para que un pico aislado no cuente como ignición. Si
+el pico no sale del ruido de la línea base (``RUIDO_K`` sigmas) no hay ignición.
+
+Los CSV se leen por trozos y sólo las columnas necesarias (registro.LectorCSV,
+float32); las capturas, por trozos sobre ``np.memmap``. Cada archivo va a un proceso del pool.
+
+    python postproceso.py ensayos/*.txt --masa 0.35 --salida resumen.csv
+    python postproceso.py datos_*.cap datos_presion_disparo.csv --procesos 8
+    python postproceso.py e1.txt e2.txt --masa e1.txt=0.35 --masa e2.txt=0.41
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from registro import LectorCSV, cabecera_csv
+
+
+G0          = 9.80665     # m/s²
+UMBRAL      = 0.05        # fracción del pico neto
+BASE_S      = 1.0         # s iniciales para la línea base
+SUAVIZADO_S = 0.01        # s de media móvil para detectar la ignición
+RUIDO_K     = 10          # el pico debe superar RUIDO_K sigmas de la línea base
+FILAS_TROZO = 65_536
+
+# Nombres de columna de los registros conocidos
+_TIEMPO  = ("Tiempo_s", "Time")
+_EMPUJE  = ("Thrust_N",)
+_PRESION = ("Pressure", "Pressure_bar")
+_TP_RE   = re.compile(r"^Tp(\d+)_C$")
+
+_trapecio = getattr(np, "trapezoid", None) or np.trapz
+
+
+# ---------- LECTURA ----------
+def leer_csv(ruta, filas=FILAS_TROZO):
+    """Señales de un CSV de registro: ``{"t", "empuje", "presion", "temps"}``."""
+    _, nombres = cabecera_csv(ruta)
+    tiempo  = next((c for c in _TIEMPO if c in nombres), None)
+    empuje  = next((c for c in _EMPUJE if c in nombres), None)
+    presion = next((c for c in _PRESION if c in nombres), None)
+    if tiempo is None:
+        raise ValueError(f"{ruta}: sin columna de tiempo ({', '.join(_TIEMPO)})")
+    tps = [n for n in nombres if _TP_RE.match(n)]
+
+    # El tiempo en float64: el impulso integra sobre él
+    columnas = [c for c in (tiempo, empuje, presion) if c is not None] + tps
+    datos = LectorCSV(ruta, columnas, filas, dtypes={tiempo: "<f8"}).leer()
+    return {
+        "t":       datos[tiempo],
+        "empuje":  None if empuje is None else datos[empuje],
+        "presion": None if presion is None else datos[presion],
+        "temps":   [(n.replace("_C", ""), datos[n]) for n in tps],
+    }
+
+
+def leer_captura(ruta, filas=FILAS_TROZO):
+    """Señales de una captura ``.cap``, con el tiempo del reloj del dispositivo."""
+    from captura import Captura
+    from decodificador import decodificar_lote
+    from esquemas import INTERFAZ
+    from reloj import RelojDispositivo
+
+    cap     = Captura(ruta)
+    esquema = cap.esquema
+    reloj   = RelojDispositivo()
+    campos  = cap.esquema.dtype.names
+    t, empuje, presion, temps = [], [], [], []
+    for i in range(0, len(cap), filas):
+        r = cap.registros[i:i + filas]
+        if esquema is INTERFAZ:
+            r = decodificar_lote(cap.tramas(i, i + filas), con_cabecera=True)
+            presion.append(r["transducer"])
+        elif "pressure" in campos:
+            presion.append(r["pressure"] / esquema.divisor("pressure"))
+        t.append(reloj.desenrollar(r["timestamp_ms"]) / 1000.0)
+        if "thrust" in campos:
+            empuje.append(r["thrust"] / (1 if esquema is INTERFAZ else esquema.divisor("thrust")))
+        if "temps" in campos:
+            temps.append(r["temps"] / (1 if esquema is INTERFAZ else esquema.divisor("temps")))
+        elif "tempTP[0]" in campos:
+            tp = [r[n] / esquema.divisor(n) for n in campos if n.startswith("tempTP[")]
+            temps.append(np.column_stack(tp))
+
+    unir = lambda partes: np.concatenate(partes) if partes else None
+    tps  = unir(temps)
+    return {
+        "t":       unir(t) if t else np.zeros(0),
+        "empuje":  unir(empuje),
+        "presion": unir(presion),
+        "temps":   [] if tps is None else [(f"Tp{k + 1}", tps[:, k]) for k in range(tps.shape[1])],
+    }
+
+
+def leer(ruta, filas=FILAS_TROZO):
+    if ruta.lower().endswith(".cap"):
+        return leer_captura(ruta, filas)
+    return leer_csv(ruta, filas)
+
+
+# ---------- MÉTRICAS ----------
+def _media_movil(x, n):
+    if n <= 1:
+        return x
+    return np.convolve(x, np.ones(n) / n, mode="same")
+
+
+def metricas(t, empuje=None, presion=None, temps=(), masa=None,
+             umbral=UMBRAL, base_s=BASE_S, suavizado_s=SUAVIZADO_S):
+    """Métricas de un ensayo a partir de sus señales (arrays del mismo largo que ``t``)."""
+    r = {"muestras": len(t), "duracion_s": float(t[-1] - t[0]) if len(t) else 0.0}
+    for nombre, tp in temps:
+        r[f"{nombre}_max_C"] = float(np.nanmax(tp)) if len(tp) else math.nan
+    ref = empuje if empuje is not None else presion
+    if ref is None or len(t) < 2:
+        return r
+
+    base  = t <= t[0] + base_s
+    neto  = ref - np.median(ref[base])
+    dt    = float(np.median(np.diff(t)))
+    suave = _media_movil(neto, int(round(suavizado_s / dt)) if dt > 0 else 1)
+    pico  = suave.max()
+    sigma = 1.4826 * np.median(np.abs(suave[base] - np.median(suave[base])))
+    sobre = np.flatnonzero(suave >= umbral * pico) if pico > RUIDO_K * sigma else []
+    if len(sobre) == 0:
+        r["ignicion_s"] = math.nan          # no hubo encendido
+        return r
+
+    i0, i1  = int(sobre[0]), int(sobre[-1]) + 1
+    ventana = slice(i0, i1)
+    dur     = float(t[i1 - 1] - t[i0])
+    r["ignicion_s"]   = float(t[i0] - t[0])
+    r["combustion_s"] = dur
+
+    if empuje is not None:
+        e = empuje - np.median(empuje[base])
+        impulso = float(_trapecio(e[ventana], t[ventana]))
+        r["impulso_Ns"]     = impulso
+        r["isp_s"]          = impulso / (masa * G0) if masa else math.nan
+        r["empuje_max_N"]   = float(e.max())
+        r["empuje_medio_N"] = impulso / dur if dur > 0 else math.nan
+    if presion is not None:
+        p = presion[ventana]
+        r["presion_base_bar"]  = float(np.median(presion[base]))
+        r["presion_max_bar"]   = float(p.max())
+        r["presion_media_bar"] = (float(_trapecio(p, t[ventana])) / dur if dur > 0
+                                  else float(p.mean()))
+    return r
+
+
+def procesar(ruta, masa=None, umbral=UMBRAL, base_s=BASE_S, suavizado_s=SUAVIZADO_S):
+    """Lee un archivo y devuelve su fila del resumen (con ``error`` si falla)."""
+    t0 = time.perf_counter()
+    fila = {"archivo": os.path.basename(ruta)}
+    try:
+        s = leer(ruta)
+        fila.update(metricas(s["t"], s["empuje"], s["presion"], s["temps"], masa=masa,
+                             umbral=umbral, base_s=base_s, suavizado_s=suavizado_s))
+    except (OSError, ValueError, KeyError) as e:
+        fila["error"] = str(e)
+    fila["proceso_s"] = time.perf_counter() - t0
+    return fila
+
+
+def _procesar_tarea(tarea):
+    ruta, kwargs = tarea
+    return procesar(ruta, **kwargs)
+
+
+# ---------- RESUMEN ----------
+def _masas(valores, rutas):
+    """``--masa 0.35`` para todos o ``--masa archivo=0.35`` por archivo."""
+    comun, por_archivo = None, {}
+    for v in valores or ():
+        nombre, sep, kg = v.rpartition("=")
+        if sep:
+            por_archivo[os.path.basename(nombre)] = float(kg)
+        else:
+            comun = float(kg)
+    return {r: por_archivo.get(os.path.basename(r), comun) for r in rutas}
+
+
+def _columnas(filas):
+    cols = []
+    for f in filas:
+        cols += [k for k in f if k not in cols]
+    # El tiempo de proceso y los errores, al final
+    return [c for c in cols if c not in ("proceso_s", "error")] + \
+           [c for c in ("proceso_s", "error") if c in cols]
+
+
+def _texto(v):
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        return "nan" if math.isnan(v) else f"{v:.6g}"
+    return str(v)
+
+
+def escribir_resumen(filas, ruta):
+    cols = _columnas(filas)
+    with open(ruta, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        for fila in filas:
+            w.writerow([_texto(fila.get(c)) for c in cols])
+
+
+def imprimir_resumen(filas, columnas=("archivo", "ignicion_s", "combustion_s", "impulso_Ns",
+                                      "isp_s", "empuje_max_N", "presion_max_bar",
+                                      "presion_media_bar")):
+    cols  = [c for c in columnas if any(c in f for f in filas)]
+    ancho = [max(len(c), *(len(_texto(f.get(c))) for f in filas)) for c in cols]
+    print("  ".join(c.rjust(a) for c, a in zip(cols, ancho)))
+    for f in filas:
+        print("  ".join(_texto(f.get(c)).rjust(a) for c, a in zip(cols, ancho)))
+        if "error" in f:
+            print(f"    error: {f['error']}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("archivos", nargs="+", help="datos.txt, CSV Time,Pressure_bar o .cap")
+    ap.add_argument("--masa", action="append", metavar="[ARCHIVO=]KG",
+                    help="masa de propulsante para la Isp (repetible)")
+    ap.add_argument("--umbral", type=float, default=UMBRAL, help="fracción del pico neto")
+    ap.add_argument("--base", type=float, default=BASE_S, help="s iniciales de línea base")
+    ap.add_argument("--suavizado", type=float, default=SUAVIZADO_S,
+                    help="s de media móvil para la ignición")
+    ap.add_argument("--procesos", type=int, default=None, help="por defecto, uno por CPU")
+    ap.add_argument("--salida", help="CSV con el resumen completo")
+    args = ap.parse_args(argv)
+
+    masas  = _masas(args.masa, args.archivos)
+    tareas = [(r, {"masa": masas[r], "umbral": args.umbral, "base_s": args.base,
+                   "suavizado_s": args.suavizado}) for r in args.archivos]
+    t0 = time.perf_counter()
+    if args.procesos == 1 or len(tareas) == 1:
+        filas = [_procesar_tarea(t) for t in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            filas = list(pool.map(_procesar_tarea, tareas))
+    dt = time.perf_counter() - t0
+
+    imprimir_resumen(filas)
+    print(f"\n{len(filas)} archivos en {dt:.2f} s")
+    if args.salida:
+        escribir_resumen(filas, args.salida)
+    return 1 if any("error" in f for f in filas) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
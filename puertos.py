@@ -0,0 +1,128 @@
+import glob
+import os
+import tempfile
+import threading
+
+
+# Los simuladores (simulador.py) publican aquí enlaces a sus pseudo-terminales
+DIR_SIMULADOS = os.path.join(tempfile.gettempdir(), "leem-sim")
+
+
+def puertos_simulados():
+    """Enlaces ``ttySIM*`` de los simuladores en marcha cuyo pty sigue existiendo."""
+    return sorted(p for p in glob.glob(os.path.join(DIR_SIMULADOS, "tty*"))
+                  if os.path.exists(p))
+
+
+def listar_puertos(extra=()):
+    """Puertos reales + simulados + entradas adicionales (p. ej. ``replay:...``)."""
+    import serial.tools.list_ports
+
+    return ([p.device for p in serial.tools.list_ports.comports()]
+            + puertos_simulados() + list(extra))
+
+
+class VigilantePuertos:
+    """Descubre puertos en un hilo y deja a la GUI sólo los cambios.
+
+    ``comports()`` recorre sysfs (o el registro en Windows) y puede tardar
+    decenas de ms: aquí nunca corre en el hilo de Tk. Con ``pyudev`` instalado
+    se reescanea al llegar un evento del subsistema ``tty``; sin él, cada
+    ``intervalo`` segundos. Mientras hay un puerto conectado se pausa.
+
+    La GUI llama a ``cambios()`` desde ``ventana.after``: devuelve la lista
+    nueva si ha cambiado desde la última llamada y ``None`` si no, sin bloquear.
+    """
+
+    def __init__(self, extra=(), intervalo=1.0):
+        self.extra     = list(extra)
+        self.intervalo = intervalo
+        self.puertos   = None          # última lista publicada
+        self.info      = {}            # device → ListPortInfo (caché de descriptores)
+        self.escaneos  = 0
+        self._nuevos   = None
+        self._lock     = threading.Lock()
+        self._activo   = threading.Event()
+        self._activo.set()
+        self._parar    = threading.Event()
+        self._hilo     = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._vigilar, daemon=True,
+                                      name="vigilante-puertos")
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        self._activo.set()
+
+    def pausar(self):
+        """Sin escaneos mientras dura una conexión."""
+        self._activo.clear()
+
+    def reanudar(self):
+        self._activo.set()
+
+    def cambios(self):
+        with self._lock:
+            nuevos, self._nuevos = self._nuevos, None
+        return nuevos
+
+    def descripcion(self, puerto):
+        info = self.info.get(puerto)
+        return info.description if info is not None else ""
+
+    # ---------- hilo ----------
+    def _escanear(self, completo=True):
+        """``completo=False`` reutiliza la caché de comports() y sólo mira los simulados."""
+        if completo:
+            import serial.tools.list_ports
+
+            info = {p.device: p for p in serial.tools.list_ports.comports()}
+            self.escaneos += 1
+        else:
+            info = self.info
+        puertos = list(info) + puertos_simulados() + self.extra
+        if puertos != self.puertos:
+            self.info, self.puertos = info, puertos
+            with self._lock:
+                self._nuevos = list(puertos)
+
+    def _vigilar(self):
+        monitor  = _monitor_udev()
+        completo = True
+        while not self._parar.is_set():
+            if not self._activo.is_set():
+                self._activo.wait()
+                completo = True         # lo enchufado durante la pausa
+            if self._parar.is_set():
+                break
+            try:
+                self._escanear(completo)
+            except OSError:
+                pass
+            if monitor is not None:
+                # Con udev sólo se recorre sysfs si hay eventos tty; sin ellos,
+                # cada intervalo se miran sólo los simulados (DIR_SIMULADOS)
+                evento   = monitor.poll(timeout=self.intervalo)
+                completo = evento is not None
+                while evento is not None:
+                    evento = monitor.poll(timeout=0)
+            else:
+                self._parar.wait(self.intervalo)
+
+
+def _monitor_udev():
+    """Monitor de udev para ``tty`` si ``pyudev`` está disponible (Linux)."""
+    try:
+        import pyudev
+    except ImportError:
+        return None
+    try:
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by(subsystem="tty")
+        monitor.start()
+    except (OSError, ValueError):
+        return None
+    return monitor
@@ -0,0 +1,340 @@
+import os
+import struct
+import threading
+import time
+from queue import Queue, Empty
+
+import numpy as np
+
+
+# ---------- FORMATO datos.txt (interfaz.py) ----------
+CABECERA_INTERFAZ = ("Timestamp_ms,Tiempo_s,Thrust_N,"
+                     + ",".join(f"Tp{i}_C" for i in range(1, 9))
+                     + ",Pressure\n")
+FMT_INTERFAZ      = "%d,%.3f,%.3f" + ",%.3f" * 8 + ",%.6f\n"
+# -----------------------------------------------------
+
+# ---------- LECTURA ----------
+COLUMNAS_TIEMPO = ("Tiempo_s", "Time")        # datos.txt / CSV Time,Pressure_bar
+DTYPES_CSV      = {"Timestamp_ms": "<u4"}     # el resto, float32
+FILAS_TROZO     = 65_536
+INDICE_CADA     = 4096                        # filas por entrada del índice .idx
+_MAGIC_IDX      = b"LEEMCSV1"
+_CABECERA_IDX   = struct.Struct("<8sIQqQQd")  # magic, cada, tamaño, mtime_ns, filas, fin, t_fin
+_DTYPE_IDX      = np.dtype([("offset", "<u8"), ("t", "<f8")])
+# -----------------------------
+
+_FLUSH = object()
+_FIN   = object()
+
+
+class _Texto(str):
+    """Texto literal para el escritor, sin formatear como filas."""
+
+
+class RegistroCSV:
+    """Registro CSV por lotes con hilo escritor propio.
+
+    El hilo de la GUI sólo encola lotes de filas (``escribir``); el formateo, la
+    escritura y los ``flush`` se hacen en un hilo dedicado, de modo que la
+    latencia del disco nunca bloquea la interfaz. Política de flush: cada
+    ``cada_filas`` filas, cada ``cada_ms`` milisegundos o bajo demanda
+    (``flush``, p. ej. al parar o en la ignición).
+
+    Si la escritura falla (disco lleno, USB retirado) el hilo termina con el
+    error en ``error`` y desde entonces ``escribir`` lanza ``OSError``: lo ya
+    escrito no se toca y el que llama decide si para o sigue sin registro.
+    """
+
+    def __init__(self, ruta, cabecera=CABECERA_INTERFAZ, formato=FMT_INTERFAZ,
+                 cada_filas=1000, cada_ms=250, buffer_bytes=1 << 20):
+        self.ruta         = ruta
+        self.cabecera     = cabecera
+        self.formato      = formato
+        self.cada_filas   = cada_filas
+        self.cada_ms      = cada_ms
+        self.buffer_bytes = buffer_bytes
+
+        self.filas_escritas = 0
+        self.flushes        = 0
+        self.error          = None
+
+        self._cola       = Queue()
+        self._pendientes = 0          # filas encoladas aún no escritas
+        self._lock       = threading.Lock()
+        self._hilo       = None
+        self._archivo    = None
+
+    # ---------- API (hilo de la GUI) ----------
+    def abrir(self):
+        self._archivo = open(self.ruta, "w", buffering=self.buffer_bytes, newline="")
+        self._archivo.write(self.cabecera)
+        self._hilo = threading.Thread(target=self._escritor, daemon=True)
+        self._hilo.start()
+        return self
+
+    @property
+    def cerrado(self):
+        return self._hilo is None or not self._hilo.is_alive()
+
+    @property
+    def pendientes(self):
+        """Filas encoladas que todavía no han llegado al archivo (backlog)."""
+        return self._pendientes
+
+    def escribir(self, filas):
+        """Encola un lote: lista de tuplas o array 2-D, una fila por paquete."""
+        if self.error is not None:
+            raise OSError(f"{self.ruta}: registro detenido ({self.error})") from self.error
+        n = len(filas)
+        if n == 0:
+            return
+        with self._lock:
+            self._pendientes += n
+        self._cola.put(filas)
+
+    def anotar(self, texto):
+        """Encola texto tal cual (p. ej. líneas ``# ...`` de telemetría al desconectar)."""
+        self._cola.put(_Texto(texto))
+        self.flush()
+
+    def flush(self):
+        """Pide un flush inmediato (STOP, ignición...)."""
+        self._cola.put(_FLUSH)
+
+    def cerrar(self, timeout=5.0):
+        """Escribe lo pendiente, cierra el archivo y termina el hilo."""
+        if self._hilo is None:
+            return
+        self._cola.put(_FIN)
+        self._hilo.join(timeout)
+        self._hilo = None
+
+    # ---------- hilo escritor ----------
+    def _formatear(self, filas):
+        if hasattr(filas, "ravel"):
+            valores = filas.ravel().tolist()
+        else:
+            valores = [v for fila in filas for v in fila]
+        # Una sola operación de formato para todo el lote
+        return (self.formato * len(filas)) % tuple(valores)
+
+    def _escritor(self):
+        archivo      = self._archivo
+        sin_flush    = 0
+        ultimo_flush = time.monotonic()
+        espera       = self.cada_ms / 1000.0
+
+        try:
+            while True:
+                try:
+                    item = self._cola.get(timeout=espera)
+                except Empty:
+                    item = None
+
+                if item is _FIN:
+                    break
+
+                forzar = item is _FLUSH
+                if isinstance(item, _Texto):
+                    archivo.write(item)
+                    sin_flush += 1
+                elif item is not None and not forzar:
+                    n = len(item)
+                    archivo.write(self._formatear(item))
+                    with self._lock:
+                        self._pendientes -= n
+                    self.filas_escritas += n
+                    sin_flush += n
+
+                ahora = time.monotonic()
+                if sin_flush and (forzar or sin_flush >= self.cada_filas
+                                  or ahora - ultimo_flush >= espera):
+                    archivo.flush()
+                    self.flushes += 1
+                    sin_flush    = 0
+                    ultimo_flush = ahora
+        except (OSError, ValueError, TypeError) as e:
+            self.error = e
+        finally:
+            try:
+                archivo.close()
+            except OSError as e:
+                self.error = self.error or e
+
+
+def cabecera_csv(ruta):
+    """``(offset del primer dato, nombres de columna)`` de un CSV con líneas ``#``."""
+    pos = 0
+    with open(ruta, "rb") as f:
+        for linea in iter(f.readline, b""):
+            pos += len(linea)
+            if linea.strip() and not linea.startswith(b"#"):
+                return pos, [c.strip() for c in linea.decode().strip().split(",")]
+    raise ValueError(f"{ruta}: CSV sin cabecera")
+
+
+class LectorCSV:
+    """Lectura por trozos de ``datos.txt`` (o de un CSV ``Time,Pressure_bar``).
+
+    Cada trozo es un array estructurado de ``filas`` filas (menos el último y
+    los de los bordes de un rango) con sólo las ``columnas`` pedidas:
+    ``Timestamp_ms`` en uint32 y el resto en float32, salvo lo que se cambie con
+    ``dtypes`` (p. ej. ``{"Tiempo_s": "<f8"}``; en float32 el tiempo tiene una
+    resolución de ~0.1 ms a los 30 min). Las líneas ``#`` se ignoran, y también
+    una última línea sin terminar (corte de corriente).
+
+    La primera vez se crea ``<archivo>.idx`` con el offset en bytes y el tiempo
+    de una de cada ``indice_cada`` filas. Con él cada trozo es un rango de bytes
+    conocido y ``trozos(t_ini, t_fin)`` salta directamente al principio del
+    rango (el tiempo debe ser no decreciente). Si el CSV cambia de tamaño o de
+    fecha el índice se rehace.
+
+        for trozo in LectorCSV("datos.txt", ("Tiempo_s", "Thrust_N")):
+            ...
+        disparo = LectorCSV("datos.txt").leer(t_ini=10.0, t_fin=15.0)
+    """
+
+    def __init__(self, ruta, columnas=None, filas=FILAS_TROZO, dtypes=None,
+                 indice_cada=INDICE_CADA):
+        self.ruta = ruta
+        self.inicio, self.nombres = cabecera_csv(ruta)
+        self.tiempo = next((c for c in COLUMNAS_TIEMPO if c in self.nombres), None)
+        columnas = list(self.nombres if columnas is None else columnas)
+        faltan = [c for c in columnas if c not in self.nombres]
+        if faltan:
+            raise KeyError(f"{ruta}: no tiene las columnas {faltan}")
+        tipos = {**DTYPES_CSV, **(dtypes or {})}
+
+        self.columnas    = columnas
+        self.usecols     = [self.nombres.index(c) for c in columnas]
+        self.dtype       = np.dtype([(c, tipos.get(c, "<f4")) for c in columnas])
+        self.indice_cada = int(indice_cada)
+        # Trozos alineados con el índice: cada uno empieza en un offset conocido
+        self.filas       = max(1, round(filas / self.indice_cada)) * self.indice_cada
+        self._cargar_indice()
+
+    def __len__(self):
+        return self.n_filas
+
+    def __iter__(self):
+        return self.trozos()
+
+    @property
+    def t_inicio(self):
+        """Tiempo de la primera fila (None sin columna de tiempo o sin filas)."""
+        if self.tiempo is None or self.n_filas == 0:
+            return None
+        return float(self._indice["t"][0])
+
+    # ---------- lectura ----------
+    def trozos(self, t_ini=None, t_fin=None):
+        """Trozos de ``filas`` filas; con ``t_ini``/``t_fin``, sólo t_ini <= t < t_fin."""
+        rango = t_ini is not None or t_fin is not None
+        if rango and self.tiempo is None:
+            raise ValueError(f"{self.ruta}: sin columna de tiempo para seleccionar un rango")
+        offsets = self._indice["offset"]
+        e_ini, e_fin = 0, len(offsets)
+        if t_ini is not None:
+            e_ini = max(int(np.searchsorted(self._indice["t"], t_ini, side="right")) - 1, 0)
+        if t_fin is not None:
+            # Las filas desde la primera entrada con t >= t_fin ya no entran
+            e_fin = int(np.searchsorted(self._indice["t"], t_fin, side="left"))
+        limite = int(offsets[e_fin]) if e_fin < len(offsets) else self.fin
+
+        paso = self.filas // self.indice_cada
+        with open(self.ruta, "rb") as f:
+            for e in range(e_ini, e_fin, paso):
+                ini = int(offsets[e])
+                fin = int(offsets[e + paso]) if e + paso < len(offsets) else self.fin
+                f.seek(ini)
+                trozo, t = self._convertir(f.read(min(fin, limite) - ini), rango)
+                if rango:
+                    m = np.ones(len(trozo), dtype=bool)
+                    if t_ini is not None:
+                        m &= t >= t_ini
+                    if t_fin is not None:
+                        m &= t < t_fin
+                    trozo = trozo[m]
+                if len(trozo):
+                    yield trozo
+
+    def leer(self, t_ini=None, t_fin=None):
+        """Todo (o el rango) en un solo array."""
+        trozos = list(self.trozos(t_ini, t_fin))
+        return np.concatenate(trozos) if trozos else np.zeros(0, dtype=self.dtype)
+
+    def _convertir(self, buf, con_tiempo=False):
+        lineas = [l for l in buf.splitlines() if l.strip() and not l.startswith(b"#")]
+        cols   = self.usecols + ([self.nombres.index(self.tiempo)] if con_tiempo else [])
+        if lineas:
+            valores = np.loadtxt(lineas, delimiter=",", usecols=cols, ndmin=2)
+        else:
+            valores = np.zeros((0, len(cols)))
+        trozo = np.empty(len(valores), dtype=self.dtype)
+        for k, c in enumerate(self.columnas):
+            trozo[c] = valores[:, k]
+        return trozo, (valores[:, -1] if con_tiempo else None)
+
+    # ---------- cabecera e índice ----------
+    def _cargar_indice(self):
+        st  = os.stat(self.ruta)
+        idx = self.ruta + ".idx"
+        try:
+            with open(idx, "rb") as f:
+                magic, cada, tam, mtime, filas, fin, t_fin = _CABECERA_IDX.unpack(
+                    f.read(_CABECERA_IDX.size))
+                if (magic, cada, tam, mtime) == (_MAGIC_IDX, self.indice_cada,
+                                                 st.st_size, st.st_mtime_ns):
+                    self._indice = np.fromfile(f, dtype=_DTYPE_IDX)
+                    self.n_filas, self.fin, self.t_fin = filas, fin, t_fin
+                    return
+        except (OSError, struct.error, ValueError):
+            pass
+
+        self._construir_indice()
+        try:
+            with open(idx, "wb") as f:
+                f.write(_CABECERA_IDX.pack(_MAGIC_IDX, self.indice_cada, st.st_size,
+                                           st.st_mtime_ns, self.n_filas, self.fin,
+                                           self.t_fin))
+                self._indice.tofile(f)
+        except OSError:
+            pass                        # carpeta de sólo lectura: índice en memoria
+
+    def _tiempo_linea(self, linea):
+        if self.tiempo is None:
+            return np.nan
+        return float(linea.split(b",")[self.nombres.index(self.tiempo)])
+
+    def _construir_indice(self, bloque=1 << 23):
+        """Una pasada por el archivo buscando los saltos de línea con NumPy."""
+        cada, n = self.indice_cada, 0
+        entradas, ultima = [], None
+        self.fin = self.inicio
+        with open(self.ruta, "rb") as f:
+            f.seek(self.inicio)
+            base, resto = self.inicio, b""
+            for leido in iter(lambda: f.read(bloque), b""):
+                buf     = resto + leido
+                arr     = np.frombuffer(buf, dtype=np.uint8)
+                finales = np.flatnonzero(arr == 0x0A)
+                if len(finales):
+                    inicios = np.concatenate(([0], finales[:-1] + 1))
+                    primero = arr[inicios]
+                    filas   = inicios[(primero != ord("#")) & (primero != 0x0A)
+                                      & (primero != 0x0D)]
+                    for i in filas[(np.arange(n, n + len(filas)) % cada) == 0].tolist():
+                        entradas.append((base + i, self._tiempo_linea(buf[i:buf.index(b"\n", i)])))
+                    if len(filas):
+                        i = int(filas[-1])
+                        ultima = buf[i:buf.index(b"\n", i)]
+                    n       += len(filas)
+                    corte    = int(finales[-1]) + 1
+                    self.fin = base + corte
+                    base, resto = base + corte, buf[corte:]
+                else:
+                    resto = buf
+        self.n_filas = n
+        self.t_fin   = np.nan if ultima is None else self._tiempo_linea(ultima)
+        self._indice = np.array(entradas, dtype=_DTYPE_IDX)
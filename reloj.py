@@ -0,0 +1,109 @@
+"""Base de tiempos a partir del reloj del dispositivo (``timestamp_ms``).
+
+USB y la radio agrupan paquetes: muchos llegan al host en el mismo instante y,
+si se sella cada uno con ``time.time()`` al llegar, la curva de empuje sale en
+dientes de sierra. ``RelojDispositivo`` ajusta en línea un modelo lineal
+
+    t_host = a + b * t_dispositivo
+
+y asigna a cada muestra su tiempo derivado del ``timestamp_ms`` (desenrollado
+a través de la vuelta del uint32), expresado en la escala de
+``time.perf_counter_ns`` del host.
+
+El ajuste es un mínimos cuadrados con olvido exponencial sobre el último
+paquete de cada lectura (el que menos ha esperado en el buffer), y la recta se
+desplaza hasta el mínimo de los residuos recientes: la latencia de USB sólo
+puede retrasar la llegada, nunca adelantarla.
+"""
+from collections import deque
+
+import numpy as np
+
+
+OLVIDO        = 0.999     # peso de la historia en cada actualización (~1000 lecturas)
+RESIDUOS      = 256       # lecturas recientes para el suelo de latencia
+VENTANA_HZ_MS = 1000      # tiempo de dispositivo sobre el que se mide la tasa
+
+
+class RelojDispositivo:
+    """Modelo lineal dispositivo → host estimado en línea, O(1) por lectura."""
+
+    def __init__(self, olvido=OLVIDO):
+        self.olvido = olvido
+        self.reset()
+
+    def reset(self):
+        self._ultimo   = None        # último timestamp_ms recibido (uint32)
+        self._dev      = 0           # ms de dispositivo desenrollados
+        self._host0    = None        # ns de perf_counter de la primera lectura
+        # Sumas ponderadas para la regresión (x: ms dispositivo, y: ms host)
+        self._w = self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._residuos = deque(maxlen=RESIDUOS)
+        self._tasa     = deque()     # (dev_ms, paquetes acumulados)
+        self._n        = 0
+        self.pendiente = 1.0         # ms host por ms de dispositivo
+        self.origen    = 0.0         # ms host en dev = 0
+        self.hz        = 0.0
+
+    @property
+    def deriva_ppm(self):
+        """Deriva del reloj del dispositivo respecto al host."""
+        return (self.pendiente - 1.0) * 1e6
+
+    def desenrollar(self, timestamps_ms):
+        """ms de dispositivo continuos (int64) a pesar de la vuelta del uint32."""
+        ts = np.asarray(timestamps_ms, dtype=np.int64)
+        previo = ts[0] if self._ultimo is None else self._ultimo
+        d = np.diff(ts, prepend=previo)
+        d = (d + (1 << 31)) % (1 << 32) - (1 << 31)
+        dev = self._dev + np.cumsum(d)
+        self._ultimo = int(ts[-1])
+        self._dev    = int(dev[-1])
+        return dev
+
+    def tiempos(self, timestamps_ms, llegada_ns):
+        """Tiempo de host (s, escala de perf_counter) de cada muestra de una lectura.
+
+        ``llegada_ns`` es ``time.perf_counter_ns()`` al recibir la lectura.
+        """
+        if len(timestamps_ms) == 0:
+            return np.zeros(0)
+        dev = self.desenrollar(timestamps_ms)
+        if self._host0 is None:
+            self._host0 = llegada_ns
+        x = float(dev[-1])
+        y = (llegada_ns - self._host0) / 1e6
+        self._actualizar(x, y)
+        self._medir_tasa(x, len(dev))
+
+        host_ms = self.origen + self.pendiente * dev
+        return (self._host0 / 1e6 + host_ms) / 1000.0
+
+    def _actualizar(self, x, y):
+        f = self.olvido
+        self._w   = f * self._w   + 1.0
+        self._sx  = f * self._sx  + x
+        self._sy  = f * self._sy  + y
+        self._sxx = f * self._sxx + x * x
+        self._sxy = f * self._sxy + x * y
+
+        mx, my = self._sx / self._w, self._sy / self._w
+        var = self._sxx / self._w - mx * mx
+        # Con menos de ~1 s de historia la pendiente no es fiable: se asume 1
+        if var > (VENTANA_HZ_MS / 2) ** 2 / 12:
+            self.pendiente = (self._sxy / self._w - mx * my) / var
+        base = my - self.pendiente * mx
+
+        # Suelo de latencia: la recta pasa por el residuo mínimo reciente
+        self._residuos.append(y - (base + self.pendiente * x))
+        self.origen = base + min(self._residuos)
+
+    def _medir_tasa(self, x, n):
+        """Tasa en Hz medida con el tiempo del dispositivo, no con la llegada."""
+        self._n += n
+        self._tasa.append((x, self._n))
+        while len(self._tasa) > 2 and x - self._tasa[1][0] >= VENTANA_HZ_MS:
+            self._tasa.popleft()
+        x0, n0 = self._tasa[0]
+        if x > x0:
+            self.hz = (self._n - n0) * 1000.0 / (x - x0)
@@ -0,0 +1,205 @@
+"""Reproducción offline: un sustituto de ``serial.Serial`` que emite una captura.
+
+``ReplaySerial`` implementa lo que usan los hilos lectores (``read``,
+``in_waiting``, ``write``, ``close``, ``is_open``, ``reset_input_buffer``) y
+entrega los bytes de una captura ``.cap`` o de tramas sintetizadas a partir de
+un CSV ``Time,Pressure_bar`` respetando los tiempos originales, acelerados N
+veces o sin límite.
+
+En las GUIs se selecciona con un "puerto" de la forma::
+
+    replay:captura.cap          tiempo real
+    replay:captura.cap@10       10x
+    replay:datos_presion_completo.csv@max
+
+Los archivos pasados por línea de comandos aparecen en el menú de puertos::
+
+    python interfaz.py datos_20260306-193236.cap@10 datos_presion_completo.csv
+"""
+import csv
+import time
+from bisect import bisect_right
+
+from esquemas import INTERFAZ
+
+
+PREFIJO = "replay:"
+
+
+class ReplaySerial:
+    """Puerto serie simulado sobre un bloque de bytes con instantes de llegada.
+
+    ``tiempos[i]`` (s, relativos) es cuándo está disponible la trama i, que
+    termina en el byte ``finales[i]``. ``velocidad`` multiplica el ritmo;
+    ``None`` entrega todo de inmediato. Sin ``repetir``, al acabarse los datos
+    ``read`` espera el ``timeout`` como un puerto en silencio y ``agotado``
+    indica que ya no llegará nada más.
+    """
+
+    def __init__(self, data, tiempos, finales, velocidad=1.0, timeout=1, repetir=False):
+        self._data      = bytes(data)
+        self._tiempos   = list(tiempos)
+        self._finales   = list(finales)
+        self.velocidad  = velocidad
+        self.timeout    = timeout
+        self.repetir    = repetir
+        self.is_open    = True
+        self.port       = "replay"
+        self.escrito    = bytearray()     # comandos recibidos (0x01..0x04)
+        self._pos       = 0
+        self._vuelta    = 0
+        self._t0        = time.monotonic()
+
+    # ---------- constructores ----------
+    @classmethod
+    def desde_captura(cls, ruta, **kwargs):
+        from captura import Captura
+
+        cap = Captura(ruta)
+        t_ns = cap.registros["t_ns"]
+        tiempos = ((t_ns - t_ns[0]) / 1e9).tolist() if len(cap) else []
+        finales = [(i + 1) * cap.tam_trama for i in range(len(cap))]
+        return cls(cap.tramas(), tiempos, finales, **kwargs)
+
+    @classmethod
+    def desde_csv_presion(cls, ruta, **kwargs):
+        """Tramas de interfaz.py con la presión de un CSV ``Time,Pressure_bar``.
+
+        Thrust y termopares van a cero; el ADC crudo se obtiene invirtiendo la
+        conversión _BAR_K/_BAR_OFFSET.
+        """
+        from decodificador import _BAR_K, _BAR_OFFSET
+
+        fmt     = INTERFAZ.struct
+        cab     = INTERFAZ.cabecera
+        partes, tiempos, finales = [], [], []
+        fin = 0
+        with open(ruta, newline="") as f:
+            lector = csv.reader(f)
+            next(lector)
+            for fila in lector:
+                t, bar = float(fila[0]), float(fila[1])
+                raw = min(max(round((bar - _BAR_OFFSET) / _BAR_K), 0), 0xFFFF)
+                partes.append(cab + fmt.pack(int(t * 1000) & 0xFFFFFFFF, 0, *[0] * 8, raw))
+                fin += INTERFAZ.tam_trama
+                tiempos.append(t)
+                finales.append(fin)
+        t0 = tiempos[0] if tiempos else 0.0
+        return cls(b"".join(partes), [t - t0 for t in tiempos], finales, **kwargs)
+
+    @classmethod
+    def desde_puerto(cls, puerto, timeout=1):
+        """``replay:<archivo>[@velocidad|@max]`` → ReplaySerial."""
+        ruta = puerto[len(PREFIJO):]
+        velocidad = 1.0
+        if "@" in ruta:
+            ruta, v = ruta.rsplit("@", 1)
+            velocidad = None if v == "max" else float(v)
+        if ruta.lower().endswith(".csv"):
+            return cls.desde_csv_presion(ruta, velocidad=velocidad, timeout=timeout)
+        return cls.desde_captura(ruta, velocidad=velocidad, timeout=timeout)
+
+    # ---------- interfaz serial.Serial ----------
+    def _disponibles(self):
+        """Bytes que ya habrían llegado (contando vueltas si ``repetir``)."""
+        total = len(self._data)
+        if self.velocidad is None:
+            return total * (self._vuelta + 1)
+        t = (time.monotonic() - self._t0) * self.velocidad
+        duracion = self._tiempos[-1] if self._tiempos else 0.0
+        vuelta = self._vuelta
+        if self.repetir and duracion > 0:
+            vuelta = int(t // duracion)
+            t -= vuelta * duracion
+        elif t >= duracion:
+            return total * (vuelta + 1)
+        k = bisect_right(self._tiempos, t)
+        return total * vuelta + (self._finales[k - 1] if k else 0)
+
+    def _espera_siguiente(self):
+        """Segundos hasta que llegue la siguiente trama, o None si no hay más."""
+        if self.velocidad is None or not self._tiempos:
+            return None
+        t = (time.monotonic() - self._t0) * self.velocidad
+        duracion = self._tiempos[-1]
+        base = 0.0
+        if self.repetir and duracion > 0:
+            base = (t // duracion) * duracion
+        k = bisect_right(self._tiempos, t - base)
+        if k >= len(self._tiempos):
+            if not self.repetir:
+                return None
+            return (base + duracion - t) / self.velocidad + 1e-4
+        return (base + self._tiempos[k] - t) / self.velocidad
+
+    def _comprobar(self):
+        if not self.is_open:
+            raise OSError("puerto de reproducción cerrado")
+
+    @property
+    def agotado(self):
+        """La captura se ha leído entera y no se repite: fin del flujo."""
+        return not self.repetir and self._pos >= len(self._data)
+
+    @property
+    def in_waiting(self):
+        self._comprobar()
+        return self._disponibles() - self._pos
+
+    def read(self, size=1):
+        self._comprobar()
+        limite = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            disp = self._disponibles() - self._pos
+            if disp >= size:
+                break
+            espera = self._espera_siguiente()
+            if espera is None:
+                if self.velocidad is None and self.repetir:
+                    self._vuelta += 1
+                    continue
+                # No llegará nada más: como el puerto real, se agota el timeout
+                if limite is not None:
+                    time.sleep(max(limite - time.monotonic(), 0.0))
+                break
+            if limite is not None:
+                resto = limite - time.monotonic()
+                if resto <= 0:
+                    break
+                espera = min(espera, resto)
+            time.sleep(max(espera, 0.0))
+            self._comprobar()
+
+        n = min(size, disp)
+        total = len(self._data)
+        out = bytearray()
+        while len(out) < n:
+            ini = self._pos % total
+            trozo = self._data[ini:ini + n - len(out)]
+            out += trozo
+            self._pos += len(trozo)
+        return bytes(out)
+
+    def write(self, data):
+        self._comprobar()
+        self.escrito += data
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._pos = self._disponibles()
+
+    def close(self):
+        self.is_open = False
+
+
+def puertos_replay(argv):
+    """Entradas ``replay:...`` para el menú de puertos a partir de ``sys.argv[1:]``."""
+    return [PREFIJO + a for a in argv]
+
+
+def abrir_puerto(puerto, baudrate, timeout):
+    """``serial.Serial`` normal, o ``ReplaySerial`` si el puerto es ``replay:...``."""
+    if puerto.startswith(PREFIJO):
+        return ReplaySerial.desde_puerto(puerto, timeout=timeout)
+    import serial
+    return serial.Serial(puerto, baudrate, timeout=timeout)
@@ -0,0 +1,329 @@
+"""Análisis de secuencia y jitter a partir del ``timestamp_ms`` del Teensy.
+
+``AnalizadorSecuencia`` recibe bloques de timestamps del dispositivo junto con
+el instante de llegada en el host y detecta:
+
+    huecos        salto mayor que 1.5 periodos (se estiman los paquetes perdidos)
+    duplicados    mismo timestamp que el paquete anterior
+    desorden      timestamp menor que el anterior (con vuelta de uint32 resuelta)
+    deriva        pendiente del desfase host - dispositivo, en ppm, ajustada sobre
+                  el mínimo de cada ventana (el mínimo es el paquete que menos
+                  esperó en USB/radio, así que no le afecta el agrupamiento)
+
+Todo se acumula por ventanas de ``ventana_s`` segundos en arrays de tamaño
+fijo (las últimas ``n_ventanas``), incluidos dos histogramas: el intervalo entre
+paquetes en periodos nominales y el retraso de llegada respecto al mínimo de la
+ventana. ``estado()`` marca el enlace como degradado antes de que los datos
+dejen de servir.
+
+Sirve en vivo (``adquisicion.Motor`` lo alimenta con cada lectura) y sobre capturas.
+En el registro CSV ``Tiempo_s`` ya es tiempo del modelo del reloj, no la
+llegada al host, así que de un ``datos.txt`` sólo salen huecos, duplicados y
+desorden (``llegada=False``); deriva y jitter necesitan la ``.cap``:
+
+    python secuencia.py datos_20260306-193236.cap
+    python secuencia.py datos.txt --periodo 1
+"""
+import argparse
+from collections import deque
+
+import numpy as np
+
+
+# ---------- HISTOGRAMAS ----------
+# Intervalo entre paquetes, en periodos nominales
+BORDES_INTERVALO = np.array([-np.inf, 0, 0.5, 0.9, 1.1, 1.5, 2.5, 4.5, 10.5, np.inf])
+# Retraso de llegada sobre el mínimo de la ventana (hasta ese bloque), en ms
+BORDES_LLEGADA   = np.array([0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, np.inf])
+# ---------------------------------
+
+# ---------- UMBRALES ----------
+PERDIDAS_DEGRADADO  = 0.001     # fracción de paquetes perdidos
+PERDIDAS_MAL        = 0.01
+DESORDEN_DEGRADADO  = 0.001     # duplicados + desordenados
+LLEGADA_P99_DEGRADADO = 50.0    # ms
+LLEGADA_P99_MAL       = 250.0
+# ------------------------------
+
+NIVELES = ("ok", "degradado", "mal")
+
+
+def _percentil_hist(hist, bordes, q):
+    """Percentil aproximado de un histograma: borde superior del cubo.
+
+    En el último cubo, abierto hasta ``inf``, se da su borde inferior: el
+    percentil es «al menos» ese valor (ver ``_texto_percentil``).
+    """
+    total = hist.sum()
+    if total == 0:
+        return 0.0
+    k = min(int(np.searchsorted(np.cumsum(hist), q * total)), len(hist) - 1)
+    return float(bordes[k + 1] if np.isfinite(bordes[k + 1]) else bordes[k])
+
+
+def _texto_percentil(valor, bordes):
+    """``"120"``, o ``"≥1000"`` si el percentil cae en el último cubo abierto."""
+    return f"≥{valor:.0f}" if np.isinf(bordes[-1]) and valor >= bordes[-2] else f"{valor:.0f}"
+
+
+class AnalizadorSecuencia:
+    """Huecos, duplicados, desorden, deriva y jitter con memoria fija."""
+
+    def __init__(self, periodo_ms=None, ventana_s=1.0, n_ventanas=60, recientes=5,
+                 llegada=True):
+        self.periodo_ms = periodo_ms      # None: se estima con la mediana de los primeros intervalos
+        self.ventana_s  = ventana_s
+        self.n_ventanas = n_ventanas
+        self.recientes  = recientes       # ventanas que cuentan para estado()
+        self.llegada    = llegada         # False: t_host no es la llegada real (sin deriva ni jitter)
+
+        nv = n_ventanas
+        self._id          = np.full(nv, -1, dtype=np.int64)   # nº de ventana en cada hueco
+        self._paquetes    = np.zeros(nv, dtype=np.int64)
+        self._perdidos    = np.zeros(nv, dtype=np.int64)
+        self._duplicados  = np.zeros(nv, dtype=np.int64)
+        self._desorden    = np.zeros(nv, dtype=np.int64)
+        self._off_min     = np.full(nv, np.inf)                # ms
+        self._h_intervalo = np.zeros((nv, len(BORDES_INTERVALO) - 1), dtype=np.int64)
+        self._h_llegada   = np.zeros((nv, len(BORDES_LLEGADA) - 1), dtype=np.int64)
+
+        self.eventos      = deque(maxlen=100)   # (t_s desde el inicio, nivel, motivos)
+        self.reset()
+
+    def reset(self):
+        self._id[:] = -1
+        self.paquetes     = 0
+        self.huecos       = 0
+        self.perdidos     = 0
+        self.duplicados   = 0
+        self.desordenados = 0
+        self._ultimo      = None      # último timestamp (uint32)
+        self._dev         = 0         # tiempo de dispositivo desenrollado, ms
+        self._t0          = None
+        self._positivos   = []        # intervalos para estimar el periodo
+        self._nivel       = "ok"
+        self.eventos.clear()
+
+    # ---------- entrada ----------
+    def procesar(self, timestamps_ms, t_host_s):
+        """Añade un bloque: timestamps uint32 y llegada en el host (s, escalar o array)."""
+        ts = np.asarray(timestamps_ms, dtype=np.int64)
+        n  = len(ts)
+        if n == 0:
+            return
+        t_host = np.broadcast_to(np.asarray(t_host_s, dtype=np.float64), (n,))
+        if self._t0 is None:
+            self._t0 = float(t_host[0])
+
+        # Diferencias con signo módulo 2^32: la vuelta del contador no es un hueco
+        primero = self._ultimo is None
+        d = np.diff(ts, prepend=ts[0] if primero else self._ultimo)
+        d = (d + (1 << 31)) % (1 << 32) - (1 << 31)
+        self._ultimo = int(ts[-1])
+
+        # A baja tasa (célula, ~80 Hz) cada lectura trae un solo paquete: los
+        # intervalos se acumulan entre bloques y hasta tener 10 no hay huecos
+        if self.periodo_ms is None:
+            self._positivos.extend(d[d > 0][:10].tolist())
+            if len(self._positivos) >= 10:
+                self.periodo_ms = float(np.median(self._positivos))
+        periodo = self.periodo_ms or 1.0
+
+        duplicado = d == 0
+        duplicado[0] &= not primero
+        desorden  = d < 0
+        hueco     = d > 1.5 * periodo if self.periodo_ms else np.zeros(n, dtype=bool)
+        perdidos  = np.where(hueco, np.rint(d / periodo) - 1, 0).astype(np.int64)
+
+        dev = self._dev + np.cumsum(d)
+        self._dev = int(dev[-1])
+        offset = (t_host - self._t0) * 1000.0 - dev      # ms; crece con la deriva
+
+        self.paquetes     += n
+        self.huecos       += int(hueco.sum())
+        self.perdidos     += int(perdidos.sum())
+        self.duplicados   += int(duplicado.sum())
+        self.desordenados += int(desorden.sum())
+
+        ids = np.floor((t_host - self._t0) / self.ventana_s).astype(np.int64)
+        for v in np.unique(ids):
+            m = ids == v
+            self._acumular(int(v), d[m] / periodo, offset[m],
+                           perdidos[m].sum(), duplicado[m].sum(), desorden[m].sum())
+
+        self._actualizar_estado(float(t_host[-1]))
+
+    def _hueco(self, v):
+        """Índice del array circular para la ventana ``v`` (la limpia si es nueva)."""
+        k = v % self.n_ventanas
+        if self._id[k] != v:
+            self._id[k]          = v
+            self._paquetes[k]    = 0
+            self._perdidos[k]    = 0
+            self._duplicados[k]  = 0
+            self._desorden[k]    = 0
+            self._off_min[k]     = np.inf
+            self._h_intervalo[k] = 0
+            self._h_llegada[k]   = 0
+        return k
+
+    def _acumular(self, v, intervalos, offset, perdidos, duplicados, desorden):
+        k = self._hueco(v)
+        self._paquetes[k]   += len(intervalos)
+        self._perdidos[k]   += perdidos
+        self._duplicados[k] += duplicados
+        self._desorden[k]   += desorden
+        self._h_intervalo[k] += np.histogram(intervalos, BORDES_INTERVALO)[0]
+        if not self.llegada:
+            return
+        self._off_min[k]     = min(self._off_min[k], float(offset.min()))
+        self._h_llegada[k]   += np.histogram(offset - self._off_min[k], BORDES_LLEGADA)[0]
+
+    # ---------- resultados ----------
+    def _validas(self, ultimas=None):
+        """Máscara de las ventanas vigentes (las ``ultimas`` más recientes)."""
+        actual = self._id.max()
+        ultimas = self.n_ventanas if ultimas is None else ultimas
+        return (self._id >= 0) & (self._id > actual - ultimas)
+
+    def deriva_ppm(self):
+        """Pendiente del desfase mínimo por ventana (ppm); None con < 3 ventanas."""
+        m = self._validas() & np.isfinite(self._off_min)
+        if m.sum() < 3:
+            return None
+        t = self._id[m] * self.ventana_s
+        pendiente = np.polyfit(t, self._off_min[m], 1)[0]     # ms por s
+        return float(pendiente * 1000.0)
+
+    def histogramas(self, ultimas=None):
+        """(intervalo, llegada) acumulados sobre las ventanas vigentes."""
+        m = self._validas(ultimas)
+        return self._h_intervalo[m].sum(axis=0), self._h_llegada[m].sum(axis=0)
+
+    def metricas(self, ultimas=None):
+        m = self._validas(ultimas)
+        paquetes = int(self._paquetes[m].sum())
+        perdidos = int(self._perdidos[m].sum())
+        _, h_lleg = self.histogramas(ultimas)
+        return {
+            "paquetes":      paquetes,
+            "perdidas":      perdidos / max(paquetes + perdidos, 1),
+            "desorden":      int(self._duplicados[m].sum() + self._desorden[m].sum())
+                             / max(paquetes, 1),
+            "llegada_p99_ms": _percentil_hist(h_lleg, BORDES_LLEGADA, 0.99),
+        }
+
+    def estado(self):
+        """(nivel, motivos) según las ``recientes`` últimas ventanas."""
+        m = self.metricas(self.recientes)
+        motivos = []
+        nivel = 0
+        if m["perdidas"] >= PERDIDAS_MAL:
+            nivel = 2
+        if m["perdidas"] >= PERDIDAS_DEGRADADO:
+            nivel = max(nivel, 1)
+            motivos.append(f"pérdidas {m['perdidas']:.2%}")
+        if m["desorden"] >= DESORDEN_DEGRADADO:
+            nivel = max(nivel, 1)
+            motivos.append(f"dup/desorden {m['desorden']:.2%}")
+        if m["llegada_p99_ms"] > LLEGADA_P99_MAL:
+            nivel = 2
+        if m["llegada_p99_ms"] > LLEGADA_P99_DEGRADADO:
+            nivel = max(nivel, 1)
+            motivos.append(f"jitter p99 {_texto_percentil(m['llegada_p99_ms'], BORDES_LLEGADA)} ms")
+        return NIVELES[nivel], motivos
+
+    def _actualizar_estado(self, t_host):
+        nivel, motivos = self.estado()
+        if nivel != self._nivel:
+            self._nivel = nivel
+            self.eventos.append((t_host - self._t0, nivel, motivos))
+
+    def resumen(self):
+        deriva = self.deriva_ppm()
+        nivel, motivos = self.estado()
+        return {
+            "paquetes":     self.paquetes,
+            "periodo_ms":   self.periodo_ms,
+            "huecos":       self.huecos,
+            "perdidos":     self.perdidos,
+            "duplicados":   self.duplicados,
+            "desordenados": self.desordenados,
+            "deriva_ppm":   None if deriva is None else round(deriva, 1) + 0.0,
+            "estado":       nivel,
+            "motivos":      motivos,
+        }
+
+    def texto(self):
+        """Texto corto para la barra lateral."""
+        r = self.resumen()
+        deriva = "--" if r["deriva_ppm"] is None else f"{r['deriva_ppm']:+.0f}"
+        return (f"Huecos: {r['huecos']} ({r['perdidos']} perdidos)\n"
+                f"Dups: {r['duplicados']}  Desorden: {r['desordenados']}\n"
+                f"Deriva: {deriva} ppm  Enlace: {r['estado']}")
+
+
+# ---------- CAPTURAS ----------
+def analizar_archivo(ruta, periodo_ms=None, ventana_s=1.0, bloque=100_000):
+    """Analiza una captura ``.cap`` o un ``datos.txt`` por bloques.
+
+    Del registro CSV sólo se toma ``Tiempo_s`` para repartir en ventanas: no es
+    la hora de llegada, así que no hay deriva ni jitter. Se guardan todas las
+    ventanas del archivo para poder ver cuándo se degradó el enlace.
+    """
+    if ruta.lower().endswith(".cap"):
+        from captura import Captura
+
+        cap = Captura(ruta)
+        n = len(cap)
+        duracion = (int(cap.registros["t_ns"][-1]) - int(cap.registros["t_ns"][0])) / 1e9 if n else 0
+        analizador = AnalizadorSecuencia(periodo_ms, ventana_s,
+                                         n_ventanas=int(duracion / ventana_s) + 2)
+        for i in range(0, n, bloque):
+            r = cap.registros[i:i + bloque]
+            analizador.procesar(r["timestamp_ms"], r["t_ns"] / 1e9)
+        return analizador
+
+    from registro import LectorCSV
+
+    lector = LectorCSV(ruta, ("Timestamp_ms", "Tiempo_s"), filas=bloque,
+                       dtypes={"Tiempo_s": "<f8"})
+    duracion = lector.t_fin - lector.t_inicio if len(lector) else 0
+    analizador = AnalizadorSecuencia(periodo_ms, ventana_s,
+                                     n_ventanas=int(duracion / ventana_s) + 2,
+                                     llegada=False)
+    for r in lector:
+        analizador.procesar(r["Timestamp_ms"].astype(np.int64), r["Tiempo_s"])
+    return analizador
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("archivo", help="captura .cap o registro datos.txt")
+    ap.add_argument("--periodo", type=float, help="periodo nominal en ms (por defecto se estima)")
+    ap.add_argument("--ventana", type=float, default=1.0, help="segundos por ventana")
+    args = ap.parse_args(argv)
+
+    a = analizar_archivo(args.archivo, args.periodo, args.ventana)
+    for k, v in a.resumen().items():
+        print(f"{k:<13} {v}")
+
+    h_int, h_lleg = a.histogramas()
+    print("\nIntervalo entre paquetes (periodos)")
+    for lo, hi, c in zip(BORDES_INTERVALO[:-1], BORDES_INTERVALO[1:], h_int):
+        print(f"  [{lo:>5g}, {hi:>5g})  {c}")
+    if a.llegada:
+        print("\nRetraso de llegada (ms)")
+        for lo, hi, c in zip(BORDES_LLEGADA[:-1], BORDES_LLEGADA[1:], h_lleg):
+            print(f"  [{lo:>5g}, {hi:>5g})  {c}")
+    else:
+        print("\nSin deriva ni retraso de llegada: Tiempo_s del CSV no es la hora de llegada")
+
+    if a.eventos:
+        print("\nCambios de estado del enlace")
+        for t, nivel, motivos in a.eventos:
+            print(f"  t={t:9.2f} s  {nivel:<10} {', '.join(motivos)}")
+
+
+if __name__ == "__main__":
+    main()
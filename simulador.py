@@ -0,0 +1,278 @@
+"""Dispositivo serie virtual (pty) que emite tramas LEEM sin banco de ensayos.
+
+Crea un pseudo-terminal, publica su extremo esclavo en ``DIR_SIMULADOS`` (así
+aparece en el menú de puertos de las GUIs, ver puertos.py) y emite tramas de
+cualquier esquema registrado a un ritmo fijo, de 10 Hz a 20 kHz. Responde a los
+comandos de la interfaz:
+
+    0x01  envía una trama suelta
+    0x02  inicia la emisión continua
+    0x03  detiene la emisión
+    0x04  ignición: arranca el perfil de quemado (empuje, presión, temperaturas)
+
+Se pueden inyectar fallos para probar el entramado: bytes basura entre tramas
+(``--ruido``), bytes perdidos dentro de una trama (``--perdidas``) y tramas con
+timestamp repetido (``--duplicados``). Sólo POSIX (usa ``os.openpty``).
+
+    python simulador.py --formato interfaz --hz 1000 --ruido 0.01
+    python simulador.py --formato celda --hz 80 --nombre ttySIM1
+"""
+import argparse
+import math
+import os
+import random
+import select
+import signal
+import time
+import tty
+
+from decodificador import _BAR_K, _BAR_OFFSET
+from esquemas import ESQUEMAS
+from puertos import DIR_SIMULADOS
+
+
+CMD_VALOR     = 0x01
+CMD_DATOS     = 0x02
+CMD_STOP      = 0x03
+CMD_IGNICION  = 0x04
+
+HZ_MIN        = 10
+HZ_MAX        = 20_000
+TICK          = 0.005      # s entre ráfagas de emisión
+
+_RANGOS = {
+    "b": (-0x80, 0x7F), "B": (0, 0xFF),
+    "h": (-0x8000, 0x7FFF), "H": (0, 0xFFFF),
+    "i": (-0x80000000, 0x7FFFFFFF), "I": (0, 0xFFFFFFFF),
+    "l": (-0x80000000, 0x7FFFFFFF), "L": (0, 0xFFFFFFFF),
+    "q": (-1 << 63, (1 << 63) - 1), "Q": (0, (1 << 64) - 1),
+}
+
+# ---------- PERFIL DE QUEMADO ----------
+EMPUJE_MAX    = 450.0      # N
+PRESION_MAX   = 35.0       # bar
+T_SUBIDA      = 0.3        # s
+T_QUEMADO     = 3.0        # s
+T_AMBIENTE    = 20.0       # °C
+# ---------------------------------------
+
+
+def perfil(t_ign):
+    """Fracción (0..1) del empuje nominal ``t_ign`` segundos tras la ignición."""
+    if t_ign is None or t_ign < 0:
+        return 0.0
+    if t_ign < T_SUBIDA:
+        return t_ign / T_SUBIDA
+    if t_ign < T_QUEMADO:
+        return 1.0 - 0.15 * (t_ign - T_SUBIDA) / (T_QUEMADO - T_SUBIDA)
+    return 0.85 * math.exp(-(t_ign - T_QUEMADO) / 0.2)
+
+
+class DispositivoSimulado:
+    """Genera tramas de ``esquema`` y las escribe en el maestro de un pty."""
+
+    def __init__(self, esquema, hz=1000, ruido=0.0, perdidas=0.0, duplicados=0.0,
+                 continuo=True, semilla=None):
+        if not HZ_MIN <= hz <= HZ_MAX:
+            raise ValueError(f"hz fuera de rango ({HZ_MIN}..{HZ_MAX}): {hz}")
+        self.esquema    = esquema
+        self.hz         = hz
+        self.ruido      = ruido
+        self.perdidas   = perdidas
+        self.duplicados = duplicados
+        self.activo     = continuo
+        self._rnd       = random.Random(semilla)
+
+        self.tramas       = 0      # tramas generadas
+        self.desbordes    = 0      # bytes descartados con el buffer del pty lleno
+        self.comandos     = 0
+        self._t_ign       = None   # instante (monotonic) de la última ignición
+        self._t0          = time.monotonic()
+        self._ultimo_ms   = 0
+
+        self.maestro, self._esclavo = os.openpty()
+        tty.setraw(self._esclavo)
+        os.set_blocking(self.maestro, False)
+        self.ruta_pty = os.ttyname(self._esclavo)
+        self.enlace   = None
+
+    # ---------- publicación ----------
+    def publicar(self, nombre=None):
+        """Crea ``DIR_SIMULADOS/<nombre>`` → pty para que lo vean las GUIs."""
+        os.makedirs(DIR_SIMULADOS, exist_ok=True)
+        if nombre is None:
+            k = 0
+            while os.path.lexists(os.path.join(DIR_SIMULADOS, f"ttySIM{k}")):
+                k += 1
+            nombre = f"ttySIM{k}"
+        enlace = os.path.join(DIR_SIMULADOS, nombre)
+        if os.path.lexists(enlace):
+            os.unlink(enlace)
+        os.symlink(self.ruta_pty, enlace)
+        self.enlace = enlace
+        return enlace
+
+    def cerrar(self):
+        if self.enlace is not None and os.path.lexists(self.enlace):
+            os.unlink(self.enlace)
+        self.enlace = None
+        for fd in (self.maestro, self._esclavo):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    # ---------- generación ----------
+    def _valores(self, t):
+        """Valores crudos (escalados y acotados al tipo) en el orden de ``nombres``."""
+        e     = self.esquema
+        ms    = int(round(t * 1000)) & 0xFFFFFFFF
+        if self._rnd.random() < self.duplicados:
+            ms = self._ultimo_ms
+        self._ultimo_ms = ms
+
+        t_ign  = None if self._t_ign is None else time.monotonic() - self._t_ign
+        f      = perfil(t_ign)
+        ruido  = self._rnd.gauss
+        empuje = EMPUJE_MAX * f + ruido(0.0, 0.5)
+        bar    = PRESION_MAX * f + ruido(0.0, 0.05)
+        calor  = 0.0 if t_ign is None else min(t_ign, 10.0) * 15.0
+
+        valores = []
+        for k, (nombre, c, div) in enumerate(zip(e.nombres, e.tipos, e.divisores)):
+            if nombre == "timestamp_ms":
+                v = ms
+            elif nombre == "thrust":
+                v = empuje * div
+            elif nombre.startswith("temp"):
+                v = (T_AMBIENTE + calor * (1 + 0.05 * k) + ruido(0.0, 0.1)) * div
+            elif nombre == "transducer":
+                v = (bar - _BAR_OFFSET) / _BAR_K
+            elif nombre == "pressure":
+                v = bar * div
+            elif nombre == "flags":
+                v = (self.activo << 0) | ((self._t_ign is not None) << 1)
+            else:
+                v = 2048 + ruido(0.0, 4.0)       # canales ADC sin uso
+            lo, hi = _RANGOS[c]
+            valores.append(min(max(int(round(v)), lo), hi))
+        return valores
+
+    def trama(self, t=None):
+        """Una trama completa (cabecera + payload), con fallos inyectados."""
+        e = self.esquema
+        if t is None:
+            t = time.monotonic() - self._t0
+        data = e.cabecera + e.struct.pack(*self._valores(t))
+        self.tramas += 1
+        if self._rnd.random() < self.perdidas:
+            k = self._rnd.randrange(len(data))
+            data = data[:k] + data[k + 1:]
+        if self._rnd.random() < self.ruido:
+            data = bytes(self._rnd.getrandbits(8)
+                         for _ in range(self._rnd.randint(1, 8))) + data
+        return data
+
+    def _escribir(self, data):
+        try:
+            n = os.write(self.maestro, data)
+        except BlockingIOError:
+            n = 0
+        # Como un UART sin lector: lo que no cabe se pierde
+        self.desbordes += len(data) - n
+
+    # ---------- comandos ----------
+    def _atender(self, data):
+        for cmd in data:
+            self.comandos += 1
+            if cmd == CMD_VALOR:
+                self._escribir(self.trama())
+            elif cmd == CMD_DATOS:
+                self.activo = True
+            elif cmd == CMD_STOP:
+                self.activo = False
+            elif cmd == CMD_IGNICION:
+                self._t_ign = time.monotonic()
+                self.activo = True
+
+    # ---------- bucle ----------
+    def ejecutar(self, duracion=None, parar=lambda: False):
+        """Emite hasta ``duracion`` segundos o hasta que ``parar()`` sea cierto.
+
+        A ritmos altos se emiten en cada tick todas las tramas pendientes de una
+        vez, con el timestamp que les corresponde, en una sola escritura.
+        """
+        periodo  = 1.0 / self.hz
+        espera   = min(TICK, periodo)
+        inicio   = time.monotonic()
+        debidas  = 0          # tramas emitidas desde que se (re)activó
+        base     = inicio
+        estaba   = self.activo
+        while not parar():
+            ahora = time.monotonic()
+            if duracion is not None and ahora - inicio >= duracion:
+                break
+
+            r, _, _ = select.select([self.maestro], [], [], espera)
+            if r:
+                try:
+                    self._atender(os.read(self.maestro, 256))
+                except (BlockingIOError, OSError):
+                    pass
+
+            ahora = time.monotonic()
+            if self.activo and not estaba:
+                base, debidas = ahora, 0
+            estaba = self.activo
+            if not self.activo:
+                continue
+
+            n = int((ahora - base) * self.hz) - debidas
+            if n <= 0:
+                continue
+            # El timestamp sale del número de trama, como en un reloj de
+            # muestreo: sin el jitter de cuándo se despierta este bucle
+            t0 = base - self._t0
+            self._escribir(b"".join(self.trama(t0 + (debidas + i) * periodo)
+                                    for i in range(n)))
+            debidas += n
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Dispositivo serie virtual LEEM (pty)")
+    p.add_argument("--formato", choices=sorted(ESQUEMAS), default="interfaz")
+    p.add_argument("--hz", type=float, default=1000,
+                   help=f"tramas por segundo ({HZ_MIN}..{HZ_MAX})")
+    p.add_argument("--ruido", type=float, default=0.0,
+                   help="probabilidad de insertar basura antes de cada trama")
+    p.add_argument("--perdidas", type=float, default=0.0,
+                   help="probabilidad de perder un byte de cada trama")
+    p.add_argument("--duplicados", type=float, default=0.0,
+                   help="probabilidad de repetir el timestamp anterior")
+    p.add_argument("--esperar", action="store_true",
+                   help="no emitir hasta recibir 0x02 (o 0x04)")
+    p.add_argument("--nombre", help="nombre del enlace en " + DIR_SIMULADOS)
+    p.add_argument("--duracion", type=float, help="segundos de emisión")
+    p.add_argument("--semilla", type=int)
+    args = p.parse_args(argv)
+
+    dispositivo = DispositivoSimulado(ESQUEMAS[args.formato], hz=args.hz,
+                                      ruido=args.ruido, perdidas=args.perdidas,
+                                      duplicados=args.duplicados,
+                                      continuo=not args.esperar, semilla=args.semilla)
+    parar = []
+    signal.signal(signal.SIGTERM, lambda *_: parar.append(1))
+    try:
+        enlace = dispositivo.publicar(args.nombre)
+        print(f"{args.formato} @ {args.hz:g} Hz en {dispositivo.ruta_pty} ({enlace})")
+        dispositivo.ejecutar(args.duracion, parar=lambda: bool(parar))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispositivo.cerrar()
+        print(f"{dispositivo.tramas} tramas, {dispositivo.comandos} comandos, "
+              f"{dispositivo.desbordes} bytes desbordados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Contabilidad de pérdidas y contrapresión entre el hilo lector y la GUI.
+
+``ColaAcotada`` sustituye a ``Queue(maxsize=...)`` + ``put_nowait`` en un
+``try/except``: la capacidad se mide en paquetes (no en bloques) y, cuando no
+cabe un bloque nuevo, se aplica una política explícita y se cuenta lo perdido:
+
+    antiguos   descarta los bloques más viejos (la GUI ve siempre lo último)
+    nuevos     descarta el bloque entrante (comportamiento anterior)
+    diezmar    se queda con 1 de cada k paquetes del bloque entrante, con k la
+               menor potencia de 2 que lo hace caber: se pierde resolución
+               pero no tramos enteros de señal
+
+``Telemetria`` junta estos contadores con los del ``Framer`` y, si lo hay, con
+el análisis de secuencia (secuencia.py) para la barra lateral y para el pie
+del registro.
+"""
+import threading
+import time
+from collections import deque
+
+
+POLITICAS = ("antiguos", "nuevos", "diezmar")
+
+
+class ColaAcotada:
+    """Cola hilo lector → GUI con capacidad en paquetes y política de descarte.
+
+    ``longitud(item)`` da los paquetes de un elemento (0 para mensajes de
+    control como ``{"tipo": "error"}``, que nunca se descartan) y
+    ``diezmar(item, k)`` devuelve el elemento con uno de cada ``k`` paquetes.
+    """
+
+    def __init__(self, capacidad, politica="antiguos", longitud=len, diezmar=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"política de cola desconocida: {politica!r}")
+        if politica == "diezmar" and diezmar is None:
+            raise ValueError("la política 'diezmar' necesita la función diezmar")
+        self.capacidad = int(capacidad)
+        self.politica  = politica
+        self._longitud = longitud
+        self._diezmar  = diezmar
+        self._items    = deque()        # (t_encolado, n_paquetes, item)
+        self._lock     = threading.Lock()
+        self._reset_contadores()
+
+    def _reset_contadores(self):
+        self.paquetes        = 0      # en cola ahora mismo
+        self.encolados       = 0
+        self.descartados     = 0      # paquetes perdidos por la política
+        self.diezmados       = 0      # bloques reducidos (política 'diezmar')
+        self.maximo          = 0      # marca de agua alta, en paquetes
+        self.latencia_ms     = 0.0    # espera del bloque más viejo en el último vaciado
+        self.latencia_max_ms = 0.0
+
+    def __len__(self):
+        return self.paquetes
+
+    # ---------- hilo lector ----------
+    def put(self, item):
+        """Encola sin bloquear nunca; devuelve los paquetes descartados."""
+        n = self._longitud(item)
+        with self._lock:
+            libre    = self.capacidad - self.paquetes
+            perdidos = 0
+            if n > libre:
+                if self.politica == "antiguos":
+                    perdidos = self._liberar(n - libre)
+                    libre    = self.capacidad - self.paquetes
+                elif self.politica == "diezmar":
+                    item, n, perdidos = self._reducir(item, n, libre)
+                if n > libre:
+                    perdidos += n           # no cabe ni siquiera así
+                    item      = None
+
+            if item is not None:
+                self._items.append((time.monotonic(), n, item))
+                self.paquetes  += n
+                self.encolados += n
+                self.maximo     = max(self.maximo, self.paquetes)
+            self.descartados += perdidos
+        return perdidos
+
+    def _liberar(self, necesarios):
+        perdidos = 0
+        while self._items and perdidos < necesarios:
+            _, m, _ = self._items[0]
+            if m == 0:
+                break                   # mensajes de control: nunca se pierden
+            self._items.popleft()
+            self.paquetes -= m
+            perdidos      += m
+        return perdidos
+
+    def _reducir(self, item, n, libre):
+        """(item diezmado, paquetes que quedan, paquetes perdidos)."""
+        k = 2
+        while -(-n // k) > libre and k < n:
+            k *= 2
+        if libre <= 0 or -(-n // k) > libre:
+            return item, n, 0
+        reducido = self._diezmar(item, k)
+        m = self._longitud(reducido)
+        self.diezmados += 1
+        return reducido, m, n - m
+
+    # ---------- hilo de la GUI ----------
+    def vaciar(self):
+        """Saca todos los elementos pendientes y actualiza la latencia de vaciado."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            self.paquetes = 0
+        self.latencia_ms = (time.monotonic() - items[0][0]) * 1000.0 if items else 0.0
+        self.latencia_max_ms = max(self.latencia_max_ms, self.latencia_ms)
+        return [item for _, _, item in items]
+
+    def clear(self):
+        """Vacía la cola y pone a cero los contadores (nueva conexión)."""
+        with self._lock:
+            self._items.clear()
+            self._reset_contadores()
+
+
+class Telemetria:
+    """Resumen de contadores del entramado y de la cola para mostrar y registrar."""
+
+    def __init__(self, cola, framer=None, secuencia=None, registro=None):
+        self.cola      = cola
+        self.framer    = framer
+        self.secuencia = secuencia
+        self.registro  = registro      # RegistroCSV: filas pendientes y error de escritura
+
+    def valores(self):
+        f, c = self.framer, self.cola
+        v = {
+            "tramas":          f.tramas if f else 0,
+            "resyncs":         f.resyncs if f else 0,
+            "fallos_longitud": f.fallos_longitud if f else 0,
+            "seguidas_basura": f.seguidas_basura if f else 0,
+            "bytes_basura":    f.descartados if f else 0,
+            "encolados":       c.encolados,
+            "descartados":     c.descartados,
+            "diezmados":       c.diezmados,
+            "cola":            c.paquetes,
+            "cola_max":        c.maximo,
+            "capacidad":       c.capacidad,
+            "politica":        c.politica,
+            "latencia_ms":     round(c.latencia_ms, 1),
+            "latencia_max_ms": round(c.latencia_max_ms, 1),
+        }
+        if self.secuencia is not None:
+            v.update({f"secuencia_{k}": x for k, x in self.secuencia.resumen().items()})
+        if self.registro is not None:
+            v["registro_pendientes"] = self.registro.pendientes
+            v["registro_error"]      = self.registro.error
+        return v
+
+    def texto(self):
+        """Texto corto de varias líneas para la barra lateral."""
+        v = self.valores()
+        texto = (f"Tramas: {v['tramas']}  Resync: {v['resyncs']}\n"
+                 f"Long. mal: {v['fallos_longitud']}  Perdidos: {v['descartados']}\n"
+                 f"Cola: {v['cola_max']}/{v['capacidad']} máx ({v['politica']})\n"
+                 f"Latencia: {v['latencia_ms']:.0f} ms (máx {v['latencia_max_ms']:.0f})")
+        if self.secuencia is not None:
+            texto += "\n" + self.secuencia.texto()
+        if self.registro is not None:
+            if v["registro_error"] is not None:
+                texto += f"\nRegistro DETENIDO: {v['registro_error']}"
+            else:
+                texto += f"\nRegistro: {v['registro_pendientes']} filas pendientes"
+        return texto
+
+    def pie(self):
+        """Líneas de comentario para el final del registro CSV."""
+        return "".join(f"# {k}={v}\n" for k, v in self.valores().items())
@@ -1,50 +1,35 @@
-import serial
-import serial.tools.list_ports
 import time
-import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
-from queue import Queue, Empty
 import struct
 import sys
 import csv
 import os
 from collections import deque
 
+from adquisicion import Motor
+from esquemas import INSPECTOR
+from puertos import VigilantePuertos
+from replay import puertos_replay
+
 # ---------- CONFIGURACIÓN ----------
-TIMEOUT        = 1
-SYNC1          = 0xFE
-SYNC2          = 0xFB
-PACKET_SIZE    = 28
 MAX_ROWS       = 200
 DEDUP_WINDOW   = 3      # si el timestamp_ms es igual N veces seguidas, descarta
 CSV_FILE       = "packets.csv"
+CAPACIDAD_COLA = 10_000 # paquetes entre el motor y la GUI
 # -----------------------------------
 
-ser           = None
 leyendo       = False
-data_queue    = Queue(maxsize=1000)
+# Sin decodificador: cada fila del bloque es el payload crudo (dtype del esquema)
+motor         = Motor(INSPECTOR)
+data_queue    = motor.suscribir(CAPACIDAD_COLA)
+pared_offset  = 0.0    # time.time() - perf_counter(), para mostrar hora local
 paquete_count = 0
 last_ts_ms    = None   # para deduplicación
 dup_count     = 0      # contador de duplicados descartados
 selected_payload = None  # payload de la fila seleccionada
 
-FIELDS = [
-    ("timestamp_ms", "I"),
-    ("tempTP[0]",    "h"),
-    ("tempTP[1]",    "h"),
-    ("tempTP[2]",    "h"),
-    ("tempTP[3]",    "h"),
-    ("thrust",       "h"),
-    ("pressure",     "h"),
-    ("flags",        "H"),
-    ("adc1",         "H"),
-    ("adc2",         "H"),
-    ("adc3",         "H"),
-    ("adc4",         "H"),
-]
-STRUCT_FMT  = "<" + "".join(t for _, t in FIELDS)
-FIELD_NAMES = [n for n, _ in FIELDS]
+FIELD_NAMES = INSPECTOR.nombres
 
 
 def make_button(parent, text, command, bg="#C88A53", fg="white",
@@ -92,14 +77,14 @@ def make_button(parent, text, command, bg="#C88A53", fg="white",
     return frame
 
 
-def obtener_puertos():
-    return [p.device for p in serial.tools.list_ports.comports()]
+# comports() corre en un hilo aparte; aquí sólo se recogen los cambios
+vigilante = VigilantePuertos(puertos_replay(sys.argv[1:]))
 
 
 def refrescar_puertos():
     global puertos_actuales
-    nuevos = obtener_puertos()
-    if nuevos != puertos_actuales:
+    nuevos = vigilante.cambios()
+    if nuevos is not None and nuevos != puertos_actuales:
         puertos_actuales = nuevos
         menu = puerto_menu["menu"]
         menu.delete(0, "end")
@@ -112,55 +97,68 @@ def refrescar_puertos():
             menu.add_command(label="No hay puertos",
                              command=lambda: puerto_var.set("No hay puertos"))
             puerto_var.set("No hay puertos")
-    ventana.after(1000, refrescar_puertos)
+    ventana.after(250, refrescar_puertos)
 
 
 def conectar():
-    global ser, leyendo, paquete_count, last_ts_ms, dup_count
-
     puerto = puerto_var.get()
     if puerto == "No hay puertos":
         return
 
+    # Sin escaneos de puertos mientras dura la conexión
+    vigilante.pausar()
     try:
-        ser = serial.Serial(puerto, int(baudrate_var.get()), timeout=TIMEOUT)
-        time.sleep(1)
-
-        leyendo      = True
-        paquete_count = 0
-        last_ts_ms   = None
-        dup_count    = 0
-
-        while not data_queue.empty():
-            try: data_queue.get_nowait()
-            except Empty: break
+        # Apertura y espera al reinicio del Teensy en el hilo del motor
+        futuro = motor.iniciar(puerto, int(baudrate_var.get()), espera_reset=1.0)
+    except Exception as e:
+        estado_label.config(text=f"Error: {e}", fg="red")
+        return
 
-        for row in tree.get_children():
-            tree.delete(row)
+    estado_label.config(text="Conectando...", fg="orange")
+    btn_conectar.config(state="disabled")
+    ventana.after(50, lambda: _esperar_conexion(futuro))
 
-        threading.Thread(target=leer_datos, daemon=True).start()
-        ventana.after(50, procesar_queue)
 
-        estado_label.config(text="Conectado", fg="#00FF88")
-        btn_conectar.config(state="disabled")
-        btn_desconectar.config(state="normal")
-        btn_clear.config(state="normal")
-        btn_export.config(state="normal")
+def _esperar_conexion(futuro):
+    global leyendo, paquete_count, last_ts_ms, dup_count, pared_offset
 
+    if not futuro.done():
+        ventana.after(50, lambda: _esperar_conexion(futuro))
+        return
+    try:
+        futuro.result()
     except Exception as e:
+        motor.detener()
+        vigilante.reanudar()
         estado_label.config(text=f"Error: {e}", fg="red")
+        btn_conectar.config(state="normal")
+        return
 
+    leyendo      = True
+    paquete_count = 0
+    last_ts_ms   = None
+    dup_count    = 0
+    pared_offset = time.time() - time.perf_counter()
+
+    for row in tree.get_children():
+        tree.delete(row)
+
+    ventana.after(50, procesar_queue)
+
+    estado_label.config(text="Conectado", fg="#00FF88")
+    btn_desconectar.config(state="normal")
+    btn_clear.config(state="normal")
+    btn_export.config(state="normal")
 
-def desconectar():
-    global ser, leyendo
+
+def desconectar(estado="Desconectado"):
+    global leyendo
 
     leyendo = False
-    if ser and ser.is_open:
-        try: ser.close()
-        except: pass
-    ser = None
+    motor.detener()
+    vigilante.reanudar()
 
-    estado_label.config(text="Desconectado", fg="red")
+    estado_label.config(text=estado, fg="red")
     count_label.config(text="Paquetes: 0")
     dup_label.config(text="Dups: 0")
     btn_conectar.config(state="normal")
@@ -168,58 +166,17 @@ def desconectar():
     btn_clear.config(state="disabled")
 
 
-def leer_datos():
-    global leyendo
-
-    while leyendo:
-        try:
-            b = ser.read(1)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"}); break
-
-        if len(b) != 1 or b[0] != SYNC1:
-            continue
-
-        try:
-            b2 = ser.read(1)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"}); break
-
-        if len(b2) != 1 or b2[0] != SYNC2:
-            continue
-
-        try:
-            payload = ser.read(PACKET_SIZE)
-        except (serial.SerialException, OSError):
-            data_queue.put({"tipo": "error"}); break
-
-        if len(payload) != PACKET_SIZE:
-            continue
-
-        ts = time.time()
-        try:
-            data_queue.put_nowait({"tipo": "datos", "payload": payload, "ts": ts})
-        except:
-            pass
-
-
 def payload_to_hex(payload: bytes) -> str:
     return " ".join(f"{b:02X}" for b in payload)
 
 
 def payload_to_nums(payload: bytes) -> list:
     try:
-        values = struct.unpack(STRUCT_FMT, payload)
-        result = []
-        for i, (name, _) in enumerate(FIELDS):
-            v = values[i]
-            if name in ("thrust", "pressure") or name.startswith("tempTP"):
-                result.append(f"{v / 100.0:.2f}")
-            else:
-                result.append(str(v))
-        return result
+        values = INSPECTOR.decodificar(payload)
+        return [f"{v:.2f}" if d != 1 else str(v)
+                for v, d in zip(values, INSPECTOR.divisores)]
     except struct.error:
-        return ["ERR"] * len(FIELDS)
+        return ["ERR"] * len(FIELD_NAMES)
 
 
 def is_duplicate(payload: bytes) -> bool:
@@ -228,7 +185,6 @@ def is_duplicate(payload: bytes) -> bool:
     ts_ms = struct.unpack_from("<I", payload, 0)[0]
     if ts_ms == last_ts_ms:
         dup_count += 1
-        dup_label.config(text=f"Dups: {dup_count}")
         return True
     last_ts_ms = ts_ms
     return False
@@ -240,45 +196,60 @@ def procesar_queue():
     if not leyendo:
         return
 
-    modo = view_mode.get()
-    procesados = 0
+    modo  = view_mode.get()
+    dedup = dedup_var.get()
+    filas = []      # (número, ts, payload) de todo lo recibido desde el último tick
+    error = False
+    fin   = False
 
-    while procesados < 30:
-        try:
-            paquete = data_queue.get_nowait()
-        except Empty:
+    # Se vacía la cola entera en cada tick: un bloque por lectura del motor
+    for bloque in data_queue.vaciar():
+        if bloque["tipo"] == "error":
+            error = True
+            break
+        if bloque["tipo"] == "fin":
+            fin = True
             break
 
-        if paquete["tipo"] == "error":
-            ventana.after(0, desconectar)
-            return
-
-        payload = paquete["payload"]
-        ts      = paquete["ts"]
-
-        # --- Filtro de duplicados ---
-        if dedup_var.get() and is_duplicate(payload):
-            continue
-
-        paquete_count += 1
+        crudo = bloque["datos"].tobytes()
+        tam   = INSPECTOR.tam_payload
+        for k, ts in enumerate((bloque["t"] + pared_offset).tolist()):
+            payload = crudo[k * tam:(k + 1) * tam]
+            # --- Filtro de duplicados ---
+            if dedup and is_duplicate(payload):
+                continue
+            paquete_count += 1
+            filas.append((paquete_count, ts, payload))
+
+    # La tabla sólo muestra las MAX_ROWS más recientes: no se insertan filas
+    # que se borrarían en este mismo tick
+    for n, ts, payload in filas[-MAX_ROWS:]:
         ts_str = time.strftime("%H:%M:%S", time.localtime(ts)) + \
                  f".{int((ts % 1) * 1000):03d}"
 
         if modo == "hex":
-            cols = (paquete_count, ts_str, payload_to_hex(payload))
+            cols = (n, ts_str, payload_to_hex(payload))
         else:
             nums = payload_to_nums(payload)
-            cols = (paquete_count, ts_str, *nums)
+            cols = (n, ts_str, *nums)
 
-        tag = "odd" if paquete_count % 2 else "even"
+        tag = "odd" if n % 2 else "even"
         tree.insert("", 0, values=cols, tags=(tag,))
 
+    if filas:
         children = tree.get_children()
         if len(children) > MAX_ROWS:
-            tree.delete(children[-1])
-
+            tree.delete(*children[MAX_ROWS:])
         count_label.config(text=f"Paquetes: {paquete_count}")
-        procesados += 1
+    if dedup:
+        dup_label.config(text=f"Dups: {dup_count}")
+
+    if error:
+        ventana.after(0, desconectar)
+        return
+    if fin:
+        ventana.after(0, desconectar, "Reproducción terminada")
+        return
 
     ventana.after(50, procesar_queue)
 
@@ -447,11 +418,10 @@ frame_left.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
 frame_left.pack_propagate(False)
 
 tk.Label(frame_left, text="Puerto COM", bg="#2C2A36", fg="white").pack(anchor="w", pady=(10, 2))
-puerto_var       = tk.StringVar()
-puertos_actuales = obtener_puertos()
-puerto_var.set(puertos_actuales[0] if puertos_actuales else "No hay puertos")
-puerto_menu = tk.OptionMenu(frame_left, puerto_var,
-                            *(puertos_actuales if puertos_actuales else ["No hay puertos"]))
+# La primera búsqueda de puertos se hace con la ventana ya dibujada
+puerto_var       = tk.StringVar(value="No hay puertos")
+puertos_actuales = []
+puerto_menu = tk.OptionMenu(frame_left, puerto_var, "No hay puertos")
 puerto_menu.pack(fill="x", padx=5)
 
 tk.Label(frame_left, text="Baudrate", bg="#2C2A36", fg="white").pack(anchor="w", pady=(10, 2))
@@ -575,5 +545,6 @@ detail_text.pack(fill=tk.X, padx=4, pady=4)
 cambiar_modo()
 
 ventana.protocol("WM_DELETE_WINDOW", cerrar)
-ventana.after(1000, refrescar_puertos)
+vigilante.iniciar()
+ventana.after(100, refrescar_puertos)
 ventana.mainloop()
@@ -1,5 +1,7 @@
 import struct
 
+from esquemas import LEEM
+
 # Ejemplo de paquete de prueba simulando datos del Arduino
 # Timestamp: 1000 ms
 # Thrust: 173.76 N → 17376 como int16
@@ -36,17 +38,8 @@ print(f"Payload generado: {len(payload)} bytes")
 print("Bytes (hex):", payload.hex())
 print()
 
-# Ahora decodificar como lo hace Python
-timestamp_ms = struct.unpack("<I", payload[0:4])[0]
-thrust_raw = struct.unpack("<h", payload[4:6])[0]
-thrust = thrust_raw / 100.0
-
-temps = []
-for i in range(10):
-    temp_raw = struct.unpack("<h", payload[6 + i*2:8 + i*2])[0]
-    temps.append(temp_raw / 100.0)
-
-transducer_raw = struct.unpack("<H", payload[26:28])[0]
+# Ahora decodificar como lo hace Python (esquemas.LEEM)
+timestamp_ms, thrust, *temps, transducer_raw = LEEM.decodificar(payload)
 
 # Mostrar resultados
 print(f"Timestamp: {timestamp_ms} ms")